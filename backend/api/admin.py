@@ -227,6 +227,13 @@ from .models import (
     AttendanceRecord,
     OvertimeRequest,
     SalaryRecord,
+    MonthlyAttendanceSummary,
+    Job,
+    CompanyStatCounter,
+    HRCorrelationMoments,
+    MonthlySalaryTotal,
+    PositionStatistics,
+    RegionStatistics,
 )
 
 
@@ -313,21 +320,94 @@ class SalaryRecordAdmin(admin.ModelAdmin):
     ]
 
     def get_absent_days(self, obj):
-        return obj.details.get("absent_days", 0)
+        return obj.absent_days
 
     get_absent_days.short_description = "Absent Days"
 
     def get_late_days(self, obj):
-        return obj.details.get("late_days", 0)
+        return obj.late_days
 
     get_late_days.short_description = "Late Days"
 
     def get_overtime_hours(self, obj):
-        return obj.details.get("overtime_hours", 0)
+        return obj.overtime_hours
 
     get_overtime_hours.short_description = "Overtime Hours"
 
 
+@admin.register(MonthlyAttendanceSummary)
+class MonthlyAttendanceSummaryAdmin(admin.ModelAdmin):
+    list_display = [
+        "user",
+        "month",
+        "year",
+        "absent_days",
+        "late_days",
+        "lateness_hours",
+        "overtime_hours",
+        "updated_at",
+    ]
+    list_filter = ["year", "month"]
+    search_fields = ["user__username"]
+    readonly_fields = ["updated_at"]
+
+
+@admin.register(CompanyStatCounter)
+class CompanyStatCounterAdmin(admin.ModelAdmin):
+    list_display = [
+        "scope",
+        "key",
+        "employee_count",
+        "total_lateness_hours",
+        "total_absent_days",
+        "number_of_non_holiday_days_since_join",
+    ]
+    list_filter = ["scope"]
+
+
+@admin.register(MonthlySalaryTotal)
+class MonthlySalaryTotalAdmin(admin.ModelAdmin):
+    list_display = ["year", "month", "record_count", "total_paid"]
+    list_filter = ["year"]
+
+
+@admin.register(HRCorrelationMoments)
+class HRCorrelationMomentsAdmin(admin.ModelAdmin):
+    list_display = ["hr", "metric", "n", "sum_x", "sum_y"]
+    list_filter = ["metric"]
+
+
+@admin.register(PositionStatistics)
+class PositionStatisticsAdmin(admin.ModelAdmin):
+    list_display = ["snapshot_date", "position_name", "employee_count", "avg_lateness"]
+    list_filter = ["position_name"]
+    date_hierarchy = "snapshot_date"
+
+
+@admin.register(RegionStatistics)
+class RegionStatisticsAdmin(admin.ModelAdmin):
+    list_display = ["snapshot_date", "region_name", "employee_count", "avg_lateness"]
+    list_filter = ["region_name"]
+    date_hierarchy = "snapshot_date"
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "kind",
+        "status",
+        "progress",
+        "attempts",
+        "created_by",
+        "created_at",
+        "finished_at",
+    ]
+    list_filter = ["status", "kind"]
+    search_fields = ["created_by__username"]
+    readonly_fields = ["created_at", "started_at", "finished_at", "worker"]
+
+
 from .models import (
     HolidayYearday,
     HolidayWeekday,
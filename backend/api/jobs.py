@@ -0,0 +1,212 @@
+"""
+Background job handlers, run by `manage.py run_workers`.
+
+Each handler receives the Job (for progress reporting) and the payload as
+keyword arguments, and returns a JSON-serializable result.
+"""
+
+import os
+from io import BytesIO
+
+import joblib
+import numpy as np
+from django.utils import timezone
+
+from .models import (
+    HR,
+    EducationDegree,
+    EducationField,
+    Employee,
+    Region,
+    Skill,
+)
+from .utils.jobs import register_job
+
+PREDICTIVE_MODELS_DIR = os.path.join("api", "predictive_models")
+
+# Employee field -> model file predicting it
+PREDICTION_MODELS = {
+    "predicted_basic_salary": "salary_model.pkl",
+    "predicted_avg_task_rating": "task_ratings_model.pkl",
+    "predicted_avg_time_remaining_before_deadline": "time_remaining_model.pkl",
+    "predicted_avg_overtime_hours": "overtime_hours_model.pkl",
+    "predicted_avg_lateness_hours": "lateness_hours_model.pkl",
+    "predicted_avg_absent_days": "absent_days_model.pkl",
+}
+
+
+@register_job("company_statistics")
+def calculate_company_statistics(job):
+    from .serializers import CompanyStatisticsSerializer
+    from .utils.company_stats import calculate_statistics, create_statistics_snapshot
+
+    job.report_progress(5, "Calculating statistics")
+    stats = calculate_statistics()
+    job.report_progress(90, "Saving snapshot")
+    company_stats = create_statistics_snapshot(stats)
+    return CompanyStatisticsSerializer(company_stats).data
+
+
+@register_job("rank_employees")
+def rank_employees(job, weights):
+    """Global and per-position ranking of accepted employees by weighted score."""
+    from django.db.models import Count
+
+    from .utils.ranking import rank_employees as rank_in_database
+
+    job.report_progress(10, "Ranking employees")
+    count = rank_in_database(weights)
+
+    job.report_progress(80, "Summarizing")
+    accepted = Employee.objects.filter(interview_state="accepted")
+    position_stats = {
+        row["position__name"]: {"count": row["count"], "top_performer": None}
+        for row in accepted.order_by("position_id")
+        .values("position_id", "position__name")
+        .annotate(count=Count("id"))
+    }
+    global_top_performer = None
+    # Ties share a rank; the first in id order is reported
+    for position, username, rank in accepted.filter(position_rank=1).order_by(
+        "rank", "id"
+    ).values_list("position__name", "user__username", "rank"):
+        if rank == 1 and global_top_performer is None:
+            global_top_performer = username
+        if position_stats[position]["top_performer"] is None:
+            position_stats[position]["top_performer"] = username
+
+    return {
+        "detail": f"{count} employees ranked successfully.",
+        "global_top_performer": global_top_performer,
+        "position_stats": position_stats,
+    }
+
+
+@register_job("hr_stats")
+def calculate_hr_stats(job, hr_id):
+    hr_profile = HR.objects.get(pk=hr_id)
+    job.report_progress(10, "Recalculating HR statistics")
+    hr_profile.calculate_accepted_employees_stats()
+    return {
+        "status": "success",
+        "message": "Your HR statistics have been recalculated",
+        "hr_id": hr_profile.id,
+        "user_id": hr_profile.user_id,
+    }
+
+
+@register_job("recalculate_salaries")
+def recalculate_salaries(job):
+    """Recompute the salary records flagged by mark_salaries_dirty()."""
+    from .utils.payroll import recalculate_dirty_salaries
+
+    return {"recalculated": recalculate_dirty_salaries()}
+
+
+@register_job("employee_predictions")
+def predict_employee_metrics(job, employee_id):
+    employee = Employee.objects.select_related(
+        "region", "highest_education_degree", "highest_education_field"
+    ).get(pk=employee_id)
+    input_data = np.array(
+        [
+            [
+                employee.region.distance_to_work,
+                employee.highest_education_degree.id,
+                employee.highest_education_field.id,
+                employee.years_of_experience,
+                int(employee.had_leadership_role),
+                employee.percentage_of_matching_skills,
+                int(employee.has_position_related_high_education),
+            ]
+        ]
+    )
+
+    predictions = {}
+    for i, (field, filename) in enumerate(PREDICTION_MODELS.items()):
+        job.report_progress(i * 100 / len(PREDICTION_MODELS), f"Predicting {field}")
+        model = joblib.load(os.path.join(PREDICTIVE_MODELS_DIR, filename))
+        predictions[field] = float(model.predict(input_data)[0])
+
+    for field, value in predictions.items():
+        setattr(employee, field, value)
+    employee.last_prediction_date = timezone.now()
+    employee.save(update_fields=[*predictions, "last_prediction_date"])
+
+    return {"status": "Predictions updated successfully", **predictions}
+
+
+@register_job("process_cv")
+def process_cv(job, employee_id, cv_filename):
+    """
+    Extract an applicant's profile from their uploaded CV with the LLM and
+    fill in the optional employee fields it finds.
+    """
+    from .cv_processing.LLM_utils import TogetherCVProcessor
+    from .supabase_utils import download_from_supabase
+
+    employee = Employee.objects.select_related("application_link__position").get(
+        pk=employee_id
+    )
+    application_link = employee.application_link
+
+    job.report_progress(10, "Downloading CV")
+    cv_file = BytesIO(download_from_supabase("cvs", cv_filename))
+
+    job.report_progress(30, "Extracting CV information")
+    cv_info = TogetherCVProcessor().extract_info(
+        cv_file=cv_file,
+        choices={
+            "skills": list(Skill.objects.values_list("name", flat=True)),
+            "degrees": list(EducationDegree.objects.values_list("name", flat=True)),
+            "regions": list(Region.objects.values_list("name", flat=True)),
+            "fields": list(EducationField.objects.values_list("name", flat=True)),
+        },
+        position=application_link.position,
+    )
+
+    job.report_progress(80, "Saving applicant profile")
+    updates = {}
+    skills_list = []
+    if "skills" in cv_info:
+        skills_list = Skill.objects.filter(name__in=cv_info["skills"])
+        required_skills = application_link.skills.all()
+        relevant_emp_skills = skills_list.filter(id__in=required_skills)
+        updates["percentage_of_matching_skills"] = (
+            (relevant_emp_skills.count() / required_skills.count()) * 100
+            if required_skills.exists()
+            else 0
+        )
+    if "region" in cv_info:
+        updates["region"] = Region.objects.get(name=cv_info["region"])
+    if "degree" in cv_info:
+        updates["highest_education_degree"] = EducationDegree.objects.get(
+            name=cv_info["degree"]
+        )
+    if "field" in cv_info:
+        updates["highest_education_field"] = EducationField.objects.get(
+            name=cv_info["field"]
+        )
+    for field, key in (
+        ("years_of_experience", "experience"),
+        ("had_leadership_role", "had_leadership"),
+        (
+            "has_position_related_high_education",
+            "has_position_related_high_education",
+        ),
+    ):
+        if cv_info.get(key) is not None:
+            updates[field] = cv_info[key]
+
+    for field, value in updates.items():
+        setattr(employee, field, value)
+    if updates:
+        employee.save(update_fields=list(updates))
+    if skills_list:
+        employee.skills.set(skills_list)
+
+    return {
+        "employee_id": employee.id,
+        "extracted_fields": sorted(updates),
+        "skills": [skill.name for skill in skills_list],
+    }
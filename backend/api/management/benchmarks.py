@@ -0,0 +1,37 @@
+"""
+Safety checks shared by the benchmark commands, which bulk-insert synthetic
+users, employees and attendance into the default database and delete them
+afterwards.
+"""
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def add_write_arguments(parser):
+    parser.add_argument(
+        "--allow-writes",
+        action="store_true",
+        help="Confirm that synthetic rows may be written to (and deleted from) "
+        "the default database. Never point it at production.",
+    )
+
+
+def check_writes_allowed(options):
+    """
+    Refuse to run unless --allow-writes was given and the default database
+    is not one of settings.PRODUCTION_DATABASE_HOSTS.
+    """
+    database = connections[DEFAULT_DB_ALIAS].settings_dict
+    target = f"{database['NAME']} on {database['HOST'] or 'localhost'}"
+    if database["HOST"] in getattr(settings, "PRODUCTION_DATABASE_HOSTS", []):
+        raise CommandError(
+            f"The default database ({target}) is a production database. Point "
+            "DATABASES['default'] at a scratch database to run benchmarks."
+        )
+    if not options["allow_writes"]:
+        raise CommandError(
+            f"This benchmark writes and deletes synthetic rows in {target}. "
+            "Pass --allow-writes to confirm it is a scratch database."
+        )
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.utils.partitioning import (
+    ARCHIVE_SCHEMA,
+    add_months,
+    archive_month_partition,
+    compact_archive_table,
+    is_partitioned,
+    list_month_partitions,
+    month_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Detach monthly attendance partitions older than the retention window "
+        f"and move them, with their overtime requests, into the {ARCHIVE_SCHEMA} "
+        "schema as compacted read-only tables. Archived days disappear from "
+        "the API; monthly summaries and salary records are kept. PostgreSQL only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=24,
+            help="Full months to keep live before the current one (default 24)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the partitions that would be archived without changing anything",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Attendance partitioning needs PostgreSQL.")
+        if options["retention_months"] < 1:
+            raise CommandError("--retention-months must be at least 1.")
+
+        cutoff = add_months(
+            month_start(timezone.localdate()), -options["retention_months"]
+        )
+        with connection.cursor() as cursor:
+            if not is_partitioned(cursor):
+                raise CommandError(
+                    "api_attendancerecord is not partitioned; run migrate first."
+                )
+            expired = [
+                name for name, month in list_month_partitions(cursor) if month < cutoff
+            ]
+
+        if not expired:
+            self.stdout.write(f"No partitions older than {cutoff:%Y-%m}.")
+            return
+        if options["dry_run"]:
+            for name in expired:
+                self.stdout.write(f"Would archive {name}")
+            return
+
+        for name in expired:
+            # One transaction per month, so an interrupted run leaves every
+            # partition either live or fully archived.
+            with transaction.atomic(), connection.cursor() as cursor:
+                tables = archive_month_partition(cursor, name)
+            # VACUUM FULL cannot run inside a transaction block
+            with connection.cursor() as cursor:
+                for table in tables:
+                    compact_archive_table(cursor, table)
+            self.stdout.write(f"Archived {name} -> {', '.join(tables)}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {len(expired)} partition(s).")
+        )
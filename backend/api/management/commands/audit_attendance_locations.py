@@ -0,0 +1,134 @@
+import csv
+import time
+from datetime import datetime
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import AttendanceRecord
+from api.utils.geofence import load_sites
+from api.utils.geofence_batch import validate_locations
+from api.utils.queryset_utils import iter_values_by_pk
+
+FIELDS = [
+    "id",
+    "user__username",
+    "date",
+    "check_in_time",
+    "check_out_time",
+    "check_in_latitude",
+    "check_in_longitude",
+    "check_out_latitude",
+    "check_out_longitude",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Audit physical attendance records in a date range for missing or "
+        "out-of-radius check-in/check-out coordinates"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", required=True, help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", required=True, help="YYYY-MM-DD")
+        parser.add_argument(
+            "--output", help="Write every flagged record to this CSV file"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=50000, help="Records per batch"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start = datetime.strptime(options["date_from"], "%Y-%m-%d").date()
+            end = datetime.strptime(options["date_to"], "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError("Dates must be in YYYY-MM-DD format.")
+
+        started = time.perf_counter()
+        sites = load_sites()
+        records = iter_values_by_pk(
+            AttendanceRecord.objects.filter(
+                date__range=(start, end), attendance_type="physical"
+            ).exclude(status="absent"),
+            FIELDS,
+            options["chunk_size"],
+        )
+
+        totals = {
+            "records": 0,
+            "check_in_missing": 0,
+            "check_in_out_of_radius": 0,
+            "check_out_missing": 0,
+            "check_out_out_of_radius": 0,
+        }
+        output = open(options["output"], "w", newline="") if options["output"] else None
+        writer = csv.writer(output) if output else None
+        if writer:
+            writer.writerow(
+                ["record_id", "username", "date", "event", "issue", "nearest_site", "distance_m"]
+            )
+
+        try:
+            chunk = []
+            for row in records:
+                chunk.append(row)
+                if len(chunk) >= options["chunk_size"]:
+                    self._audit_chunk(chunk, sites, totals, writer)
+                    chunk = []
+            if chunk:
+                self._audit_chunk(chunk, sites, totals, writer)
+        finally:
+            if output:
+                output.close()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Audited {totals['records']} physical records against {len(sites)} site(s) "
+            f"from {start} to {end} in {elapsed:.2f}s"
+        )
+        for key, value in totals.items():
+            if key != "records":
+                self.stdout.write(f"  {key.replace('_', ' ')}: {value}")
+        self.stdout.write(self.style.SUCCESS("Location audit finished."))
+
+    def _audit_chunk(self, chunk, sites, totals, writer):
+        totals["records"] += len(chunk)
+        columns = list(zip(*chunk))
+        record_ids, usernames, dates = columns[0], columns[1], columns[2]
+
+        for event, time_column, lat_column, lon_column in (
+            ("check_in", 3, 5, 6),
+            ("check_out", 4, 7, 8),
+        ):
+            # Only records where the event happened are expected to carry coordinates
+            happened = np.array([value is not None for value in columns[time_column]])
+            is_missing, is_inside, nearest_index, nearest_distance = validate_locations(
+                np.array(columns[lat_column], dtype=float),
+                np.array(columns[lon_column], dtype=float),
+                sites,
+            )
+            missing = happened & is_missing
+            out_of_radius = happened & ~is_missing & ~is_inside
+            totals[f"{event}_missing"] += int(missing.sum())
+            totals[f"{event}_out_of_radius"] += int(out_of_radius.sum())
+
+            if writer is None:
+                continue
+            for i in np.flatnonzero(missing | out_of_radius):
+                writer.writerow(
+                    [
+                        record_ids[i],
+                        usernames[i],
+                        dates[i],
+                        event,
+                        "missing" if missing[i] else "out_of_radius",
+                        sites[nearest_index[i]].name if nearest_index[i] >= 0 else "",
+                        (
+                            f"{nearest_distance[i]:.0f}"
+                            if not np.isnan(nearest_distance[i])
+                            else ""
+                        ),
+                    ]
+                )
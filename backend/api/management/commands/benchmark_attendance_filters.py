@@ -0,0 +1,157 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.management.benchmarks import add_write_arguments, check_writes_allowed
+from api.models import AttendanceRecord
+from api.views_attendance import AttendanceRecordFilter
+
+User = get_user_model()
+
+USERNAME_PREFIX = "benchmark_filter_"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the attendance list filters (month/year and user search) "
+        "before and after the index-friendly rewrite on a large synthetic "
+        "table, printing EXPLAIN ANALYZE plans. PostgreSQL only. Synthetic "
+        "data is deleted afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        add_write_arguments(parser)
+        parser.add_argument(
+            "--rows", type=int, default=10_000_000, help="Attendance rows to generate"
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=5000,
+            help="Synthetic employees to spread rows over",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the synthetic data (reuse it later with --rows 0)",
+        )
+
+    def handle(self, *args, **options):
+        check_writes_allowed(options)
+        if connection.vendor != "postgresql":
+            raise CommandError(
+                "This benchmark needs PostgreSQL (EXPLAIN ANALYZE plans)."
+            )
+
+        try:
+            if options["rows"]:
+                self._seed(options["rows"], options["users"])
+            year, month = self._latest_month()
+            search = f"{USERNAME_PREFIX}12"
+
+            self._compare(
+                f"month={month}&year={year}",
+                AttendanceRecord.objects.filter(date__year=year, date__month=month),
+                self._filtered({"month": month, "year": year}),
+            )
+            # Same SQL before and after; "before" hides the trigram indexes
+            # from the planner by disabling bitmap scans for that query.
+            self._compare(
+                f"user={search}",
+                AttendanceRecord.objects.filter(
+                    Q(user__username__icontains=search)
+                    | Q(user__email__icontains=search)
+                ),
+                self._filtered({"user": search}),
+                before_settings=["SET LOCAL enable_bitmapscan = off"],
+            )
+        finally:
+            if not options["keep"]:
+                self._cleanup()
+
+    def _filtered(self, params):
+        request = Request(APIRequestFactory().get("/api/attendance/", params))
+        return AttendanceRecordFilter().filter_queryset(
+            request, AttendanceRecord.objects.all(), None
+        )
+
+    def _compare(self, label, before, after, before_settings=()):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label} =="))
+        for name, queryset, settings in (
+            ("before", before, before_settings),
+            ("after", after, ()),
+        ):
+            page = queryset.order_by("-date")[:8]
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for statement in settings:
+                        cursor.execute(statement)
+                plan = page.explain(analyze=True, buffers=True)
+                started = time.perf_counter()
+                total = queryset.count()
+                count_ms = (time.perf_counter() - started) * 1000
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"-- {name}: {total} rows, COUNT(*) {count_ms:.1f}ms"
+                )
+            )
+            self.stdout.write(plan)
+
+    def _latest_month(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT date_trunc('month', MAX(date)) FROM api_attendancerecord"
+            )
+            newest = cursor.fetchone()[0]
+        if newest is None:
+            raise CommandError("No attendance records to benchmark against.")
+        return newest.year, newest.month
+
+    def _seed(self, rows, users):
+        self._cleanup()
+        self.stdout.write(f"Generating {rows} attendance rows for {users} users...")
+        started = time.perf_counter()
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"{USERNAME_PREFIX}{i}",
+                    email=f"{USERNAME_PREFIX}{i}@example.com",
+                )
+                for i in range(users)
+            ],
+            batch_size=1000,
+        )
+        days = -(-rows // users)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO api_attendancerecord
+                    (user_id, date, status, attendance_type, lateness_hours,
+                     overtime_hours, overtime_approved, stats_counted)
+                SELECT u.id, CURRENT_DATE - d, 'present', 'physical', 0, 0, false, true
+                FROM auth_user u
+                CROSS JOIN generate_series(1, %s) AS d
+                WHERE u.username LIKE %s
+                LIMIT %s
+                """,
+                [days, f"{USERNAME_PREFIX}%", rows],
+            )
+            cursor.execute("ANALYZE api_attendancerecord")
+            cursor.execute("ANALYZE auth_user")
+        self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    def _cleanup(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                DELETE FROM api_attendancerecord
+                WHERE user_id IN (SELECT id FROM auth_user WHERE username LIKE %s)
+                """,
+                [f"{USERNAME_PREFIX}%"],
+            )
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
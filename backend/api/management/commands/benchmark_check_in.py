@@ -0,0 +1,142 @@
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.management.benchmarks import add_write_arguments, check_writes_allowed
+from api.models import (
+    ApplicationLink,
+    AttendanceRecord,
+    BasicInfo,
+    Employee,
+    Headquarters,
+    Position,
+)
+from api.views_attendance import AttendanceViewSet
+
+User = get_user_model()
+
+USERNAME_PREFIX = "loadtest_checkin_"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test: fire concurrent check-ins for throwaway employees and report "
+        "latency percentiles. All created data is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        add_write_arguments(parser)
+        parser.add_argument(
+            "--concurrency", type=int, default=500, help="Concurrent check-ins"
+        )
+
+    def handle(self, *args, **options):
+        check_writes_allowed(options)
+        concurrency = options["concurrency"]
+        users = self._create_employees(concurrency)
+        headquarters = Headquarters.get_headquarters()
+        payload = {
+            "latitude": headquarters.latitude,
+            "longitude": headquarters.longitude,
+        }
+        view = AttendanceViewSet.as_view({"post": "check_in"})
+        factory = APIRequestFactory()
+        barrier = threading.Barrier(concurrency)
+
+        def check_in(user):
+            request = factory.post("/api/attendance/check_in/", payload, format="json")
+            force_authenticate(request, user=user)
+            barrier.wait()
+            started = time.perf_counter()
+            try:
+                response = view(request)
+                return time.perf_counter() - started, response.status_code
+            finally:
+                connection.close()
+
+        try:
+            self.stdout.write(f"Firing {concurrency} concurrent check-ins...")
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(check_in, users))
+            self._report(results)
+        finally:
+            self._cleanup()
+
+    def _create_employees(self, count):
+        self._cleanup()
+        now = timezone.localtime()
+        position, _ = Position.objects.get_or_create(name="Load Test")
+        link, _ = ApplicationLink.objects.get_or_create(
+            distinction_name=f"{USERNAME_PREFIX}link",
+            defaults={
+                "url": "http://localhost/load-test",
+                "position": position,
+                "is_coordinator": False,
+                "number_remaining_applicants_to_limit": 0,
+            },
+        )
+        User.objects.bulk_create(
+            [User(username=f"{USERNAME_PREFIX}{i}") for i in range(count)]
+        )
+        users = list(User.objects.filter(username__startswith=USERNAME_PREFIX))
+        BasicInfo.objects.bulk_create(
+            [BasicInfo(user=user, role="employee") for user in users]
+        )
+        attend_time = max(
+            datetime.datetime.combine(now.date(), datetime.time.min),
+            now.replace(tzinfo=None) - datetime.timedelta(hours=1),
+        ).time()
+        Employee.objects.bulk_create(
+            [
+                Employee(
+                    user=user,
+                    phone="0",
+                    position=position,
+                    is_coordinator=False,
+                    application_link=link,
+                    interview_state="accepted",
+                    join_date=now.date() - datetime.timedelta(days=30),
+                    expected_attend_time=attend_time,
+                    expected_leave_time=datetime.time(23, 59, 59),
+                )
+                for user in users
+            ]
+        )
+        # Fresh instances, so every request pays its own profile lookups
+        return list(User.objects.filter(username__startswith=USERNAME_PREFIX))
+
+    def _report(self, results):
+        latencies = sorted(latency for latency, _ in results)
+        codes = {}
+        for _, code in results:
+            codes[code] = codes.get(code, 0) + 1
+
+        def percentile(p):
+            index = min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))
+            return latencies[index] * 1000
+
+        self.stdout.write(f"Status codes: {codes}")
+        self.stdout.write(
+            f"p50={percentile(50):.1f}ms p95={percentile(95):.1f}ms "
+            f"p99={percentile(99):.1f}ms max={latencies[-1] * 1000:.1f}ms"
+        )
+        created = AttendanceRecord.objects.filter(
+            user__username__startswith=USERNAME_PREFIX
+        ).count()
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {created} attendance records.")
+        )
+
+    def _cleanup(self):
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        ApplicationLink.objects.filter(
+            distinction_name=f"{USERNAME_PREFIX}link"
+        ).delete()
+        Position.objects.filter(name="Load Test", employee__isnull=True).delete()
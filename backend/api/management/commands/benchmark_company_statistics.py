@@ -0,0 +1,352 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Avg, Sum
+from django.test.utils import CaptureQueriesContext
+
+from api.management.benchmarks import add_write_arguments, check_writes_allowed
+from api.models import (
+    HR,
+    ApplicationLink,
+    Employee,
+    Position,
+    Region,
+    SalaryRecord,
+)
+from api.utils.company_stats import calculate_statistics, rebuild_company_stats
+
+User = get_user_model()
+
+NAME_PREFIX = "benchmark_stats_"
+
+
+def legacy_calculate_statistics():
+    """
+    calculate_statistics() as it was before the grouped rewrite and the
+    running counters, for comparison.
+    """
+    employees = Employee.objects.filter(interview_state="accepted")
+    total_employees = employees.count()
+    total_hrs = HR.objects.count()
+
+    position_stats = {}
+    for position in Position.objects.order_by("id"):
+        pos_employees = employees.filter(position=position)
+        pos_count = pos_employees.count()
+        if pos_count == 0:
+            continue
+        total_task_ratings = (
+            pos_employees.aggregate(sum=Sum("total_task_ratings"))["sum"] or 0
+        )
+        total_accepted_tasks = (
+            pos_employees.aggregate(sum=Sum("number_of_accepted_tasks"))["sum"] or 0
+        )
+        total_time_remaining = (
+            pos_employees.aggregate(sum=Sum("total_time_remaining_before_deadline"))[
+                "sum"
+            ]
+            or 0
+        )
+        total_overtime = (
+            pos_employees.aggregate(sum=Sum("total_overtime_hours"))["sum"] or 0
+        )
+        total_lateness = (
+            pos_employees.aggregate(sum=Sum("total_lateness_hours"))["sum"] or 0
+        )
+        total_absent = pos_employees.aggregate(sum=Sum("total_absent_days"))["sum"] or 0
+        total_non_holiday_days = (
+            pos_employees.aggregate(sum=Sum("number_of_non_holiday_days_since_join"))[
+                "sum"
+            ]
+            or 0
+        )
+        avg_salary = pos_employees.aggregate(avg=Avg("basic_salary"))["avg"]
+        position_stats[position.name] = {
+            "count": pos_count,
+            "avg_task_rating": (
+                round(total_task_ratings / total_accepted_tasks, 2)
+                if total_accepted_tasks > 0
+                else None
+            ),
+            "avg_time_remaining": (
+                round(total_time_remaining / total_accepted_tasks, 2)
+                if total_accepted_tasks > 0
+                else None
+            ),
+            "avg_overtime": (
+                round(total_overtime / total_non_holiday_days, 2)
+                if total_non_holiday_days > 0
+                else None
+            ),
+            "avg_lateness": (
+                round(total_lateness / total_non_holiday_days, 2)
+                if total_non_holiday_days > 0
+                else None
+            ),
+            "avg_absent_days": (
+                round(total_absent / total_non_holiday_days, 2)
+                if total_non_holiday_days > 0
+                else None
+            ),
+            "avg_salary": avg_salary,
+        }
+
+    region_stats = {}
+    for region in Region.objects.order_by("id"):
+        region_employees = employees.filter(region=region)
+        region_count = region_employees.count()
+        if region_count == 0:
+            continue
+        total_lateness = (
+            region_employees.aggregate(sum=Sum("total_lateness_hours"))["sum"] or 0
+        )
+        total_non_holiday_days = (
+            region_employees.aggregate(
+                sum=Sum("number_of_non_holiday_days_since_join")
+            )["sum"]
+            or 0
+        )
+        if total_non_holiday_days > 0:
+            region_stats[region.name] = {
+                "distance_to_work": region.distance_to_work,
+                "employee_count": region_count,
+                "avg_lateness": round(total_lateness / total_non_holiday_days, 2),
+            }
+
+    total_task_ratings = employees.aggregate(sum=Sum("total_task_ratings"))["sum"] or 0
+    total_accepted_tasks = (
+        employees.aggregate(sum=Sum("number_of_accepted_tasks"))["sum"] or 0
+    )
+    total_time_remaining = (
+        employees.aggregate(sum=Sum("total_time_remaining_before_deadline"))["sum"] or 0
+    )
+    total_overtime = employees.aggregate(sum=Sum("total_overtime_hours"))["sum"] or 0
+    total_lateness = employees.aggregate(sum=Sum("total_lateness_hours"))["sum"] or 0
+    total_absent = employees.aggregate(sum=Sum("total_absent_days"))["sum"] or 0
+    total_non_holiday_days = (
+        employees.aggregate(sum=Sum("number_of_non_holiday_days_since_join"))["sum"]
+        or 0
+    )
+    avg_salary = employees.aggregate(avg=Avg("basic_salary"))["avg"]
+
+    overall_stats = {
+        "overall_avg_task_rating": (
+            round(total_task_ratings / total_accepted_tasks, 2)
+            if total_accepted_tasks > 0
+            else None
+        ),
+        "overall_avg_time_remaining": (
+            round(total_time_remaining / total_accepted_tasks, 2)
+            if total_accepted_tasks > 0
+            else None
+        ),
+        "overall_avg_overtime": (
+            round(total_overtime / total_non_holiday_days, 2)
+            if total_non_holiday_days > 0
+            else None
+        ),
+        "overall_avg_lateness": (
+            round(total_lateness / total_non_holiday_days, 2)
+            if total_non_holiday_days > 0
+            else None
+        ),
+        "overall_avg_absent_days": (
+            round(total_absent / total_non_holiday_days, 2)
+            if total_non_holiday_days > 0
+            else None
+        ),
+        "overall_avg_salary": avg_salary,
+    }
+
+    monthly_totals = {}
+    for record in SalaryRecord.objects.all():
+        key = (record.year, record.month)
+        totals = monthly_totals.setdefault(key, [0, 0, 0])
+        totals[0] += record.final_salary
+        totals[1] += record.total_deductions
+        totals[2] += record.total_overtime_salary
+    monthly_salary_data = [
+        {
+            "year": year,
+            "month": month,
+            "total_paid": paid,
+            "total_deductions": deductions,
+            "total_overtime_salary": overtime,
+        }
+        for (year, month), (paid, deductions, overtime) in sorted(
+            monthly_totals.items()
+        )
+    ]
+    return {
+        "total_employees": total_employees,
+        "total_hrs": total_hrs,
+        "position_stats": position_stats,
+        "region_stats": region_stats,
+        "monthly_salary_totals": monthly_salary_data,
+        **overall_stats,
+    }
+
+
+def _close(a, b):
+    """Equal, allowing float sums to differ by summation order."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        return list(a) == list(b) and all(_close(a[key], b[key]) for key in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(map(_close, a, b))
+    if isinstance(a, float) or isinstance(b, float):
+        return a is not None and b is not None and abs(a - b) <= 1e-6 * max(1, abs(a))
+    return a == b
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare query count and wall time of calculate_statistics() (read "
+        "from the running counters) against the original per-position/"
+        "per-region implementation and a full counter rebuild, on synthetic "
+        "positions, regions, employees and salary records, and check that "
+        "both return the same statistics. Synthetic data is deleted "
+        "afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        add_write_arguments(parser)
+        parser.add_argument("--positions", type=int, default=50)
+        parser.add_argument("--regions", type=int, default=20)
+        parser.add_argument("--employees", type=int, default=5000)
+        parser.add_argument(
+            "--months", type=int, default=12, help="Salary months per employee"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Runs per implementation (best is kept)"
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the synthetic data (reuse it later with --employees 0)",
+        )
+
+    def handle(self, *args, **options):
+        check_writes_allowed(options)
+        try:
+            if options["employees"]:
+                self._seed(
+                    options["positions"],
+                    options["regions"],
+                    options["employees"],
+                    options["months"],
+                )
+            results = {}
+            for name, function in (
+                ("before", legacy_calculate_statistics),
+                ("rebuild", rebuild_company_stats),
+                ("after", calculate_statistics),
+            ):
+                best = None
+                for _ in range(max(1, options["repeat"])):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        results[name] = function()
+                        elapsed = (time.perf_counter() - started) * 1000
+                    best = elapsed if best is None else min(best, elapsed)
+                self.stdout.write(
+                    f"{name:>7}: {len(queries.captured_queries):5d} queries, "
+                    f"best of {options['repeat']}: {best:9.1f}ms"
+                )
+            if _close(results["before"], results["after"]):
+                self.stdout.write(self.style.SUCCESS("Results are identical."))
+            else:
+                self.stdout.write(self.style.ERROR("Results differ!"))
+        finally:
+            if not options["keep"]:
+                self._cleanup()
+
+    def _seed(self, positions, regions, employees, months):
+        self._cleanup()
+        self.stdout.write(
+            f"Generating {employees} employees over {positions} positions and "
+            f"{regions} regions, with {months} salary months each..."
+        )
+        started = time.perf_counter()
+        rng = random.Random(0)
+        position_objs = Position.objects.bulk_create(
+            [Position(name=f"{NAME_PREFIX}{i}") for i in range(positions)]
+        )
+        region_objs = Region.objects.bulk_create(
+            [
+                Region(name=f"{NAME_PREFIX}{i}", distance_to_work=rng.randint(1, 60))
+                for i in range(regions)
+            ]
+        )
+        link = ApplicationLink.objects.create(
+            url="https://example.com",
+            distinction_name=NAME_PREFIX,
+            position=position_objs[0],
+            is_coordinator=False,
+            number_remaining_applicants_to_limit=0,
+        )
+        users = User.objects.bulk_create(
+            [User(username=f"{NAME_PREFIX}{i}") for i in range(employees)],
+            batch_size=1000,
+        )
+        Employee.objects.bulk_create(
+            [
+                Employee(
+                    user=user,
+                    phone="0",
+                    position=rng.choice(position_objs),
+                    region=rng.choice(region_objs),
+                    is_coordinator=False,
+                    application_link=link,
+                    interview_state=rng.choice(["accepted"] * 9 + ["pending"]),
+                    basic_salary=rng.randint(3000, 20000),
+                    total_overtime_hours=rng.uniform(0, 200),
+                    total_lateness_hours=rng.uniform(0, 50),
+                    total_absent_days=rng.randint(0, 20),
+                    total_task_ratings=rng.uniform(0, 500),
+                    total_time_remaining_before_deadline=rng.uniform(0, 900),
+                    number_of_non_holiday_days_since_join=rng.randint(0, 700),
+                    number_of_accepted_tasks=rng.randint(0, 100),
+                )
+                for user in users
+            ],
+            batch_size=1000,
+        )
+        SalaryRecord.objects.bulk_create(
+            [
+                SalaryRecord(
+                    user=user,
+                    year=2024 + month // 12,
+                    month=month % 12 + 1,
+                    base_salary=10000,
+                    final_salary=rng.uniform(8000, 12000),
+                    total_deductions=rng.uniform(0, 1000),
+                    total_overtime_salary=rng.uniform(0, 1000),
+                )
+                for user in users
+                for month in range(months)
+            ],
+            batch_size=2000,
+        )
+        # bulk_create bypasses the counter signals
+        rebuild_company_stats()
+        self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    def _cleanup(self):
+        # Set-based deletes instead of one signal-driven counter update per
+        # row; the counters are rebuilt afterwards
+        with connection.cursor() as cursor:
+            for table in ("api_salaryrecord", "api_employee"):
+                cursor.execute(
+                    f"""
+                    DELETE FROM {table}
+                    WHERE user_id IN (SELECT id FROM auth_user WHERE username LIKE %s)
+                    """,
+                    [f"{NAME_PREFIX}%"],
+                )
+        User.objects.filter(username__startswith=NAME_PREFIX).delete()
+        Position.objects.filter(name__startswith=NAME_PREFIX).delete()
+        Region.objects.filter(name__startswith=NAME_PREFIX).delete()
+        rebuild_company_stats()
@@ -1,17 +1,19 @@
+import time
+
 from django.core.management.base import BaseCommand
-from api.models import HR  
+from api.utils.hr_stats import update_hr_stats
+
 
 class Command(BaseCommand):
     help = 'Recalculates accepted employee statistics for all HRs'
 
     def handle(self, *args, **options):
-        hrs = HR.objects.all()
-        total = hrs.count()
-        self.stdout.write(f"Calculating stats for {total} HR(s)...")
-
-        for i, hr in enumerate(hrs, 1):
-            self.stdout.write(f"[{i}/{total}] Calculating for HR ID {hr.id}...", ending="")
-            hr.calculate_accepted_employees_stats()
-            self.stdout.write(" Done.")
-
-        self.stdout.write(self.style.SUCCESS("All HR stats recalculated successfully."))
+        self.stdout.write("Calculating stats for all HRs...")
+        started = time.perf_counter()
+        total = update_hr_stats()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"All HR stats recalculated successfully ({total} HR(s) in {elapsed:.2f}s)."
+            )
+        )
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.utils.partitioning import (
+    add_months,
+    create_month_partitions,
+    is_partitioned,
+    month_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the monthly attendance partitions for the current month and "
+        "the next --months months, so new rows never land in the default "
+        "partition. Safe to run repeatedly (e.g. from a daily cron). "
+        "PostgreSQL only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months", type=int, default=3, help="Months ahead to pre-create (default 3)"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Attendance partitioning needs PostgreSQL.")
+        if options["months"] < 0:
+            raise CommandError("--months must not be negative.")
+
+        this_month = month_start(timezone.localdate())
+        with transaction.atomic(), connection.cursor() as cursor:
+            if not is_partitioned(cursor):
+                raise CommandError(
+                    "api_attendancerecord is not partitioned; run migrate first."
+                )
+            created = create_month_partitions(
+                cursor, this_month, add_months(this_month, options["months"])
+            )
+
+        if not created:
+            self.stdout.write("All partitions already exist.")
+            return
+        for name in created:
+            self.stdout.write(f"Created {name}")
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partition(s)."))
@@ -1,90 +1,103 @@
-from django.core.management.base import BaseCommand
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
-from api.models import (
-    AttendanceRecord,
-    Employee,
-    HolidayYearday,
-    HolidayWeekday,
-    OnlineDayYearday,
-    OnlineDayWeekday
-)
+from api.utils.absence_utils import backfill_absences, mark_absences_for_date
+
 
 class Command(BaseCommand):
-    help = "Mark employees absent for yesterday based on their personal schedules"
+    help = (
+        "Mark employees absent for yesterday based on their personal schedules, "
+        "or backfill a date range with --from/--to"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from", dest="date_from", help="Backfill start date (YYYY-MM-DD)"
+        )
+        parser.add_argument(
+            "--to", dest="date_to", help="Backfill end date (YYYY-MM-DD), inclusive"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Worker processes for backfill"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Employees per backfill chunk",
+        )
 
     def handle(self, *args, **options):
+        # Employees who joined on (or after) a processed day are skipped for it.
+        # This can happen when the command is called in the midday after someone
+        # is accepted on that day, which is one reason the nightly run is meant
+        # to be called just after every midnight.
         yesterday = timezone.localdate() - timezone.timedelta(days=1)
-        yesterday_weekday = yesterday.strftime("%A")  # e.g. "Monday"
-        marked_absent = 0
-
-        for employee in Employee.objects.filter(interview_state="accepted"):
-            
-            # 1. Skip if just joined yesterday (or even later: a very rare corner case, 
-            #    it can happen when the command is called in the midday 
-            #    after someone is accepted on that day. That's one reason why the command is meant 
-            #    to be called just after every midnight)
-            if employee.join_date >= yesterday:
-                continue
-            
-            # 1. Skip if attended yesterday
-            if AttendanceRecord.objects.filter(
-                user=employee.user, 
-                date=yesterday
-            ).exists():
-                employee.number_of_non_holiday_days_since_join += 1
-                employee.save(update_fields=["number_of_non_holiday_days_since_join"])
 
-                continue
+        if options["date_from"] or options["date_to"]:
+            start = self._parse_date(options["date_from"] or options["date_to"])
+            end = self._parse_date(options["date_to"] or options["date_from"])
+            if start > end:
+                raise CommandError("--from must not be after --to.")
+            if end > yesterday:
+                raise CommandError("Cannot mark absences for today or future dates.")
+            self._backfill(start, end, options)
+            return
 
-            # 2. Check if yesterday was a personal holiday
-            is_holiday = (
-                HolidayYearday.objects.filter(
-                    month=yesterday.month,
-                    day=yesterday.day,
-                    employees=employee
-                ).exists() or
-                HolidayWeekday.objects.filter(
-                    weekday=yesterday_weekday,
-                    employees=employee
-                ).exists()
+        result = mark_absences_for_date(yesterday)
+        self._report(result, options["verbosity"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Marked {result['absent']} employees as absent for {yesterday}"
             )
-            if is_holiday:
-                continue
+        )
 
-            employee.total_absent_days += 1
-            employee.number_of_non_holiday_days_since_join += 1
-            employee.save(update_fields=["total_absent_days", "number_of_non_holiday_days_since_join"])
+    def _backfill(self, start, end, options):
+        self.stdout.write(
+            f"Backfilling absences from {start} to {end} "
+            f"({options['workers']} workers, chunks of {options['chunk_size']})..."
+        )
+        total_absent = 0
+        for i, result in enumerate(
+            backfill_absences(
+                start,
+                end,
+                workers=options["workers"],
+                chunk_size=options["chunk_size"],
+            ),
+            1,
+        ):
+            self.stdout.write(f"Chunk {i}:")
+            self._report(result, options["verbosity"])
+            total_absent += result["absent"]
 
-            # 3. Check if yesterday was a personal online day
-            is_online_day = (
-                OnlineDayYearday.objects.filter(
-                    month=yesterday.month,
-                    day=yesterday.day,
-                    employees=employee
-                ).exists() or
-                OnlineDayWeekday.objects.filter(
-                    weekday=yesterday_weekday,
-                    employees=employee
-                ).exists()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Marked {total_absent} absences between {start} and {end}"
             )
+        )
 
+    def _report(self, result, verbosity):
+        if verbosity > 1:
+            for username in result["absent_usernames"]:
+                self.stdout.write(f"Marked absent: {username}")
 
-
-            # 4. Create absent record
-            AttendanceRecord.objects.create(
-                user=employee.user,
-                date=yesterday,
-                check_in_time=None,
-                status="absent",
-                attendance_type="online" if is_online_day else "physical",
-                mac_address=None,
-            )
-            marked_absent += 1
-            self.stdout.write(
-                f"Marked absent: {employee.user.username} "
-                f"({'online' if is_online_day else 'physical'} day)"
+        self.stdout.write(
+            f"Eligible: {result['eligible']} | "
+            f"Already counted: {result['already_counted']} | "
+            f"Attended: {result['attended']} | Holiday: {result['holiday']} | "
+            f"Absent: {result['absent']}"
+        )
+        self.stdout.write(
+            "Timings: "
+            + ", ".join(
+                f"{phase}={seconds * 1000:.1f}ms"
+                for phase, seconds in result["timings"].items()
             )
+        )
 
-        self.stdout.write(
-            self.style.SUCCESS(f"Marked {marked_absent} employees as absent for {yesterday}")
-        )
\ No newline at end of file
+    def _parse_date(self, value):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD.")
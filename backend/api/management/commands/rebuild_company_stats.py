@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.company_stats import rebuild_company_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the company statistics counters, HR correlation moments "
+        "and monthly salary totals from employees and salary records, and the "
+        "HR statistics from them, e.g. after bulk changes made outside the "
+        "application."
+    )
+
+    def handle(self, *args, **options):
+        result = rebuild_company_stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {result['counters']} counter rows, "
+                f"{result['moments']} HR correlation moments and "
+                f"{result['months']} monthly salary totals."
+            )
+        )
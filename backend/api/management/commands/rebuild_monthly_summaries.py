@@ -0,0 +1,57 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from api.models import AttendanceRecord
+from api.utils.monthly_summary import rebuild_monthly_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild monthly attendance summaries from raw attendance records. "
+        "Without --from/--to every month with attendance is rebuilt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from", dest="date_from", help="YYYY-MM-DD (its whole month is rebuilt)"
+        )
+        parser.add_argument(
+            "--to", dest="date_to", help="YYYY-MM-DD (its whole month is rebuilt)"
+        )
+        parser.add_argument(
+            "--user", type=int, action="append", dest="user_ids", help="User id (repeatable)"
+        )
+
+    def handle(self, *args, **options):
+        bounds = AttendanceRecord.objects.aggregate(first=Min("date"), last=Max("date"))
+        try:
+            start = (
+                datetime.strptime(options["date_from"], "%Y-%m-%d").date()
+                if options["date_from"]
+                else bounds["first"]
+            )
+            end = (
+                datetime.strptime(options["date_to"], "%Y-%m-%d").date()
+                if options["date_to"]
+                else bounds["last"]
+            )
+        except ValueError:
+            raise CommandError("Dates must be in YYYY-MM-DD format.")
+
+        if start is None or end is None:
+            self.stdout.write("No attendance records found. Nothing to rebuild.")
+            return
+        if start > end:
+            raise CommandError("--from must be on or before --to.")
+
+        started = time.perf_counter()
+        written = rebuild_monthly_summaries(start, end, options["user_ids"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {written} monthly summaries for {start:%Y-%m} to {end:%Y-%m} "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        )
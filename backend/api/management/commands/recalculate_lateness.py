@@ -0,0 +1,32 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from api.models import AttendanceRecord
+from api.utils.lateness_utils import recalculate_lateness
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute lateness_hours of attendance records in a date range from the "
+        "employees' expected attend times and adjust their lateness totals. "
+        "Statuses are not changed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", required=True, help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", required=True, help="YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        try:
+            start = datetime.strptime(options["date_from"], "%Y-%m-%d").date()
+            end = datetime.strptime(options["date_to"], "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError("Dates must be in YYYY-MM-DD format.")
+
+        updated = recalculate_lateness(
+            AttendanceRecord.objects.filter(date__range=(start, end))
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated lateness of {updated} records between {start} and {end}"
+            )
+        )
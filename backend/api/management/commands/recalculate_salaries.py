@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.utils.payroll import recalculate_dirty_salaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute salary records flagged for recalculation after their "
+        "month's attendance changed. Flagged records are normally recomputed "
+        "by a background job queued when the change commits; this sweeps up "
+        "any left behind."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        recalculated = recalculate_dirty_salaries()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recalculated {recalculated} salary record(s) "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        )
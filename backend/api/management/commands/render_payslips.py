@@ -0,0 +1,61 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import SalaryRecord
+from api.utils.payslips import iter_payslips_zip, payslip_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Render a month's PDF payslips into a ZIP file using a process pool. "
+        "Prints how long rendering took."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, required=True, help="Payroll year")
+        parser.add_argument(
+            "--month", type=int, required=True, help="Payroll month (1-12)"
+        )
+        parser.add_argument(
+            "--user", type=int, action="append", dest="user_ids", help="User id (repeatable)"
+        )
+        parser.add_argument(
+            "--output",
+            help="ZIP file to write (default: payslips_YYYY-MM.zip)",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="Rendering processes; 1 renders in this process (default: CPU count)",
+        )
+
+    def handle(self, *args, **options):
+        year, month = options["year"], options["month"]
+        if not 1 <= month <= 12:
+            raise CommandError("--month must be between 1 and 12.")
+        if options["processes"] < 1:
+            raise CommandError("--processes must be at least 1.")
+
+        records = SalaryRecord.objects.filter(year=year, month=month)
+        if options["user_ids"]:
+            records = records.filter(user_id__in=options["user_ids"])
+        count = records.count()
+        if not count:
+            raise CommandError(f"No salary records for {year}-{month:02d}.")
+
+        output = options["output"] or f"payslips_{year}-{month:02d}.zip"
+        started = time.perf_counter()
+        with open(output, "wb") as archive:
+            for chunk in iter_payslips_zip(payslip_rows(records), options["processes"]):
+                archive.write(chunk)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendered {count} payslips to {output} in {elapsed:.2f}s "
+                f"({options['processes']} process(es), {count / elapsed:.0f}/s)"
+            )
+        )
@@ -0,0 +1,154 @@
+import multiprocessing
+import signal
+import threading
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+
+def work(stop, poll_interval, burst, max_jobs):
+    """Worker process loop: claim and run jobs until told to stop."""
+    import django
+
+    django.setup()
+    from api.utils.jobs import claim_job, run_job, send_heartbeats, worker_name
+
+    # Ctrl+C reaches the whole process group; the parent decides when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    name = worker_name()
+    done = threading.Event()
+    heartbeat = threading.Thread(
+        target=send_heartbeats, args=(name, done), daemon=True
+    )
+    heartbeat.start()
+    processed = 0
+    while not stop.is_set():
+        close_old_connections()
+        job = claim_job(name)
+        if job is None:
+            if burst:
+                break
+            stop.wait(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+        if max_jobs and processed >= max_jobs:
+            break
+    done.set()
+    heartbeat.join()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background job workers: a pool of processes claiming queued jobs "
+        "with SELECT ... FOR UPDATE SKIP LOCKED. Stop with Ctrl+C or SIGTERM; "
+        "running jobs are finished first."
+    )
+
+    def add_arguments(self, parser):
+        from api.utils.jobs import DEFAULT_STALE_AFTER, MAX_ATTEMPTS
+
+        stale_after = int(DEFAULT_STALE_AFTER.total_seconds())
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=multiprocessing.cpu_count(),
+            help="Worker processes (default: CPU count)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds an idle worker waits before polling again (default 1)",
+        )
+        parser.add_argument(
+            "--max-jobs-per-worker",
+            type=int,
+            default=0,
+            help="Replace a worker process after this many jobs (default: never)",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=stale_after,
+            help="At startup, requeue running jobs whose worker has sent no "
+            f"heartbeat for this many seconds (default {stale_after}); jobs "
+            f"already started {MAX_ATTEMPTS} times are failed instead",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue is empty instead of waiting for new jobs",
+        )
+
+    def handle(self, *args, **options):
+        from api.utils.jobs import requeue_stale_jobs
+        from api.utils.result_cache import is_process_local
+
+        if options["processes"] < 1:
+            raise CommandError("--processes must be at least 1.")
+        if is_process_local():
+            raise CommandError(
+                "The result cache is local to each process, so data written by "
+                "jobs would not invalidate the web processes' cached responses. "
+                'Set RESULT_CACHE_BACKEND to "file" or "redis".'
+            )
+
+        requeued, failed = requeue_stale_jobs(
+            timedelta(seconds=options["stale_after"])
+        )
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s).")
+        if failed:
+            self.stderr.write(
+                f"Failed {failed} stale job(s) that were already retried too often."
+            )
+        # Children must open their own connections, never share the parent's
+        connections.close_all()
+
+        context = multiprocessing.get_context()
+        stop = context.Event()
+        worker_args = (
+            stop,
+            options["poll_interval"],
+            options["burst"],
+            options["max_jobs_per_worker"],
+        )
+
+        def start_worker():
+            process = context.Process(target=work, args=worker_args, daemon=False)
+            process.start()
+            return process
+
+        def request_stop(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        workers = [start_worker() for _ in range(options["processes"])]
+        self.stdout.write(
+            self.style.SUCCESS(f"Started {len(workers)} worker process(es).")
+        )
+
+        try:
+            while workers:
+                for process in list(workers):
+                    process.join(timeout=0.5)
+                    if process.is_alive():
+                        continue
+                    workers.remove(process)
+                    # Recycled or crashed workers are replaced unless draining
+                    if not stop.is_set() and not options["burst"]:
+                        if process.exitcode:
+                            self.stderr.write(
+                                f"Worker {process.pid} exited with code {process.exitcode}; restarting."
+                            )
+                        workers.append(start_worker())
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping: waiting for running jobs to finish...")
+            stop.set()
+            for process in workers:
+                process.join()
+
+        self.stdout.write(self.style.SUCCESS("All workers stopped."))
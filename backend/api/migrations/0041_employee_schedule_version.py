@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0040_optimize_overtime_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='schedule_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:27
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def uncount_todays_records(apps, schema_editor):
+    # Records up to yesterday were already counted by the nightly mark_absent
+    # run; today's check-ins will be counted by the next one.
+    AttendanceRecord = apps.get_model("api", "AttendanceRecord")
+    AttendanceRecord.objects.filter(date__gte=timezone.localdate()).update(
+        stats_counted=False
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0041_employee_schedule_version'),
+    ]
+
+    operations = [
+        # Existing rows are back-filled as counted, new rows default to False.
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='stats_counted',
+            field=models.BooleanField(default=True, help_text="Whether this day was already added to the employee's day counters"),
+        ),
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='stats_counted',
+            field=models.BooleanField(default=False, help_text="Whether this day was already added to the employee's day counters"),
+        ),
+        migrations.RunPython(uncount_todays_records, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+
+
+def build_summaries(apps, schema_editor):
+    # One GROUP BY over existing attendance; later changes are applied
+    # incrementally by the application.
+    AttendanceRecord = apps.get_model("api", "AttendanceRecord")
+    MonthlyAttendanceSummary = apps.get_model("api", "MonthlyAttendanceSummary")
+    rows = (
+        AttendanceRecord.objects.order_by()
+        .annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        .values("user_id", "year", "month")
+        .annotate(
+            absent_days=Count("pk", filter=Q(status="absent")),
+            late_days=Count("pk", filter=Q(status="late")),
+            lateness_hours=Coalesce(Sum("lateness_hours", filter=Q(status="late")), 0.0),
+            overtime_hours=Coalesce(
+                Sum("overtime_hours", filter=Q(overtime_approved=True, overtime_hours__gt=0)),
+                0.0,
+            ),
+        )
+    )
+    MonthlyAttendanceSummary.objects.bulk_create(
+        (MonthlyAttendanceSummary(**row) for row in rows), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0042_attendancerecord_stats_counted'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('absent_days', models.IntegerField(default=0)),
+                ('late_days', models.IntegerField(default=0)),
+                ('lateness_hours', models.FloatField(default=0)),
+                ('overtime_hours', models.FloatField(default=0, help_text='Approved overtime hours only')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_attendance_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['year', 'month'], name='api_monthly_year_51eb93_idx')],
+                'unique_together': {('user', 'year', 'month')},
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
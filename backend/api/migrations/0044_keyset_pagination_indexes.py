@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0043_monthlyattendancesummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['-date', '-id'], name='api_attenda_date_ed555a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overtimerequest',
+            index=models.Index(fields=['-requested_at', '-id'], name='api_overtim_request_69b6ae_idx'),
+        ),
+    ]
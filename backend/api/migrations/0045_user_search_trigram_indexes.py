@@ -0,0 +1,28 @@
+# Generated manually for attendance user search performance
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0044_keyset_pagination_indexes"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        # icontains compiles to UPPER(col::text) LIKE UPPER(%s), so the trigram
+        # indexes are built on that exact expression to serve it.
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS idx_auth_user_username_upper_trgm ON auth_user USING gin (UPPER(username::text) gin_trgm_ops);",
+            reverse_sql="DROP INDEX IF EXISTS idx_auth_user_username_upper_trgm;",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS idx_auth_user_email_upper_trgm ON auth_user USING gin (UPPER(email::text) gin_trgm_ops);",
+            reverse_sql="DROP INDEX IF EXISTS idx_auth_user_email_upper_trgm;",
+        ),
+    ]
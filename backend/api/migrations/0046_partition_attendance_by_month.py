@@ -0,0 +1,127 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:48
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen here rather than imported from api.utils.partitioning, so later
+# changes to that module cannot change what this migration does.
+TABLE = "api_attendancerecord"
+STAGING = f"{TABLE}_partitioned"
+MONTHS_AHEAD = 3
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_attendance_table(cursor):
+    """
+    Convert the plain attendance table into a monthly partitioned table in
+    place: same name, columns, id sequence, constraints and index names. The
+    primary key becomes (id, date), as PostgreSQL requires the partition key
+    in unique constraints; (user, date) already contains it. Rows are copied
+    in one INSERT ... SELECT, so run it in a maintenance window on big tables.
+    No-op if the table is already partitioned.
+    """
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass)",
+        [TABLE],
+    )
+    if cursor.fetchone()[0]:
+        return
+
+    cursor.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f')
+        """,
+        [TABLE],
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = %s",
+        [TABLE],
+    )
+    constraint_names = {name for name, _, _ in constraints}
+    indexes = [
+        indexdef for name, indexdef in cursor.fetchall() if name not in constraint_names
+    ]
+    cursor.execute(
+        "SELECT attidentity FROM pg_attribute WHERE attrelid = %s::regclass AND attname = 'id'",
+        [TABLE],
+    )
+    is_identity = bool(cursor.fetchone()[0])
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+    sequence = cursor.fetchone()[0]
+
+    cursor.execute(
+        f"CREATE TABLE {STAGING} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+        "PARTITION BY RANGE (date)"
+    )
+    # One partition per month up to MONTHS_AHEAD, the rest goes to the default
+    cursor.execute(f"SELECT MIN(date) FROM {TABLE}")
+    oldest = cursor.fetchone()[0]
+    this_month = timezone.localdate().replace(day=1)
+    month = (oldest or this_month).replace(day=1)
+    while month <= add_months(this_month, MONTHS_AHEAD):
+        end = add_months(month, 1)
+        cursor.execute(
+            f"CREATE TABLE {TABLE}_p{month:%Y%m} PARTITION OF {STAGING} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        month = end
+    cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {STAGING} DEFAULT")
+
+    overriding = "OVERRIDING SYSTEM VALUE" if is_identity else ""
+    cursor.execute(f"INSERT INTO {STAGING} {overriding} SELECT * FROM {TABLE}")
+    if is_identity:
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {STAGING}",
+            [STAGING],
+        )
+    else:
+        # Keep the existing serial sequence alive when the old table is dropped
+        cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {STAGING}.id")
+
+    cursor.execute(f"DROP TABLE {TABLE}")
+    cursor.execute(f"ALTER TABLE {STAGING} RENAME TO {TABLE}")
+    if is_identity:
+        cursor.execute(f"ALTER SEQUENCE {STAGING}_id_seq RENAME TO {TABLE}_id_seq")
+
+    for name, kind, definition in constraints:
+        if kind == "p":
+            definition = "PRIMARY KEY (id, date)"
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {definition}')
+    for indexdef in indexes:
+        cursor.execute(indexdef)
+
+
+def partition_attendance(apps, schema_editor):
+    # Range partitioning is PostgreSQL only; other backends keep a plain table.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        partition_attendance_table(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0045_user_search_trigram_indexes'),
+    ]
+
+    operations = [
+        # Must go first: the old table cannot be dropped while referenced.
+        migrations.AlterField(
+            model_name='overtimerequest',
+            name='attendance_record',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='overtime_request', to='api.attendancerecord'),
+        ),
+        migrations.RunPython(partition_attendance, migrations.RunPython.noop),
+    ]
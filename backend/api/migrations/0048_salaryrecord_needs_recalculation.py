@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0047_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salaryrecord',
+            name='needs_recalculation',
+            field=models.BooleanField(default=False, help_text='Attendance of this month changed since the salary was computed'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryrecord',
+            index=models.Index(condition=models.Q(('needs_recalculation', True)), fields=['id'], name='api_salaryrecord_dirty_idx'),
+        ),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+INTEGER_COMPONENTS = ["absent_days", "late_days"]
+FLOAT_COMPONENTS = ["lateness_hours", "overtime_hours", "total_absence_penalty",
+                    "total_late_penalty", "total_deductions", "total_overtime_salary"]
+RATE_COMPONENTS = ["absence_day_penalty", "shorttime_hour_penalty", "overtime_hour_salary"]
+COMPONENTS = INTEGER_COMPONENTS + FLOAT_COMPONENTS + RATE_COMPONENTS
+
+
+def _number(value, cast):
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def backfill_components(apps, schema_editor):
+    # Copy the JSON snapshot into the new columns; rates missing from old
+    # snapshots stay null so recalculation falls back to current rates.
+    SalaryRecord = apps.get_model("api", "SalaryRecord")
+    batch = []
+    for record in SalaryRecord.objects.only("id", "details").iterator(chunk_size=1000):
+        details = record.details or {}
+        for field in INTEGER_COMPONENTS:
+            setattr(record, field, _number(details.get(field), int) or 0)
+        for field in FLOAT_COMPONENTS:
+            setattr(record, field, _number(details.get(field), float) or 0.0)
+        for field in RATE_COMPONENTS:
+            setattr(record, field, _number(details.get(field), float))
+        batch.append(record)
+        if len(batch) == 1000:
+            SalaryRecord.objects.bulk_update(batch, COMPONENTS)
+            batch = []
+    SalaryRecord.objects.bulk_update(batch, COMPONENTS)
+
+
+def restore_details(apps, schema_editor):
+    SalaryRecord = apps.get_model("api", "SalaryRecord")
+    batch = []
+    for record in SalaryRecord.objects.iterator(chunk_size=1000):
+        record.details = {field: getattr(record, field) for field in COMPONENTS}
+        batch.append(record)
+        if len(batch) == 1000:
+            SalaryRecord.objects.bulk_update(batch, ["details"])
+            batch = []
+    SalaryRecord.objects.bulk_update(batch, ["details"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0048_salaryrecord_needs_recalculation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salaryrecord',
+            name='absence_day_penalty',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='salaryrecord',
+            name='absent_days',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salaryrecord',
+            name='late_days',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salaryrecord',
+            name='lateness_hours',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salaryrecord',
+            name='overtime_hour_salary',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='salaryrecord',
+            name='overtime_hours',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salaryrecord',
+            name='shorttime_hour_penalty',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='salaryrecord',
+            name='total_absence_penalty',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salaryrecord',
+            name='total_deductions',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salaryrecord',
+            name='total_late_penalty',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salaryrecord',
+            name='total_overtime_salary',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='salaryrecord',
+            index=models.Index(fields=['year', 'month'], name='api_salaryr_year_0bb6fa_idx'),
+        ),
+        migrations.RunPython(backfill_components, restore_details),
+        migrations.RemoveField(
+            model_name='salaryrecord',
+            name='details',
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 5.2.3 on 2026-10-18 21:07
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+EMPLOYEE_COUNTER_FIELDS = [
+    "total_task_ratings",
+    "number_of_accepted_tasks",
+    "total_time_remaining_before_deadline",
+    "total_overtime_hours",
+    "total_lateness_hours",
+    "total_absent_days",
+    "number_of_non_holiday_days_since_join",
+]
+
+
+def build_counters(apps, schema_editor):
+    # One grouped query per scope; later changes are applied incrementally
+    # by the application.
+    Employee = apps.get_model("api", "Employee")
+    SalaryRecord = apps.get_model("api", "SalaryRecord")
+    CompanyStatCounter = apps.get_model("api", "CompanyStatCounter")
+    MonthlySalaryTotal = apps.get_model("api", "MonthlySalaryTotal")
+    aggregates = {
+        "employee_count": Count("id"),
+        "salaried_count": Count("basic_salary"),
+        "total_basic_salary": Sum("basic_salary"),
+        **{field: Sum(field) for field in EMPLOYEE_COUNTER_FIELDS},
+    }
+
+    def counter(scope, key, row):
+        return CompanyStatCounter(
+            scope=scope, key=key, **{field: value or 0 for field, value in row.items()}
+        )
+
+    accepted = Employee.objects.filter(interview_state="accepted").order_by()
+    counters = [counter("company", 0, accepted.aggregate(**aggregates))]
+    for scope, field in (("position", "position_id"), ("region", "region_id")):
+        for row in (
+            accepted.filter(**{f"{field}__isnull": False})
+            .values(field)
+            .annotate(**aggregates)
+        ):
+            counters.append(counter(scope, row.pop(field), row))
+    CompanyStatCounter.objects.bulk_create(counters, batch_size=1000)
+    MonthlySalaryTotal.objects.bulk_create(
+        (
+            MonthlySalaryTotal(**row)
+            for row in SalaryRecord.objects.order_by()
+            .values("year", "month")
+            .annotate(
+                record_count=Count("id"),
+                total_paid=Sum("final_salary"),
+                total_deductions=Sum("total_deductions"),
+                total_overtime_salary=Sum("total_overtime_salary"),
+            )
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0049_salaryrecord_component_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyStatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('company', 'Company'), ('position', 'Position'), ('region', 'Region')], max_length=10)),
+                ('key', models.IntegerField(default=0, help_text='Position or region id; 0 for the company row')),
+                ('employee_count', models.IntegerField(default=0)),
+                ('salaried_count', models.IntegerField(default=0, help_text='Employees with a basic salary set')),
+                ('total_basic_salary', models.FloatField(default=0)),
+                ('total_task_ratings', models.FloatField(default=0)),
+                ('number_of_accepted_tasks', models.IntegerField(default=0)),
+                ('total_time_remaining_before_deadline', models.FloatField(default=0)),
+                ('total_overtime_hours', models.FloatField(default=0)),
+                ('total_lateness_hours', models.FloatField(default=0)),
+                ('total_absent_days', models.IntegerField(default=0)),
+                ('number_of_non_holiday_days_since_join', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('scope', 'key')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlySalaryTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('record_count', models.IntegerField(default=0)),
+                ('total_paid', models.FloatField(default=0)),
+                ('total_deductions', models.FloatField(default=0)),
+                ('total_overtime_salary', models.FloatField(default=0)),
+            ],
+            options={
+                'unique_together': {('year', 'month')},
+            },
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
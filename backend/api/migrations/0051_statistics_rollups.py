@@ -0,0 +1,103 @@
+# Generated by Django 5.2.3 on 2026-10-18 21:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+POSITION_ROLLUP_FIELDS = [
+    "avg_task_rating",
+    "avg_time_remaining",
+    "avg_overtime",
+    "avg_lateness",
+    "avg_absent_days",
+    "avg_salary",
+]
+
+
+def build_rollups(apps, schema_editor):
+    # Unpack the JSON of existing snapshots into rollup rows
+    CompanyStatistics = apps.get_model("api", "CompanyStatistics")
+    Position = apps.get_model("api", "Position")
+    Region = apps.get_model("api", "Region")
+    PositionStatistics = apps.get_model("api", "PositionStatistics")
+    RegionStatistics = apps.get_model("api", "RegionStatistics")
+    position_ids = dict(Position.objects.values_list("name", "id"))
+    region_ids = dict(Region.objects.values_list("name", "id"))
+
+    positions, regions = [], []
+    for snapshot in CompanyStatistics.objects.iterator():
+        for name, values in (snapshot.position_stats or {}).items():
+            positions.append(
+                PositionStatistics(
+                    snapshot_id=snapshot.pk,
+                    snapshot_date=snapshot.snapshot_date,
+                    position_id=position_ids.get(name),
+                    position_name=name,
+                    employee_count=values.get("count") or 0,
+                    **{field: values.get(field) for field in POSITION_ROLLUP_FIELDS},
+                )
+            )
+        for name, values in (snapshot.region_stats or {}).items():
+            regions.append(
+                RegionStatistics(
+                    snapshot_id=snapshot.pk,
+                    snapshot_date=snapshot.snapshot_date,
+                    region_id=region_ids.get(name),
+                    region_name=name,
+                    distance_to_work=values.get("distance_to_work"),
+                    employee_count=values.get("employee_count") or 0,
+                    avg_lateness=values.get("avg_lateness"),
+                )
+            )
+    PositionStatistics.objects.bulk_create(positions, batch_size=1000)
+    RegionStatistics.objects.bulk_create(regions, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0050_company_stat_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PositionStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField()),
+                ('position_name', models.CharField(max_length=100)),
+                ('employee_count', models.IntegerField()),
+                ('avg_task_rating', models.FloatField(null=True)),
+                ('avg_time_remaining', models.FloatField(null=True)),
+                ('avg_overtime', models.FloatField(null=True)),
+                ('avg_lateness', models.FloatField(null=True)),
+                ('avg_absent_days', models.FloatField(null=True)),
+                ('avg_salary', models.FloatField(null=True)),
+                ('position', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.position')),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='position_rollups', to='api.companystatistics')),
+            ],
+            options={
+                'verbose_name_plural': 'Position statistics',
+                'indexes': [models.Index(fields=['position', 'snapshot_date'], name='api_positio_positio_5ea448_idx')],
+                'unique_together': {('snapshot', 'position')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RegionStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField()),
+                ('region_name', models.CharField(max_length=100)),
+                ('distance_to_work', models.IntegerField(null=True)),
+                ('employee_count', models.IntegerField()),
+                ('avg_lateness', models.FloatField(null=True)),
+                ('region', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.region')),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='region_rollups', to='api.companystatistics')),
+            ],
+            options={
+                'verbose_name_plural': 'Region statistics',
+                'indexes': [models.Index(fields=['region', 'snapshot_date'], name='api_regions_region__00b84e_idx')],
+                'unique_together': {('snapshot', 'region')},
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,140 @@
+# Generated by Django 5.2.3 on 2026-10-18 21:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Cast
+
+EMPLOYEE_COUNTER_FIELDS = [
+    "total_task_ratings",
+    "number_of_accepted_tasks",
+    "total_time_remaining_before_deadline",
+    "total_overtime_hours",
+    "total_lateness_hours",
+    "total_absent_days",
+    "number_of_non_holiday_days_since_join",
+]
+
+# metric -> (employee total, denominator)
+MOMENT_METRICS = {
+    "task_rating": ("total_task_ratings", "number_of_accepted_tasks"),
+    "time_remaining": (
+        "total_time_remaining_before_deadline",
+        "number_of_accepted_tasks",
+    ),
+    "lateness_hrs": ("total_lateness_hours", "number_of_non_holiday_days_since_join"),
+    "absence_days": ("total_absent_days", "number_of_non_holiday_days_since_join"),
+    "avg_overtime": ("total_overtime_hours", "number_of_non_holiday_days_since_join"),
+}
+
+
+def build_counters(apps, schema_editor):
+    # Rebuild the counters with the rating sums and the HR scope, and the
+    # correlation moments, with grouped queries
+    Employee = apps.get_model("api", "Employee")
+    CompanyStatCounter = apps.get_model("api", "CompanyStatCounter")
+    HRCorrelationMoments = apps.get_model("api", "HRCorrelationMoments")
+    aggregates = {
+        "employee_count": Count("id"),
+        "salaried_count": Count("basic_salary"),
+        "total_basic_salary": Sum("basic_salary"),
+        "rated_count": Count("interviewer_rating"),
+        "total_interviewer_rating": Sum("interviewer_rating"),
+        **{field: Sum(field) for field in EMPLOYEE_COUNTER_FIELDS},
+    }
+
+    def counter(scope, key, row):
+        return CompanyStatCounter(
+            scope=scope, key=key, **{field: value or 0 for field, value in row.items()}
+        )
+
+    accepted = Employee.objects.filter(interview_state="accepted").order_by()
+    counters = [counter("company", 0, accepted.aggregate(**aggregates))]
+    for scope, field in (
+        ("position", "position_id"),
+        ("region", "region_id"),
+        ("hr", "interviewer_id"),
+    ):
+        for row in (
+            accepted.filter(**{f"{field}__isnull": False})
+            .values(field)
+            .annotate(**aggregates)
+        ):
+            counters.append(counter(scope, row.pop(field), row))
+    CompanyStatCounter.objects.all().delete()
+    CompanyStatCounter.objects.bulk_create(counters, batch_size=1000)
+
+    moments = []
+    for metric, (total, denominator) in MOMENT_METRICS.items():
+        eligible = accepted.filter(
+            interviewer__isnull=False,
+            interviewer_rating__isnull=False,
+            **{f"{denominator}__gt": 0},
+        ).annotate(y=Cast(total, FloatField()) / Cast(denominator, FloatField()))
+        for row in eligible.values("interviewer_id").annotate(
+            n=Count("id"),
+            sum_x=Sum("interviewer_rating"),
+            sum_y=Sum("y"),
+            sum_xy=Sum(F("interviewer_rating") * F("y")),
+            sum_xx=Sum(F("interviewer_rating") * F("interviewer_rating")),
+            sum_yy=Sum(F("y") * F("y")),
+        ):
+            moments.append(
+                HRCorrelationMoments(
+                    hr_id=row.pop("interviewer_id"), metric=metric, **row
+                )
+            )
+    HRCorrelationMoments.objects.bulk_create(moments, batch_size=1000)
+
+
+def drop_hr_counters(apps, schema_editor):
+    apps.get_model("api", "CompanyStatCounter").objects.filter(scope="hr").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0051_statistics_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companystatcounter',
+            name='rated_count',
+            field=models.IntegerField(default=0, help_text='Employees with an interviewer rating'),
+        ),
+        migrations.AddField(
+            model_name='companystatcounter',
+            name='total_interviewer_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='companystatcounter',
+            name='key',
+            field=models.IntegerField(default=0, help_text='Position, region or HR id; 0 for the company row'),
+        ),
+        migrations.AlterField(
+            model_name='companystatcounter',
+            name='scope',
+            field=models.CharField(choices=[('company', 'Company'), ('position', 'Position'), ('region', 'Region'), ('hr', 'Interviewing HR')], max_length=10),
+        ),
+        migrations.CreateModel(
+            name='HRCorrelationMoments',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('task_rating', 'Task rating'), ('time_remaining', 'Time remaining'), ('lateness_hrs', 'Lateness hours'), ('absence_days', 'Absence days'), ('avg_overtime', 'Overtime')], max_length=20)),
+                ('n', models.IntegerField(default=0)),
+                ('sum_x', models.FloatField(default=0)),
+                ('sum_y', models.FloatField(default=0)),
+                ('sum_xy', models.FloatField(default=0)),
+                ('sum_xx', models.FloatField(default=0)),
+                ('sum_yy', models.FloatField(default=0)),
+                ('hr', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moments', to='api.hr')),
+            ],
+            options={
+                'verbose_name_plural': 'HR correlation moments',
+                'unique_together': {('hr', 'metric')},
+            },
+        ),
+        migrations.RunPython(build_counters, drop_hr_counters),
+    ]
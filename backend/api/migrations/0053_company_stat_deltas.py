@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-18 21:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0052_hr_correlation_moments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyStatCounterDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('company', 'Company'), ('position', 'Position'), ('region', 'Region'), ('hr', 'Interviewing HR')], max_length=10)),
+                ('key', models.IntegerField(default=0, help_text='Position, region or HR id; 0 for the company row')),
+                ('employee_count', models.IntegerField(default=0)),
+                ('salaried_count', models.IntegerField(default=0, help_text='Employees with a basic salary set')),
+                ('total_basic_salary', models.FloatField(default=0)),
+                ('rated_count', models.IntegerField(default=0, help_text='Employees with an interviewer rating')),
+                ('total_interviewer_rating', models.FloatField(default=0)),
+                ('total_task_ratings', models.FloatField(default=0)),
+                ('number_of_accepted_tasks', models.IntegerField(default=0)),
+                ('total_time_remaining_before_deadline', models.FloatField(default=0)),
+                ('total_overtime_hours', models.FloatField(default=0)),
+                ('total_lateness_hours', models.FloatField(default=0)),
+                ('total_absent_days', models.IntegerField(default=0)),
+                ('number_of_non_holiday_days_since_join', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['scope', 'key'], name='api_company_scope_299b56_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HRCorrelationMomentsDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('task_rating', 'Task rating'), ('time_remaining', 'Time remaining'), ('lateness_hrs', 'Lateness hours'), ('absence_days', 'Absence days'), ('avg_overtime', 'Overtime')], max_length=20)),
+                ('n', models.IntegerField(default=0)),
+                ('sum_x', models.FloatField(default=0)),
+                ('sum_y', models.FloatField(default=0)),
+                ('sum_xy', models.FloatField(default=0)),
+                ('sum_xx', models.FloatField(default=0)),
+                ('sum_yy', models.FloatField(default=0)),
+                ('hr', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_moments', to='api.hr')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hr', 'metric'], name='api_hrcorre_hr_id_1d8307_idx')],
+            },
+        ),
+    ]
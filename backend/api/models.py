@@ -1,12 +1,9 @@
 from django.db import models
 from django.conf import settings
-import datetime
-from django.db.models import Sum, Avg
-from django.db.models.functions import Cast
-from django.db.models import FloatField
-import pandas as pd
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from .supabase_utils import upload_to_supabase
+from .utils.lateness_utils import apply_lateness
 
 
 class AttendanceRecord(models.Model):
@@ -30,6 +27,10 @@ class AttendanceRecord(models.Model):
     lateness_hours = models.FloatField(default=0)
     overtime_hours = models.FloatField(default=0)
     overtime_approved = models.BooleanField(default=False)
+    stats_counted = models.BooleanField(
+        default=False,
+        help_text="Whether this day was already added to the employee's day counters",
+    )
     # Geolocation fields for attendance validation
     check_in_latitude = models.FloatField(
         null=True, blank=True, help_text="Employee's latitude during check-in"
@@ -51,6 +52,7 @@ class AttendanceRecord(models.Model):
             models.Index(fields=["date", "status"]),
             models.Index(fields=["overtime_approved", "overtime_hours"]),
             models.Index(fields=["-date"]),
+            models.Index(fields=["-date", "-id"]),
         ]
 
     def __str__(self):
@@ -58,21 +60,8 @@ class AttendanceRecord(models.Model):
 
     def save(self, *args, **kwargs):
         # Calculate lateness_hours before saving
-        if self.check_in_time and hasattr(self.user, "employee"):
-            expected_time = self.user.employee.expected_attend_time
-            if expected_time:
-                check_in_dt = datetime.datetime.combine(self.date, self.check_in_time)
-                expected_dt = datetime.datetime.combine(self.date, expected_time)
-                grace_dt = expected_dt + datetime.timedelta(
-                    minutes=15
-                )  # 15-minute grace period
-
-                # Only calculate lateness if check-in is after grace period
-                if check_in_dt > grace_dt:
-                    lateness_seconds = (check_in_dt - grace_dt).total_seconds()
-                    self.lateness_hours = round(lateness_seconds / 3600, 2)
-                else:
-                    self.lateness_hours = 0.0
+        if self.check_in_time:
+            apply_lateness([self])
 
         super().save(*args, **kwargs)
 
@@ -84,8 +73,14 @@ class OvertimeRequest(models.Model):
         ("rejected", "Rejected"),
     ]
 
+    # No database FK: the attendance table is partitioned by date on
+    # PostgreSQL, so its id alone is not a referenceable unique key.
+    # Deletes still cascade through the ORM.
     attendance_record = models.OneToOneField(
-        "AttendanceRecord", on_delete=models.CASCADE, related_name="overtime_request"
+        "AttendanceRecord",
+        on_delete=models.CASCADE,
+        related_name="overtime_request",
+        db_constraint=False,
     )
     requested_hours = models.FloatField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
@@ -109,6 +104,7 @@ class OvertimeRequest(models.Model):
             models.Index(fields=["status", "reviewed_at"]),
             models.Index(fields=["status", "-requested_at"]),
             models.Index(fields=["-reviewed_at"]),
+            models.Index(fields=["-requested_at", "-id"]),
         ]
 
 
@@ -118,48 +114,101 @@ class SalaryRecord(models.Model):
     year = models.IntegerField()
     base_salary = models.FloatField()
     final_salary = models.FloatField()
-    details = models.JSONField(
-        default=dict,
-        blank=True,
-        help_text="Snapshot of all salary factors for this month.",
-    )
+    # Salary factors for this month, kept as columns so reports can
+    # aggregate them in the database. The rates are null on records
+    # generated before they were recorded.
+    absent_days = models.IntegerField(default=0)
+    late_days = models.IntegerField(default=0)
+    lateness_hours = models.FloatField(default=0)
+    overtime_hours = models.FloatField(default=0)
+    absence_day_penalty = models.FloatField(null=True, blank=True)
+    shorttime_hour_penalty = models.FloatField(null=True, blank=True)
+    overtime_hour_salary = models.FloatField(null=True, blank=True)
+    total_absence_penalty = models.FloatField(default=0)
+    total_late_penalty = models.FloatField(default=0)
+    total_deductions = models.FloatField(default=0)
+    total_overtime_salary = models.FloatField(default=0)
     generated_at = models.DateTimeField(auto_now_add=True)
+    needs_recalculation = models.BooleanField(
+        default=False,
+        help_text="Attendance of this month changed since the salary was computed",
+    )
 
     class Meta:
         unique_together = ("user", "month", "year")
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(needs_recalculation=True),
+                name="api_salaryrecord_dirty_idx",
+            ),
+            models.Index(fields=["year", "month"]),
+        ]
 
     def __str__(self):
         return f"Salary for {self.user} - {self.month}/{self.year}: {self.final_salary}"
 
+    @property
+    def details(self):
+        """Snapshot of all salary factors for this month, as returned by the API."""
+        from .utils.payroll import SALARY_COMPONENT_FIELDS
+
+        return {field: getattr(self, field) for field in SALARY_COMPONENT_FIELDS}
+
     @property
     def summary(self):
         """Return a summary of the main salary components for display/reporting."""
-        d = self.details or {}
         return {
             "base_salary": self.base_salary,
             "final_salary": self.final_salary,
-            "absent_days": d.get("absent_days"),
-            "late_days": d.get("late_days"),
-            "overtime_hours": d.get("overtime_hours"),
-            "absent_penalty": d.get("absent_penalty"),
-            "late_penalty": d.get("late_penalty"),
-            "overtime_bonus": d.get("overtime_bonus"),
+            "absent_days": self.absent_days,
+            "late_days": self.late_days,
+            "overtime_hours": self.overtime_hours,
+            "absent_penalty": self.total_absence_penalty,
+            "late_penalty": self.total_late_penalty,
+            "overtime_bonus": self.total_overtime_salary,
             "other": {
-                k: v
-                for k, v in d.items()
-                if k
-                not in {
-                    "absent_days",
-                    "late_days",
-                    "overtime_hours",
-                    "absent_penalty",
-                    "late_penalty",
-                    "overtime_bonus",
-                }
+                "lateness_hours": self.lateness_hours,
+                "absence_day_penalty": self.absence_day_penalty,
+                "shorttime_hour_penalty": self.shorttime_hour_penalty,
+                "overtime_hour_salary": self.overtime_hour_salary,
+                "total_deductions": self.total_deductions,
             },
         }
 
 
+class MonthlyAttendanceSummary(models.Model):
+    """
+    Per-employee monthly attendance totals used by payroll and reporting.
+    Kept current incrementally (see api/utils/monthly_summary.py) and
+    rebuildable from raw attendance with the rebuild_monthly_summaries command.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="monthly_attendance_summaries",
+    )
+    year = models.IntegerField()
+    month = models.IntegerField()
+    absent_days = models.IntegerField(default=0)
+    late_days = models.IntegerField(default=0)
+    lateness_hours = models.FloatField(default=0)
+    overtime_hours = models.FloatField(
+        default=0, help_text="Approved overtime hours only"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("user", "year", "month")
+        indexes = [
+            models.Index(fields=["year", "month"]),
+        ]
+
+    def __str__(self):
+        return f"Attendance summary for {self.user} - {self.month}/{self.year}"
+
+
 class BasicInfo(models.Model):
     profile_image_url = models.CharField(max_length=1000, blank=True)
     phone = models.CharField(max_length=15, blank=True, null=True)
@@ -215,152 +264,9 @@ class HR(models.Model):
 
     def calculate_accepted_employees_stats(self):
         """Updates all average and correlation fields"""
+        from .utils.hr_stats import update_hr_stats
 
-        accepted = self.accepted_employees
-        count = accepted.count()
-
-        if count == 0:
-            print("\n Found No Employees")
-
-            # Reset all fields
-            self.accepted_employees_avg_task_rating = None
-            self.accepted_employees_avg_time_remaining = None
-            self.accepted_employees_avg_lateness_hrs = None
-            self.accepted_employees_avg_absence_days = None
-            self.accepted_employees_avg_salary = None
-            self.accepted_employees_avg_overtime = None
-            self.accepted_employees_avg_interviewer_rating = None
-
-            # Reset correlation fields
-            self.interviewer_rating_to_task_rating_correlation = None
-            self.interviewer_rating_to_time_remaining_correlation = None
-            self.interviewer_rating_to_lateness_hrs_correlation = None
-            self.interviewer_rating_to_absence_days_correlation = None
-            self.interviewer_rating_to_avg_overtime_correlation = None
-        else:
-            print("\n Found Employees")
-            # Get all aggregates
-            aggregates = accepted.aggregate(
-                total_ratings=Sum("total_task_ratings"),
-                total_tasks=Sum("number_of_accepted_tasks"),
-                total_time=Sum("total_time_remaining_before_deadline"),
-                total_lateness=Sum("total_lateness_hours"),
-                total_absence=Sum("total_absent_days"),
-                avg_salary=Avg("basic_salary"),
-                total_overtime=Sum("total_overtime_hours"),
-                total_days=Sum("number_of_non_holiday_days_since_join"),
-                avg_interviewer_rating=Avg("interviewer_rating"),
-            )
-
-            # Calculate averages
-            total_tasks = aggregates.get("total_tasks") or 0
-            total_days = aggregates.get("total_days") or 0
-
-            self.accepted_employees_avg_task_rating = (
-                round(aggregates["total_ratings"] / total_tasks, 2)
-                if total_tasks > 0
-                else None
-            )
-            self.accepted_employees_avg_time_remaining = (
-                round(aggregates["total_time"] / total_tasks, 2)
-                if total_tasks > 0
-                else None
-            )
-            self.accepted_employees_avg_lateness_hrs = (
-                round(aggregates["total_lateness"] / total_days, 2)
-                if total_days > 0
-                else None
-            )
-            self.accepted_employees_avg_absence_days = (
-                round(aggregates["total_absence"] / total_days, 2)
-                if total_days > 0
-                else None
-            )
-            self.accepted_employees_avg_salary = (
-                round(aggregates.get("avg_salary"), 2)
-                if aggregates.get("avg_salary") is not None
-                else None
-            )
-            self.accepted_employees_avg_overtime = (
-                round(aggregates["total_overtime"] / total_days, 2)
-                if total_days > 0
-                else None
-            )
-            self.accepted_employees_avg_interviewer_rating = (
-                round(aggregates.get("avg_interviewer_rating"), 2)
-                if aggregates.get("avg_interviewer_rating") is not None
-                else None
-            )
-
-            # Task-based correlations (require tasks > 0)
-            task_based_qs = accepted.filter(
-                interviewer_rating__isnull=False,
-                number_of_accepted_tasks__gt=0,
-            )
-            print(f"→ Found Task-based eligible employees: {task_based_qs.count()}")
-
-            task_df = pd.DataFrame(
-                list(
-                    task_based_qs.annotate(
-                        task_rating=Cast("total_task_ratings", FloatField())
-                        / Cast("number_of_accepted_tasks", FloatField()),
-                        time_remaining=Cast(
-                            "total_time_remaining_before_deadline", FloatField()
-                        )
-                        / Cast("number_of_accepted_tasks", FloatField()),
-                    ).values("interviewer_rating", "task_rating", "time_remaining")
-                )
-            )
-
-            self.interviewer_rating_to_task_rating_correlation = (
-                round(task_df["interviewer_rating"].corr(task_df["task_rating"]), 4)
-                if len(task_df) >= 2
-                else None
-            )
-            self.interviewer_rating_to_time_remaining_correlation = (
-                round(task_df["interviewer_rating"].corr(task_df["time_remaining"]), 4)
-                if len(task_df) >= 2
-                else None
-            )
-
-            # Day-based correlations (require non-holiday days > 0)
-            day_based_qs = accepted.filter(
-                interviewer_rating__isnull=False,
-                number_of_non_holiday_days_since_join__gt=0,
-            )
-            print(f"→ Found Day-based eligible employees: {day_based_qs.count()}")
-
-            day_df = pd.DataFrame(
-                list(
-                    day_based_qs.annotate(
-                        lateness=Cast("total_lateness_hours", FloatField())
-                        / Cast("number_of_non_holiday_days_since_join", FloatField()),
-                        absence=Cast("total_absent_days", FloatField())
-                        / Cast("number_of_non_holiday_days_since_join", FloatField()),
-                        overtime=Cast("total_overtime_hours", FloatField())
-                        / Cast("number_of_non_holiday_days_since_join", FloatField()),
-                    ).values("interviewer_rating", "lateness", "absence", "overtime")
-                )
-            )
-
-            self.interviewer_rating_to_lateness_hrs_correlation = (
-                round(day_df["interviewer_rating"].corr(day_df["lateness"]), 4)
-                if len(day_df) >= 2
-                else None
-            )
-            self.interviewer_rating_to_absence_days_correlation = (
-                round(day_df["interviewer_rating"].corr(day_df["absence"]), 4)
-                if len(day_df) >= 2
-                else None
-            )
-            self.interviewer_rating_to_avg_overtime_correlation = (
-                round(day_df["interviewer_rating"].corr(day_df["overtime"]), 4)
-                if len(day_df) >= 2
-                else None
-            )
-
-        self.last_stats_calculation_time = timezone.now()
-        self.save()
+        update_hr_stats([self])
 
 
 class Position(models.Model):
@@ -456,6 +362,9 @@ class Employee(models.Model):
 
     expected_attend_time = models.TimeField(null=True, blank=True)
     expected_leave_time = models.TimeField(null=True, blank=True)
+    schedule_version = models.PositiveIntegerField(
+        default=0
+    )  # bumped whenever holiday/online days change, see api/signals.py
 
     total_overtime_hours = models.FloatField(
         default=0
@@ -670,6 +579,195 @@ class CompanyStatistics(models.Model):
         return f"Company Stats - {self.snapshot_date}"
 
 
+class PositionStatistics(models.Model):
+    """
+    One position's figures in a CompanyStatistics snapshot, stored as rows
+    so time series can be queried without parsing the snapshot JSON.
+    """
+
+    snapshot = models.ForeignKey(
+        CompanyStatistics, on_delete=models.CASCADE, related_name="position_rollups"
+    )
+    snapshot_date = models.DateField()
+    position = models.ForeignKey(
+        Position, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    position_name = models.CharField(max_length=100)
+    employee_count = models.IntegerField()
+    avg_task_rating = models.FloatField(null=True)
+    avg_time_remaining = models.FloatField(null=True)
+    avg_overtime = models.FloatField(null=True)
+    avg_lateness = models.FloatField(null=True)
+    avg_absent_days = models.FloatField(null=True)
+    avg_salary = models.FloatField(null=True)
+
+    class Meta:
+        unique_together = ("snapshot", "position")
+        indexes = [models.Index(fields=["position", "snapshot_date"])]
+        verbose_name_plural = "Position statistics"
+
+    def __str__(self):
+        return f"{self.position_name} - {self.snapshot_date}"
+
+
+class RegionStatistics(models.Model):
+    """One region's figures in a CompanyStatistics snapshot."""
+
+    snapshot = models.ForeignKey(
+        CompanyStatistics, on_delete=models.CASCADE, related_name="region_rollups"
+    )
+    snapshot_date = models.DateField()
+    region = models.ForeignKey(
+        Region, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    region_name = models.CharField(max_length=100)
+    distance_to_work = models.IntegerField(null=True)
+    employee_count = models.IntegerField()
+    avg_lateness = models.FloatField(null=True)
+
+    class Meta:
+        unique_together = ("snapshot", "region")
+        indexes = [models.Index(fields=["region", "snapshot_date"])]
+        verbose_name_plural = "Region statistics"
+
+    def __str__(self):
+        return f"{self.region_name} - {self.snapshot_date}"
+
+
+class CompanyStatCounterFields(models.Model):
+    """Fields shared by CompanyStatCounter rows and their pending deltas."""
+
+    COMPANY = "company"
+    POSITION = "position"
+    REGION = "region"
+    HR = "hr"
+    SCOPE_CHOICES = [
+        (COMPANY, "Company"),
+        (POSITION, "Position"),
+        (REGION, "Region"),
+        (HR, "Interviewing HR"),
+    ]
+
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    key = models.IntegerField(
+        default=0, help_text="Position, region or HR id; 0 for the company row"
+    )
+    employee_count = models.IntegerField(default=0)
+    salaried_count = models.IntegerField(
+        default=0, help_text="Employees with a basic salary set"
+    )
+    total_basic_salary = models.FloatField(default=0)
+    rated_count = models.IntegerField(
+        default=0, help_text="Employees with an interviewer rating"
+    )
+    total_interviewer_rating = models.FloatField(default=0)
+    total_task_ratings = models.FloatField(default=0)
+    number_of_accepted_tasks = models.IntegerField(default=0)
+    total_time_remaining_before_deadline = models.FloatField(default=0)
+    total_overtime_hours = models.FloatField(default=0)
+    total_lateness_hours = models.FloatField(default=0)
+    total_absent_days = models.IntegerField(default=0)
+    number_of_non_holiday_days_since_join = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class CompanyStatCounter(CompanyStatCounterFields):
+    """
+    Running totals over accepted employees, company-wide and per position,
+    region and interviewing HR, kept in step with the Employee counters (see
+    api/utils/company_stats.py) so statistics never scan employees.
+    Rebuildable with the rebuild_company_stats command.
+    """
+
+    class Meta:
+        unique_together = ("scope", "key")
+
+    def __str__(self):
+        return f"{self.scope} {self.key}: {self.employee_count} employees"
+
+
+class CompanyStatCounterDelta(CompanyStatCounterFields):
+    """
+    A change to a CompanyStatCounter row not yet added to it. Writers only
+    insert these, so they never wait on each other's counter row locks;
+    readers add the pending ones and fold_stat_deltas() merges them in.
+    """
+
+    class Meta:
+        indexes = [models.Index(fields=["scope", "key"])]
+
+
+class HRCorrelationMomentsFields(models.Model):
+    """Fields shared by HRCorrelationMoments rows and their pending deltas."""
+
+    METRIC_CHOICES = [
+        ("task_rating", "Task rating"),
+        ("time_remaining", "Time remaining"),
+        ("lateness_hrs", "Lateness hours"),
+        ("absence_days", "Absence days"),
+        ("avg_overtime", "Overtime"),
+    ]
+
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    n = models.IntegerField(default=0)
+    sum_x = models.FloatField(default=0)
+    sum_y = models.FloatField(default=0)
+    sum_xy = models.FloatField(default=0)
+    sum_xx = models.FloatField(default=0)
+    sum_yy = models.FloatField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class HRCorrelationMoments(HRCorrelationMomentsFields):
+    """
+    Sufficient statistics of the correlation between the interviewer rating
+    (x) and one per-employee metric (y) over an HR's accepted employees:
+    n, the sums of x, y, xy, x² and y². Kept in step with Employee writes
+    like CompanyStatCounter; HR correlation fields are derived from them.
+    """
+
+    hr = models.ForeignKey(HR, on_delete=models.CASCADE, related_name="moments")
+
+    class Meta:
+        unique_together = ("hr", "metric")
+        verbose_name_plural = "HR correlation moments"
+
+    def __str__(self):
+        return f"HR {self.hr_id} {self.metric}: n={self.n}"
+
+
+class HRCorrelationMomentsDelta(HRCorrelationMomentsFields):
+    """A change to an HRCorrelationMoments row, like CompanyStatCounterDelta."""
+
+    hr = models.ForeignKey(
+        HR, on_delete=models.CASCADE, related_name="pending_moments"
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=["hr", "metric"])]
+
+
+class MonthlySalaryTotal(models.Model):
+    """Salary totals of a payroll month, kept in step with SalaryRecord writes."""
+
+    year = models.IntegerField()
+    month = models.IntegerField()
+    record_count = models.IntegerField(default=0)
+    total_paid = models.FloatField(default=0)
+    total_deductions = models.FloatField(default=0)
+    total_overtime_salary = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ("year", "month")
+
+    def __str__(self):
+        return f"Salary totals {self.month}/{self.year}: {self.total_paid}"
+
+
 class EmployeeLeavePolicy(models.Model):
     employee = models.OneToOneField(
         Employee, on_delete=models.CASCADE, related_name="leave_policy"
@@ -750,3 +848,71 @@ class Headquarters(models.Model):
             }
         )
         return headquarters
+
+
+class Job(models.Model):
+    """A unit of background work, run by `manage.py run_workers`."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveSmallIntegerField(
+        default=0, help_text="Percent complete (0-100)"
+    )
+    progress_message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="jobs",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last sign of life from the worker running this job",
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # Serves the workers' claim query: oldest queued job first
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(status="queued"),
+                name="api_job_queued_idx",
+            ),
+            models.Index(fields=["created_by", "-created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    def report_progress(self, progress, message=""):
+        """Store progress (0-100) right away so pollers see it mid-run."""
+        self.progress = max(0, min(100, int(progress)))
+        self.progress_message = message[:255]
+        self.heartbeat_at = timezone.now()
+        Job.objects.filter(pk=self.pk).update(
+            progress=self.progress,
+            progress_message=self.progress_message,
+            heartbeat_at=self.heartbeat_at,
+        )
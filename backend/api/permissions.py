@@ -80,7 +80,7 @@ class AttendancePermission(BasePermission):
                 hasattr(user, "employee") and user.employee.is_coordinator
             )
         # Only admin/hr can create/update
-        if view.action in ["create", "update", "partial_update"]:
+        if view.action in ["create", "update", "partial_update", "bulk_import"]:
             return role in ["admin", "hr"]
         # Only admin/hr can convert attendance to leave
         if view.action == "convert_to_leave":
@@ -89,7 +89,7 @@ class AttendancePermission(BasePermission):
         if view.action == "destroy":
             return role == "admin"
         # List/retrieve: all roles can view, but queryset will be filtered
-        if view.action in ["list", "retrieve"]:
+        if view.action in ["list", "retrieve", "monthly_summary", "export"]:
             return True
         return False
 
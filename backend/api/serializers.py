@@ -5,6 +5,7 @@ from .models import (
     SalaryRecord,
 )
 from datetime import datetime, time
+from .utils.hr_stats import attach_hr_stats
 from .utils.overtime_utils import can_request_overtime
 from django.contrib.auth import get_user_model
 
@@ -29,6 +30,8 @@ from .models import (
     EducationField,
     CompanyStatistics,
     Headquarters,
+    MonthlyAttendanceSummary,
+    Job,
 )
 from .models import (
     Employee,
@@ -189,6 +192,15 @@ class EmployeeSerializer(serializers.ModelSerializer):
         return [o.weekday for o in obj.onlinedayweekday_set.all()]
 
 
+class HRStatsListSerializer(serializers.ListSerializer):
+    """Derives the statistics of all listed HRs with one attach_hr_stats()."""
+
+    def to_representation(self, data):
+        return super().to_representation(
+            attach_hr_stats(data.all() if hasattr(data, "all") else data)
+        )
+
+
 class HRSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(read_only=True)
     user = UserSerializer(read_only=True)
@@ -218,9 +230,15 @@ class HRSerializer(serializers.ModelSerializer):
             "rank",
         ]
         read_only_fields = fields
+        list_serializer_class = HRStatsListSerializer
 
     def to_representation(self, instance):
-        """Replace NaN with None in all float fields."""
+        """
+        Serialize the live statistics (derived from the running counters)
+        and replace NaN with None in all float fields.
+        """
+        if not getattr(instance, "_live_stats", False):
+            attach_hr_stats([instance])
         data = super().to_representation(instance)
         float_fields = [
             "accepted_employees_avg_task_rating",
@@ -683,12 +701,55 @@ class EmployeeListSerializer(serializers.ModelSerializer):
         ]
 
 
+class MonthlyAttendanceSummarySerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source="user.username", read_only=True)
+
+    class Meta:
+        model = MonthlyAttendanceSummary
+        fields = [
+            "user",
+            "username",
+            "year",
+            "month",
+            "absent_days",
+            "late_days",
+            "lateness_hours",
+            "overtime_hours",
+        ]
+
+
+class JobSerializer(serializers.ModelSerializer):
+    # Only the exception line; the full traceback stays in the admin
+    error = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "kind",
+            "status",
+            "progress",
+            "progress_message",
+            "result",
+            "error",
+            "attempts",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+    def get_error(self, job):
+        return job.error.strip().splitlines()[-1] if job.error else ""
+
+
 class SalaryRecordSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     employee_position = serializers.CharField(
         source="user.employee.position.name", read_only=True
     )
     employee_id = serializers.IntegerField(source="user.employee.id", read_only=True)
+    details = serializers.DictField(read_only=True)
 
     class Meta:
         model = SalaryRecord
@@ -703,6 +764,7 @@ class SalaryRecordSerializer(serializers.ModelSerializer):
             "final_salary",
             "details",
             "generated_at",
+            "needs_recalculation",
         ]
 
 
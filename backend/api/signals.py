@@ -0,0 +1,192 @@
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+
+from django.contrib.auth import get_user_model
+
+from .models import (
+    HR,
+    BasicInfo,
+    CompanyStatCounter,
+    CompanyStatCounterDelta,
+    CompanyStatistics,
+    Employee,
+    Headquarters,
+    HolidayWeekday,
+    HolidayYearday,
+    OnlineDayWeekday,
+    OnlineDayYearday,
+    Region,
+    SalaryRecord,
+)
+from .utils.company_stats import (
+    EMPLOYEE_STAT_FIELDS,
+    SALARY_STAT_FIELDS,
+    add_deltas,
+    apply_employee_deltas,
+    apply_salary_total_deltas,
+    employee_contribution,
+    salary_contribution,
+    tracked_values,
+    tracked_values_after_save,
+    tracked_values_before_save,
+)
+from .utils.geofence import invalidate_geofence_index
+from .utils.result_cache import COMPANY_STATISTICS, EMPLOYEES, HRS, bump_data_version
+from .utils.work_calendar import invalidate_work_calendars
+
+SCHEDULE_DAY_MODELS = (HolidayWeekday, HolidayYearday, OnlineDayWeekday, OnlineDayYearday)
+
+
+def bump_schedule_version(employee_ids):
+    """Mark the compiled work calendars of these employees as stale."""
+    employee_ids = list(employee_ids)
+    if not employee_ids:
+        return
+    Employee.objects.filter(pk__in=employee_ids).update(
+        schedule_version=F("schedule_version") + 1
+    )
+    invalidate_work_calendars(employee_ids)
+
+
+def schedule_days_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        # employee.holidayweekday_set.add(...) etc.
+        bump_schedule_version([instance.pk])
+    elif action == "pre_clear":
+        bump_schedule_version(instance.employees.values_list("pk", flat=True))
+    else:
+        bump_schedule_version(pk_set or [])
+
+
+def schedule_day_deleted(sender, instance, **kwargs):
+    bump_schedule_version(instance.employees.values_list("pk", flat=True))
+
+
+for _model in SCHEDULE_DAY_MODELS:
+    m2m_changed.connect(
+        schedule_days_changed,
+        sender=_model.employees.through,
+        dispatch_uid=f"schedule_days_changed_{_model.__name__}",
+    )
+    pre_delete.connect(
+        schedule_day_deleted,
+        sender=_model,
+        dispatch_uid=f"schedule_day_deleted_{_model.__name__}",
+    )
+
+
+def attendance_site_changed(sender, **kwargs):
+    invalidate_geofence_index()
+
+
+for _model in (Headquarters, Region):
+    post_save.connect(
+        attendance_site_changed,
+        sender=_model,
+        dispatch_uid=f"attendance_site_saved_{_model.__name__}",
+    )
+    post_delete.connect(
+        attendance_site_changed,
+        sender=_model,
+        dispatch_uid=f"attendance_site_deleted_{_model.__name__}",
+    )
+
+
+# Company statistics counters follow Employee and SalaryRecord writes: the
+# stored values are read before a save and the difference applied after it.
+STAT_TRACKED_MODELS = {
+    Employee: (EMPLOYEE_STAT_FIELDS, employee_contribution, apply_employee_deltas),
+    SalaryRecord: (SALARY_STAT_FIELDS, salary_contribution, apply_salary_total_deltas),
+}
+
+
+def stats_before_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    fields, _, _ = STAT_TRACKED_MODELS[sender]
+    instance._stats_before = tracked_values_before_save(instance, fields, update_fields)
+
+
+def stats_after_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    fields, contribution, apply_deltas = STAT_TRACKED_MODELS[sender]
+    before = instance.__dict__.pop("_stats_before", None)
+    after = tracked_values_after_save(instance, fields, before, update_fields)
+    if after is None:
+        return
+    deltas = {}
+    if before:
+        add_deltas(deltas, contribution(before), sign=-1)
+    add_deltas(deltas, contribution(after))
+    apply_deltas(deltas)
+
+
+def stats_after_delete(sender, instance, **kwargs):
+    fields, contribution, apply_deltas = STAT_TRACKED_MODELS[sender]
+    apply_deltas(add_deltas({}, contribution(tracked_values(instance, fields)), sign=-1))
+
+
+for _model in STAT_TRACKED_MODELS:
+    pre_save.connect(
+        stats_before_save,
+        sender=_model,
+        dispatch_uid=f"stats_before_save_{_model.__name__}",
+    )
+    post_save.connect(
+        stats_after_save,
+        sender=_model,
+        dispatch_uid=f"stats_after_save_{_model.__name__}",
+    )
+    post_delete.connect(
+        stats_after_delete,
+        sender=_model,
+        dispatch_uid=f"stats_after_delete_{_model.__name__}",
+    )
+
+
+def hr_deleted(sender, instance, **kwargs):
+    # The HR's employees lose their interviewer with a plain UPDATE (SET_NULL)
+    # and its moments cascade; only its counter row and deltas are left to drop.
+    for model in (CompanyStatCounter, CompanyStatCounterDelta):
+        model.objects.filter(scope=CompanyStatCounter.HR, key=instance.pk).delete()
+
+
+post_delete.connect(hr_deleted, sender=HR, dispatch_uid="stats_hr_deleted")
+
+
+# Cached statistics and leaderboard responses (api/utils/result_cache.py)
+# are invalidated by writes to the models they are built from. Bulk writes
+# bump the versions where they happen.
+RESULT_DATASETS = {
+    CompanyStatistics: (COMPANY_STATISTICS,),
+    Employee: (EMPLOYEES,),
+    HR: (HRS,),
+    BasicInfo: (EMPLOYEES, HRS),
+    get_user_model(): (EMPLOYEES, HRS),
+}
+
+
+def result_data_changed(sender, **kwargs):
+    bump_data_version(*RESULT_DATASETS[sender])
+
+
+for _model in RESULT_DATASETS:
+    post_save.connect(
+        result_data_changed,
+        sender=_model,
+        dispatch_uid=f"result_data_saved_{_model.__name__}",
+    )
+    post_delete.connect(
+        result_data_changed,
+        sender=_model,
+        dispatch_uid=f"result_data_deleted_{_model.__name__}",
+    )
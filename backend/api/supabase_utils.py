@@ -21,3 +21,8 @@ def upload_to_supabase(bucket_name, file_obj, filename):
 
     # رجّع الرابط
     return supabase.storage.from_(bucket_name).get_public_url(path)
+
+
+def download_from_supabase(bucket_name, filename):
+    """Bytes of a file stored by upload_to_supabase()."""
+    return supabase.storage.from_(bucket_name).download(f"{bucket_name}/{filename}")
@@ -1,3 +1,483 @@
+import datetime
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
 from django.test import TestCase
+from django.utils import timezone
+
+from .models import (
+    HR,
+    ApplicationLink,
+    AttendanceRecord,
+    CompanyStatCounter,
+    CompanyStatCounterDelta,
+    Employee,
+    Job,
+    MonthlyAttendanceSummary,
+    Position,
+    Region,
+    SalaryRecord,
+)
+from .utils.absence_utils import mark_absences_for_range
+from .utils.attendance_import import import_attendance
+from .utils.company_stats import (
+    COUNTER_FIELDS,
+    apply_employee_counter_deltas,
+    current_counters,
+    fold_stat_deltas,
+    rebuild_company_stats,
+)
+from .utils.hr_stats import HR_STAT_FIELDS, attach_hr_stats, update_hr_stats
+from .utils.jobs import (
+    DEFAULT_STALE_AFTER,
+    MAX_ATTEMPTS,
+    claim_job,
+    requeue_stale_jobs,
+    run_job,
+)
+from .utils.lateness_utils import recalculate_lateness
+from .utils.payroll import SALARY_COMPONENT_FIELDS, run_payroll
+from .utils.payslips import render_payslip
+from .utils.queryset_utils import estimate_count, iter_values_by_pk
+
+User = get_user_model()
+
+
+def create_employee(username, join_date, **fields):
+    """An accepted employee with the minimum of related rows."""
+    position, _ = Position.objects.get_or_create(name="Engineer")
+    link, _ = ApplicationLink.objects.get_or_create(
+        distinction_name="engineers",
+        defaults={
+            "url": "https://example.com/apply",
+            "position": position,
+            "is_coordinator": False,
+            "number_remaining_applicants_to_limit": 10,
+        },
+    )
+    return Employee.objects.create(
+        user=User.objects.create_user(username=username, password="x"),
+        phone="0100000000",
+        position=position,
+        is_coordinator=False,
+        application_link=link,
+        interview_state="accepted",
+        join_date=join_date,
+        **fields,
+    )
+
+
+class MarkAbsencesTests(TestCase):
+    def setUp(self):
+        self.start = datetime.date(2025, 3, 3)  # a Monday
+        self.end = datetime.date(2025, 3, 9)
+        self.employee = create_employee("alice", datetime.date(2025, 3, 1))
+        for day in (3, 5):
+            AttendanceRecord.objects.create(
+                user=self.employee.user,
+                date=datetime.date(2025, 3, day),
+                status="present",
+                attendance_type="physical",
+            )
+
+    def counters(self):
+        self.employee.refresh_from_db()
+        return (
+            self.employee.number_of_non_holiday_days_since_join,
+            self.employee.total_absent_days,
+        )
+
+    def test_counts_each_day_once(self):
+        first = mark_absences_for_range(self.start, self.end)
+
+        self.assertEqual((first["attended"], first["absent"]), (2, 5))
+        self.assertEqual(self.counters(), (7, 5))
+        summary = MonthlyAttendanceSummary.objects.get(
+            user=self.employee.user, year=2025, month=3
+        )
+        self.assertEqual(summary.absent_days, 5)
+
+        second = mark_absences_for_range(self.start, self.end)
+
+        self.assertEqual((second["attended"], second["absent"]), (0, 0))
+        self.assertEqual(second["already_counted"], 7)
+        self.assertEqual(self.counters(), (7, 5))
+        summary.refresh_from_db()
+        self.assertEqual(summary.absent_days, 5)
+
+    def test_overlapping_runs_only_count_new_days(self):
+        mark_absences_for_range(self.start, datetime.date(2025, 3, 5))
+        AttendanceRecord.objects.create(
+            user=self.employee.user,
+            date=datetime.date(2025, 3, 7),
+            status="present",
+            attendance_type="physical",
+        )
+
+        result = mark_absences_for_range(datetime.date(2025, 3, 4), self.end)
+
+        self.assertEqual(result["already_counted"], 2)
+        self.assertEqual((result["attended"], result["absent"]), (1, 3))
+        self.assertEqual(self.counters(), (7, 4))
+        self.assertEqual(
+            AttendanceRecord.objects.filter(
+                user=self.employee.user, status="absent"
+            ).count(),
+            4,
+        )
+
+
+class AttendanceImportTests(TestCase):
+    def setUp(self):
+        self.employee = create_employee(
+            "alice",
+            datetime.date(2025, 3, 1),
+            expected_attend_time=datetime.time(9, 0),
+        )
+        mark_absences_for_range(datetime.date(2025, 3, 3), datetime.date(2025, 3, 3))
+        AttendanceRecord.objects.create(
+            user=self.employee.user,
+            date=datetime.date(2025, 3, 4),
+            check_in_time=datetime.time(9, 0),
+            check_out_time=datetime.time(17, 0),
+            status="present",
+            attendance_type="physical",
+        )
+
+    def test_updates_only_imported_columns(self):
+        upload = BytesIO(
+            b"user,date,check_in_time,check_out_time\n"
+            b"alice,2025-03-03,09:00,18:00\n"
+            b"alice,2025-03-04,10:15,\n"
+            b"alice,2025-03-05,09:10,\n"
+            b"alice,2999-01-01,09:00,\n"
+        )
+
+        report = import_attendance(upload, "csv")
+
+        self.assertEqual((report["created"], report["updated"]), (1, 2))
+        self.assertEqual([error["row"] for error in report["errors"]], [4])
+        record = AttendanceRecord.objects.get(
+            user=self.employee.user, date=datetime.date(2025, 3, 4)
+        )
+        self.assertEqual(record.status, "late")
+        self.assertEqual(record.check_out_time, datetime.time(17, 0))
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.total_absent_days, 0)
+        self.assertAlmostEqual(self.employee.total_lateness_hours, 1.0)
+        # The 3rd was counted as an absence, the imported 5th right away
+        self.assertEqual(self.employee.number_of_non_holiday_days_since_join, 2)
+        summary = MonthlyAttendanceSummary.objects.get(
+            user=self.employee.user, year=2025, month=3
+        )
+        self.assertEqual((summary.absent_days, summary.late_days), (0, 1))
+
+        result = mark_absences_for_range(
+            datetime.date(2025, 3, 3), datetime.date(2025, 3, 5)
+        )
+
+        self.assertEqual((result["attended"], result["already_counted"]), (1, 2))
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.number_of_non_holiday_days_since_join, 3)
+
+
+class RecalculateLatenessTests(TestCase):
+    def test_keeps_statuses_and_adjusts_lateness_totals(self):
+        employee = create_employee(
+            "alice",
+            datetime.date(2025, 3, 1),
+            expected_attend_time=datetime.time(9, 0),
+        )
+        for day, status in ((3, "late"), (4, "present")):
+            AttendanceRecord.objects.create(
+                user=employee.user,
+                date=datetime.date(2025, 3, day),
+                check_in_time=datetime.time(10, 15),
+                status=status,  # HR excused the 4th
+                attendance_type="physical",
+            )
+        AttendanceRecord.objects.update(lateness_hours=0)
+        Employee.objects.filter(pk=employee.pk).update(
+            expected_attend_time=datetime.time(8, 0)
+        )
+
+        updated = recalculate_lateness(AttendanceRecord.objects.all())
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(
+            list(
+                AttendanceRecord.objects.order_by("date").values_list(
+                    "status", "lateness_hours"
+                )
+            ),
+            [("late", 2.0), ("present", 2.0)],
+        )
+        employee.refresh_from_db()
+        # Only the late day counts towards the lateness totals
+        self.assertAlmostEqual(employee.total_lateness_hours, 2.0)
+        summary = MonthlyAttendanceSummary.objects.get(
+            user=employee.user, year=2025, month=3
+        )
+        self.assertAlmostEqual(summary.lateness_hours, 2.0)
+
+
+class PayrollTests(TestCase):
+    def setUp(self):
+        self.employee = create_employee(
+            "alice",
+            datetime.date(2025, 3, 1),
+            basic_salary=9000,
+            absence_penalty=100,
+        )
+        mark_absences_for_range(datetime.date(2025, 3, 3), datetime.date(2025, 3, 7))
+
+    def test_payroll_matches_monthly_summary(self):
+        result = run_payroll(2025, 3)
+
+        self.assertEqual(result["employees"], 1)
+        record = SalaryRecord.objects.get(user=self.employee.user, year=2025, month=3)
+        summary = MonthlyAttendanceSummary.objects.get(
+            user=self.employee.user, year=2025, month=3
+        )
+        self.assertEqual(record.absent_days, summary.absent_days)
+        self.assertEqual(record.final_salary, 8500)
+
+    def test_dirty_salaries_are_recalculated_by_a_job(self):
+        run_payroll(2025, 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_absences_for_range(
+                datetime.date(2025, 3, 10), datetime.date(2025, 3, 11)
+            )
+        record = SalaryRecord.objects.get(user=self.employee.user, year=2025, month=3)
+        self.assertTrue(record.needs_recalculation)
+
+        job = run_job(claim_job("test"))
+
+        self.assertEqual((job.status, job.result), (Job.SUCCEEDED, {"recalculated": 1}))
+        record.refresh_from_db()
+        self.assertFalse(record.needs_recalculation)
+        incremental = (record.absent_days, record.final_salary)
+        self.assertEqual(incremental, (7, 8300))
+        run_payroll(2025, 3)
+        record.refresh_from_db()
+        self.assertEqual((record.absent_days, record.final_salary), incremental)
+
+
+def create_hr(username):
+    return HR.objects.create(
+        user=User.objects.create_user(username=username, password="x")
+    )
+
+
+class CompanyStatCounterTests(TestCase):
+    def setUp(self):
+        join_date = datetime.date(2025, 3, 1)
+        self.hr = create_hr("hr")
+        region = Region.objects.create(name="Giza", distance_to_work=12)
+        self.alice = create_employee(
+            "alice",
+            join_date,
+            region=region,
+            interviewer=self.hr,
+            interviewer_rating=4,
+            basic_salary=9000,
+        )
+        self.bob = create_employee(
+            "bob", join_date, interviewer=self.hr, interviewer_rating=2
+        )
+        carol = create_employee("carol", join_date, basic_salary=7000)
+        AttendanceRecord.objects.create(
+            user=self.alice.user,
+            date=datetime.date(2025, 3, 3),
+            status="present",
+            attendance_type="physical",
+        )
+
+        # Saves, a bulk absence run, an F() counter update and a rejection
+        self.bob.basic_salary = 8000
+        self.bob.total_task_ratings = 9
+        self.bob.number_of_accepted_tasks = 2
+        self.bob.save()
+        mark_absences_for_range(datetime.date(2025, 3, 2), datetime.date(2025, 3, 5))
+        Employee.objects.filter(pk=self.alice.pk).update(
+            total_lateness_hours=F("total_lateness_hours") + 1.5
+        )
+        apply_employee_counter_deltas({self.alice.pk: {"total_lateness_hours": 1.5}})
+        carol.interview_state = "rejected"
+        carol.save(update_fields=["interview_state"])
+
+    def counter_values(self):
+        return {
+            key: {field: getattr(counter, field) for field in COUNTER_FIELDS}
+            for key, counter in current_counters().items()
+            if counter.employee_count
+        }
+
+    def assertCountersEqual(self, first, second):
+        self.assertEqual(set(first), set(second))
+        for key, values in first.items():
+            for field, value in values.items():
+                self.assertAlmostEqual(value, second[key][field], msg=(key, field))
+
+    def test_deltas_match_rebuild(self):
+        incremental = self.counter_values()
+        self.assertEqual(incremental[("company", 0)]["employee_count"], 2)
+        self.assertEqual(incremental[("hr", self.hr.pk)]["total_absent_days"], 7)
+        # Writers only appended deltas
+        self.assertFalse(CompanyStatCounter.objects.exists())
+
+        fold_stat_deltas()
+        self.assertFalse(CompanyStatCounterDelta.objects.exists())
+        self.assertCountersEqual(self.counter_values(), incremental)
+
+        rebuild_company_stats()
+        self.assertCountersEqual(self.counter_values(), incremental)
+
+
+class HRStatsTests(TestCase):
+    def test_incremental_stats_match_pandas_engine(self):
+        hr = create_hr("hr")
+        join_date = datetime.date(2025, 1, 1)
+        employees = [
+            create_employee(
+                f"employee{i}",
+                join_date,
+                interviewer=hr,
+                interviewer_rating=rating,
+                basic_salary=salary,
+            )
+            for i, (rating, salary) in enumerate([(2, 6000), (3, None), (5, 9000)])
+        ]
+        for employee, (tasks, ratings, days, late, absent, overtime) in zip(
+            employees,
+            [(2, 7, 20, 1.5, 2, 3), (4, 18, 30, 0.25, 5, 0), (1, 5, 10, 4, 0, 6)],
+        ):
+            employee.number_of_accepted_tasks = tasks
+            employee.total_task_ratings = ratings
+            employee.total_time_remaining_before_deadline = ratings * 2
+            employee.number_of_non_holiday_days_since_join = days
+            employee.total_lateness_hours = late
+            employee.total_absent_days = absent
+            employee.total_overtime_hours = overtime
+            employee.save()
+        Employee.objects.filter(pk=employees[0].pk).update(
+            total_absent_days=F("total_absent_days") + 1
+        )
+        apply_employee_counter_deltas({employees[0].pk: {"total_absent_days": 1}})
+        employees[1].interviewer_rating = 4
+        employees[1].save(update_fields=["interviewer_rating"])
+
+        # Employee writes leave the HR row alone
+        hr.refresh_from_db()
+        self.assertIsNone(hr.accepted_employees_avg_task_rating)
+
+        (live,) = attach_hr_stats([HR.objects.get(pk=hr.pk)])
+        update_hr_stats()
+        hr.refresh_from_db()
+        for field in HR_STAT_FIELDS[:-1]:
+            expected = getattr(hr, field)
+            self.assertIsNotNone(expected, field)
+            self.assertAlmostEqual(getattr(live, field), expected, places=3, msg=field)
+
+
+class RequeueStaleJobsTests(TestCase):
+    def test_only_jobs_without_recent_heartbeat_are_requeued(self):
+        now = timezone.now()
+        started = now - DEFAULT_STALE_AFTER * 10
+        orphaned = Job.objects.create(
+            kind="hr_stats",
+            status=Job.RUNNING,
+            worker="dead:1",
+            started_at=started,
+            heartbeat_at=now - DEFAULT_STALE_AFTER * 2,
+        )
+        alive = Job.objects.create(
+            kind="hr_stats",
+            status=Job.RUNNING,
+            worker="other-host:1",
+            started_at=started,
+            heartbeat_at=now,
+        )
+
+        poison = Job.objects.create(
+            kind="hr_stats",
+            status=Job.RUNNING,
+            worker="dead:2",
+            attempts=MAX_ATTEMPTS,
+            started_at=started,
+            heartbeat_at=now - DEFAULT_STALE_AFTER * 2,
+        )
+
+        self.assertEqual(requeue_stale_jobs(), (1, 1))
+        orphaned.refresh_from_db()
+        alive.refresh_from_db()
+        poison.refresh_from_db()
+        self.assertEqual((orphaned.status, orphaned.worker), (Job.QUEUED, ""))
+        self.assertEqual(alive.status, Job.RUNNING)
+        self.assertEqual(poison.status, Job.FAILED)
+        self.assertTrue(poison.error)
+
+
+class EstimateCountTests(TestCase):
+    def estimate(self, explain_output):
+        queryset = AttendanceRecord.objects.all()
+        with mock.patch(
+            "api.utils.queryset_utils.connections"
+        ) as connections, mock.patch.object(
+            type(queryset), "explain", return_value=explain_output
+        ):
+            connections.__getitem__.return_value.vendor = "postgresql"
+            return estimate_count(queryset)
+
+    def test_reads_plan_rows_of_single_plan_object(self):
+        # What Django returns with psycopg2
+        self.assertEqual(self.estimate('{"Plan": {"Plan Rows": 42}}'), 42)
+
+    def test_reads_plan_rows_of_plan_list(self):
+        self.assertEqual(self.estimate('[{"Plan": {"Plan Rows": 7}}]'), 7)
+
+
+class IterValuesByPkTests(TestCase):
+    def test_yields_every_row_across_chunks(self):
+        employee = create_employee("alice", datetime.date(2025, 3, 1))
+        for day in range(1, 6):
+            AttendanceRecord.objects.create(
+                user=employee.user,
+                date=datetime.date(2025, 3, day),
+                status="present",
+                attendance_type="physical",
+            )
+        records = AttendanceRecord.objects.exclude(date=datetime.date(2025, 3, 3))
+
+        rows = list(iter_values_by_pk(records.order_by("-date"), ["date"], 2))
+
+        self.assertEqual(
+            [day for (day,) in rows],
+            list(records.order_by("pk").values_list("date", flat=True)),
+        )
+        self.assertEqual(len(rows), 4)
+
+
+class PayslipTests(TestCase):
+    def test_names_outside_winansi_fall_back_to_username(self):
+        row = {
+            "id": 1,
+            "user_id": 7,
+            "user__username": "ahmed@example.com",
+            "user__first_name": "\u0623\u062d\u0645\u062f",
+            "user__last_name": "Ali",
+            "user__employee__position__name": "\u0645\u0647\u0646\u062f\u0633",
+            "year": 2025,
+            "month": 3,
+            "base_salary": 9000,
+            "final_salary": 9000,
+            **dict.fromkeys(SALARY_COMPONENT_FIELDS, 0),
+            "generated_at": None,
+        }
+
+        pdf = render_payslip(row)
 
-# Create your tests here.
+        self.assertNotIn(b"??", pdf)
+        self.assertEqual(pdf.count(b"(ahmed@example.com)"), 2)
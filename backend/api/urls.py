@@ -49,6 +49,7 @@ from rest_framework_simplejwt.views import (
 
 from .views_overtime_requests import OvertimeRequestViewSet
 from .views_casual_leave import CasualLeaveViewSet
+from .views_jobs import JobViewSet
 
 router = DefaultRouter()
 
@@ -153,6 +154,7 @@ router.register(r"tasks", TaskViewSet, basename="tasks")
 
 # Both
 router.register(r"basic-info", BasicInfoViewSet, basename="basic-info")
+router.register(r"jobs", JobViewSet, basename="jobs")
 
 
 # Attendance & Salary
@@ -0,0 +1,231 @@
+import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connections, transaction
+from django.db.models import F
+
+from .attendance_utils import insert_attendance_records
+from .company_stats import apply_employee_counter_deltas
+from .monthly_summary import add_summary_delta, apply_summary_deltas
+from .work_calendar import get_work_calendars
+
+
+def mark_absences_for_range(start, end, employee_ids=None):
+    """
+    Set-based, idempotent absence marking for every date in [start, end].
+
+    For every accepted employee and every date after their join date:
+      - attended            -> number_of_non_holiday_days_since_join += 1
+      - absent on a holiday -> nothing
+      - absent otherwise    -> absent AttendanceRecord is created and both
+                               total_absent_days and
+                               number_of_non_holiday_days_since_join += 1
+
+    A day is only ever counted once: counted records carry
+    stats_counted=True, so re-running over the same range is a no-op, also
+    when two runs overlap.
+
+    Runs one employee query, one attendance query, the calendar queries (only
+    for uncached calendars), bulk INSERTs and batched counter / monthly
+    summary UPDATEs, regardless of head count or range length.
+    Returns a summary dict including per-phase timings in seconds.
+    """
+    from ..models import AttendanceRecord, Employee
+
+    timings = {}
+    started = time.perf_counter()
+
+    # Phase 1: eligible employees
+    employees = Employee.objects.filter(interview_state="accepted", join_date__lt=end)
+    if employee_ids is not None:
+        employees = employees.filter(pk__in=employee_ids)
+    employees = list(
+        employees.select_related("user").only(
+            "id", "user_id", "join_date", "schedule_version", "user__username"
+        )
+    )
+    calendars = get_work_calendars(employees)
+    timings["load"] = time.perf_counter() - started
+
+    # Overlapping runs (the nightly cron and a manual backfill) may cover the
+    # same days, so everything from reading the existing records to bumping
+    # the counters happens in one transaction: existing records are locked
+    # while they are claimed, absences are inserted with ON CONFLICT DO
+    # NOTHING, and counters only grow for the days this run actually claimed.
+    with transaction.atomic():
+        phase_started = time.perf_counter()
+        records = (
+            AttendanceRecord.objects.select_for_update()
+            .filter(
+                user_id__in=[employee.user_id for employee in employees],
+                date__range=(start, end),
+            )
+            .order_by("user_id", "date")
+        )
+        existing = {
+            (user_id, date): (record_id, stats_counted)
+            for record_id, user_id, date, stats_counted in records.values_list(
+                "id", "user_id", "date", "stats_counted"
+            )
+        }
+        timings["load"] += time.perf_counter() - phase_started
+
+        # Phase 2: classify every (employee, date) pair
+        phase_started = time.perf_counter()
+        days = [
+            start + datetime.timedelta(days=offset)
+            for offset in range((end - start).days + 1)
+        ]
+        summary = {
+            "eligible": 0,
+            "already_counted": 0,
+            "attended": 0,
+            "holiday": 0,
+            "absent": 0,
+        }
+        absent_records = []
+        counted_record_ids = []
+        employees_by_user = {employee.user_id: employee for employee in employees}
+        for employee in employees:
+            calendar = calendars[employee.pk]
+            for day in days:
+                if employee.join_date >= day:
+                    continue
+                summary["eligible"] += 1
+                record = existing.get((employee.user_id, day))
+                if record is not None:
+                    record_id, stats_counted = record
+                    if stats_counted:
+                        summary["already_counted"] += 1
+                    else:
+                        counted_record_ids.append(record_id)
+                    continue
+                if calendar.is_holiday(day):
+                    summary["holiday"] += 1
+                    continue
+                absent_records.append(
+                    AttendanceRecord(
+                        user_id=employee.user_id,
+                        date=day,
+                        check_in_time=None,
+                        status="absent",
+                        attendance_type=(
+                            "online" if calendar.is_online_day(day) else "physical"
+                        ),
+                        mac_address=None,
+                        stats_counted=True,
+                    )
+                )
+        timings["resolve"] = time.perf_counter() - phase_started
+
+        # Phase 3: write absences, claim attended records and bump counters
+        # and monthly summaries for what was claimed
+        phase_started = time.perf_counter()
+        increments = {}  # employee id -> [non_holiday_days, absent_days]
+        for offset in range(0, len(counted_record_ids), 1000):
+            batch = AttendanceRecord.objects.filter(
+                pk__in=counted_record_ids[offset : offset + 1000],
+                stats_counted=False,
+            )
+            claimed_user_ids = list(batch.values_list("user_id", flat=True))
+            batch.update(stats_counted=True)
+            for user_id in claimed_user_ids:
+                summary["attended"] += 1
+                increments.setdefault(employees_by_user[user_id].pk, [0, 0])[0] += 1
+
+        absent_usernames = []
+        summary_deltas = {}
+        for record in insert_attendance_records(absent_records):
+            employee = employees_by_user[record.user_id]
+            summary["absent"] += 1
+            absent_usernames.append(f"{employee.user.username} ({record.date})")
+            counts = increments.setdefault(employee.pk, [0, 0])
+            counts[0] += 1
+            counts[1] += 1
+            add_summary_delta(summary_deltas, record.user_id, record.date, [1, 0, 0, 0])
+        # Absences a concurrent run inserted first were counted by that run
+        summary["already_counted"] += len(absent_records) - summary["absent"]
+
+        counters = []
+        for employee_id, (non_holiday_days, absent_days) in increments.items():
+            employee = Employee(pk=employee_id)
+            employee.number_of_non_holiday_days_since_join = (
+                F("number_of_non_holiday_days_since_join") + non_holiday_days
+            )
+            employee.total_absent_days = F("total_absent_days") + absent_days
+            counters.append(employee)
+        Employee.objects.bulk_update(
+            counters,
+            ["number_of_non_holiday_days_since_join", "total_absent_days"],
+            batch_size=1000,
+        )
+        apply_employee_counter_deltas(
+            {
+                employee_id: {
+                    "number_of_non_holiday_days_since_join": non_holiday_days,
+                    "total_absent_days": absent_days,
+                }
+                for employee_id, (non_holiday_days, absent_days) in increments.items()
+            }
+        )
+        apply_summary_deltas(summary_deltas)
+    timings["write"] = time.perf_counter() - phase_started
+    timings["total"] = time.perf_counter() - started
+
+    return {
+        "start": start,
+        "end": end,
+        **summary,
+        "absent_usernames": absent_usernames,
+        "timings": timings,
+    }
+
+
+def mark_absences_for_date(day, employee_ids=None):
+    """Mark absences for a single date. See mark_absences_for_range."""
+    return mark_absences_for_range(day, day, employee_ids)
+
+
+def _init_backfill_worker():
+    import django
+
+    django.setup()
+
+
+def _backfill_chunk(args):
+    start, end, employee_ids = args
+    try:
+        return mark_absences_for_range(start, end, employee_ids)
+    finally:
+        connections.close_all()
+
+
+def backfill_absences(start, end, workers=4, chunk_size=500):
+    """
+    Run mark_absences_for_range over [start, end] in employee chunks spread
+    across a process pool. Yields one result dict per finished chunk.
+    """
+    from ..models import Employee
+
+    employee_ids = list(
+        Employee.objects.filter(interview_state="accepted", join_date__lt=end)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    chunks = [
+        (start, end, employee_ids[offset : offset + chunk_size])
+        for offset in range(0, len(employee_ids), chunk_size)
+    ]
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield mark_absences_for_range(*chunk)
+        return
+
+    # Children must open their own DB connections instead of sharing ours.
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_backfill_worker
+    ) as executor:
+        yield from executor.map(_backfill_chunk, chunks)
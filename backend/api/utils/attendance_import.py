@@ -0,0 +1,356 @@
+import codecs
+import csv
+import json
+from datetime import date, time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .attendance_utils import insert_attendance_records
+from .company_stats import apply_employee_counter_deltas
+from .lateness_utils import apply_lateness
+from .monthly_summary import (
+    add_summary_delta,
+    apply_summary_deltas,
+    record_contribution,
+)
+
+# Columns a row may set. On an existing (user, date) record only those present
+# in the row are overwritten; status and lateness are always recomputed.
+IMPORTED_FIELDS = [
+    "check_in_time",
+    "check_out_time",
+    "attendance_type",
+    "mac_address",
+    "check_in_latitude",
+    "check_in_longitude",
+    "check_out_latitude",
+    "check_out_longitude",
+]
+UPSERT_FIELDS = [*IMPORTED_FIELDS, "status", "lateness_hours"]
+
+MAX_REPORTED_ERRORS = 1000
+
+
+def iter_rows(upload, file_format):
+    """
+    Lazily yield (row_number, dict) pairs from an uploaded CSV or NDJSON file
+    without reading it into memory.
+    """
+    text = codecs.iterdecode(upload, "utf-8-sig")
+    if file_format == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), 1):
+            yield row_number, row
+    else:
+        for row_number, line in enumerate(text, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row_number, row if isinstance(row, dict) else None
+
+
+def _parse_time(value):
+    if value in (None, ""):
+        return None
+    try:
+        return time.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"invalid time '{value}'")
+
+
+def _parse_float(value, name):
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid {name} '{value}'")
+
+
+def _parse_row(row, today):
+    """
+    Return cleaned values of a raw row, raising ValueError on bad input.
+    Optional columns that are missing or empty are left out of the result.
+    """
+    if row is None:
+        raise ValueError("row is not a JSON object")
+    user = str(row.get("user") or "").strip()
+    if not user:
+        raise ValueError("user is required")
+    try:
+        date_value = date.fromisoformat(str(row.get("date") or ""))
+    except ValueError:
+        raise ValueError(f"invalid date '{row.get('date')}', expected YYYY-MM-DD")
+    if date_value > today:
+        raise ValueError(f"date '{date_value}' is in the future")
+    check_in_time = _parse_time(row.get("check_in_time"))
+    if check_in_time is None:
+        raise ValueError("check_in_time is required")
+    values = {"user": user, "date": date_value, "check_in_time": check_in_time}
+
+    attendance_type = row.get("attendance_type")
+    if attendance_type:
+        if attendance_type not in ("physical", "online"):
+            raise ValueError(f"invalid attendance_type '{attendance_type}'")
+        values["attendance_type"] = attendance_type
+    if row.get("mac_address"):
+        values["mac_address"] = row["mac_address"]
+    check_out_time = _parse_time(row.get("check_out_time"))
+    if check_out_time is not None:
+        values["check_out_time"] = check_out_time
+    for name in (
+        "check_in_latitude",
+        "check_in_longitude",
+        "check_out_latitude",
+        "check_out_longitude",
+    ):
+        value = _parse_float(row.get(name), name)
+        if value is not None:
+            values[name] = value
+    return values
+
+
+def _resolve_users(keys):
+    """
+    Map user identifiers (id, username or email, like the attendance filter)
+    to users with their employee profile, in one query.
+    """
+    User = get_user_model()
+    ids = [int(key) for key in keys if key.isdigit()]
+    names = [key for key in keys if not key.isdigit()]
+    users = User.objects.filter(
+        Q(pk__in=ids) | Q(username__in=names) | Q(email__in=names),
+        employee__isnull=False,
+    ).select_related("employee")
+
+    resolved = {}
+    for user in users:
+        resolved[str(user.pk)] = user
+        resolved.setdefault(user.username, user)
+        if user.email:
+            resolved.setdefault(user.email, user)
+    return resolved
+
+
+def _import_chunk(chunk, report, today):
+    from ..models import AttendanceRecord, Employee
+
+    users = _resolve_users({values["user"] for _, values in chunk})
+
+    # Latest row wins when the same (user, date) appears twice in a chunk
+    rows = {}
+    for row_number, values in chunk:
+        user = users.get(values["user"])
+        if user is None:
+            report.add_error(row_number, f"employee '{values['user']}' not found")
+            continue
+        if user.employee.expected_attend_time is None:
+            report.add_error(row_number, "employee work schedule is not configured")
+            continue
+        key = (user.pk, values["date"])
+        if key in rows:
+            report.add_error(rows[key][0], f"superseded by row {row_number}")
+        rows[key] = (row_number, user, values)
+
+    if not rows:
+        return
+
+    expected_times = {
+        user.pk: user.employee.expected_attend_time for _, user, _ in rows.values()
+    }
+    deltas = {}  # employee id -> [lateness_hours, absent_days, non_holiday_days]
+    summary_deltas = {}
+
+    def add_contribution(user, record, sign=1):
+        delta = deltas.setdefault(user.employee.pk, [0.0, 0, 0])
+        if record.status == "late":
+            delta[0] += sign * (record.lateness_hours or 0)
+        if record.status == "absent" and record.stats_counted:
+            delta[1] += sign
+        add_summary_delta(
+            summary_deltas,
+            user.pk,
+            record.date,
+            record_contribution(record.status, record.lateness_hours),
+            sign=sign,
+        )
+
+    def score(records):
+        # Lateness for the whole batch in one vectorized pass
+        apply_lateness(records, expected_times)
+        for record in records:
+            record.status = "late" if record.lateness_hours > 0 else "present"
+
+    with transaction.atomic():
+        # Lock the records these rows overwrite so a concurrent check-in or
+        # import cannot change them between reading and writing the deltas
+        existing = _lock_existing(rows)
+
+        new_records = [
+            AttendanceRecord(
+                user_id=user.pk,
+                attendance_type="physical",
+                **{
+                    field: value
+                    for field, value in values.items()
+                    if field == "date" or field in IMPORTED_FIELDS
+                },
+            )
+            for key, (_, user, values) in rows.items()
+            if key not in existing
+        ]
+        # Past days are counted now, like mark_absences_for_range counts an
+        # attended day; today's are left to the nightly mark_absent run
+        for record in new_records:
+            join_date = rows[(record.user_id, record.date)][1].employee.join_date
+            record.stats_counted = record.date < today and (
+                join_date is not None and join_date < record.date
+            )
+        score(new_records)
+        created = insert_attendance_records(new_records)
+        # Rows another writer inserted since the lock are updated instead
+        raced = {(record.user_id, record.date) for record in new_records} - {
+            (record.user_id, record.date) for record in created
+        }
+        if raced:
+            existing.update(_lock_existing({key: rows[key] for key in raced}))
+
+        updated = []
+        for key, record in existing.items():
+            _, user, values = rows[key]
+            add_contribution(user, record, sign=-1)
+            for field in IMPORTED_FIELDS:
+                if field in values:
+                    setattr(record, field, values[field])
+            updated.append(record)
+        score(updated)
+        AttendanceRecord.objects.bulk_update(updated, UPSERT_FIELDS, batch_size=1000)
+
+        for record in [*created, *updated]:
+            add_contribution(rows[(record.user_id, record.date)][1], record)
+        for record in created:
+            if record.stats_counted:
+                employee = rows[(record.user_id, record.date)][1].employee
+                deltas[employee.pk][2] += 1
+        report.created += len(created)
+        report.updated += len(updated)
+
+        counters = []
+        for employee_id, (lateness_delta, absent_delta, days_delta) in deltas.items():
+            if not lateness_delta and not absent_delta and not days_delta:
+                continue
+            employee = Employee(pk=employee_id)
+            employee.total_lateness_hours = F("total_lateness_hours") + round(
+                lateness_delta, 2
+            )
+            employee.total_absent_days = F("total_absent_days") + absent_delta
+            employee.number_of_non_holiday_days_since_join = (
+                F("number_of_non_holiday_days_since_join") + days_delta
+            )
+            counters.append(employee)
+        if counters:
+            Employee.objects.bulk_update(
+                counters,
+                [
+                    "total_lateness_hours",
+                    "total_absent_days",
+                    "number_of_non_holiday_days_since_join",
+                ],
+            )
+        apply_employee_counter_deltas(
+            {
+                employee_id: {
+                    "total_lateness_hours": round(lateness_delta, 2),
+                    "total_absent_days": absent_delta,
+                    "number_of_non_holiday_days_since_join": days_delta,
+                }
+                for employee_id, (
+                    lateness_delta,
+                    absent_delta,
+                    days_delta,
+                ) in deltas.items()
+            }
+        )
+        apply_summary_deltas(summary_deltas)
+
+
+def _lock_existing(rows):
+    """
+    Lock and return the existing records of exactly these (user_id, date)
+    keys, with one date = ... AND user_id IN (...) term per day.
+    """
+    from ..models import AttendanceRecord
+
+    users_by_day = {}
+    for user_id, day in rows:
+        users_by_day.setdefault(day, set()).add(user_id)
+    keys = Q(pk__in=[])
+    for day, user_ids in users_by_day.items():
+        keys |= Q(date=day, user_id__in=user_ids)
+    records = (
+        AttendanceRecord.objects.select_for_update()
+        .filter(keys)
+        .order_by("user_id", "date")
+    )
+    return {(record.user_id, record.date): record for record in records}
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def import_attendance(upload, file_format, chunk_size=5000):
+    """
+    Stream-import badge-reader / device attendance logs (CSV or NDJSON).
+
+    Rows are validated and written per chunk in one transaction: one user
+    lookup, one locking read of the existing records, a bulk INSERT ... ON
+    CONFLICT DO NOTHING of the new ones, a bulk UPDATE of the existing ones
+    (only the columns present in each row) and aggregate UPDATEs of the
+    employees' lateness/absence counters and monthly summaries. Status and
+    lateness are computed from each employee's expected attend time; dates
+    after today are rejected. New records of past days are counted in the
+    employees' day counters right away, as mark_absent would count them.
+    Returns a report with created/updated counts and per-row errors.
+    """
+    today = timezone.localdate()
+    report = ImportReport()
+    chunk = []
+    for row_number, row in iter_rows(upload, file_format):
+        report.rows += 1
+        try:
+            chunk.append((row_number, _parse_row(row, today)))
+        except ValueError as e:
+            report.add_error(row_number, str(e))
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, report, today)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, report, today)
+    return report.as_dict()
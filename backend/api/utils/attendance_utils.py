@@ -0,0 +1,69 @@
+from django.db import connection
+
+
+def _insert_sql(row_count):
+    from ..models import AttendanceRecord
+
+    meta = AttendanceRecord._meta
+    quote = connection.ops.quote_name
+    fields = [field for field in meta.concrete_fields if not field.primary_key]
+    row = "({})".format(", ".join(["%s"] * len(fields)))
+    sql = (
+        "INSERT INTO {table} ({columns}) VALUES {rows} "
+        "ON CONFLICT ({user}, {date}) DO NOTHING RETURNING {pk}, {user}, {date}"
+    ).format(
+        table=quote(meta.db_table),
+        columns=", ".join(quote(field.column) for field in fields),
+        rows=", ".join([row] * row_count),
+        user=quote(meta.get_field("user").column),
+        date=quote(meta.get_field("date").column),
+        pk=quote(meta.pk.column),
+    )
+    return sql, fields
+
+
+def insert_attendance_record(record):
+    """
+    INSERT an unsaved AttendanceRecord with ON CONFLICT (user, date) DO NOTHING.
+    Bypasses AttendanceRecord.save(), so lateness_hours must already be set.
+    Returns the record with its pk set, or None if the user already has a
+    record for that date. Costs a single round trip.
+    """
+    from ..models import AttendanceRecord
+
+    inserted = insert_attendance_records([record])
+    if not inserted:
+        return None
+    # A freshly inserted record cannot have an overtime request yet.
+    AttendanceRecord.overtime_request.related.set_cached_value(record, None)
+    return record
+
+
+def insert_attendance_records(records, batch_size=1000):
+    """
+    Batched insert_attendance_record: INSERT unsaved AttendanceRecords with
+    ON CONFLICT (user, date) DO NOTHING, one round trip per batch.
+    Returns the records that were actually inserted (with their pk set);
+    records whose (user, date) already existed are left out.
+    """
+    inserted = []
+    for offset in range(0, len(records), batch_size):
+        batch = records[offset : offset + batch_size]
+        sql, fields = _insert_sql(len(batch))
+        params = [
+            field.get_db_prep_save(getattr(record, field.attname), connection)
+            for record in batch
+            for field in fields
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        by_key = {(record.user_id, str(record.date)): record for record in batch}
+        for pk, user_id, date in rows:
+            record = by_key[(user_id, str(date))]
+            record.pk = pk
+            record._state.adding = False
+            record._state.db = connection.alias
+            inserted.append(record)
+    return inserted
@@ -0,0 +1,661 @@
+"""
+Company statistics from running counters.
+
+CompanyStatCounter holds sums over accepted employees (company-wide, per
+position, region and interviewing HR), HRCorrelationMoments the sums behind
+the HR rating correlations and MonthlySalaryTotal per-month salary totals.
+All follow the writes they mirror in the same transaction: Employee and
+SalaryRecord saves and deletes through the signals in api/signals.py, and
+the F()-based bulk counter updates by calling
+apply_employee_counter_deltas() explicitly.
+
+Employee changes touch the same few counter rows from every request (the
+company row above all), so they are not added to those rows directly:
+writers insert CompanyStatCounterDelta / HRCorrelationMomentsDelta rows,
+readers add the pending deltas to the stored rows (current_counters(),
+current_moments()) and fold_stat_deltas() merges them in, on every
+statistics snapshot. A snapshot then only reads O(positions + regions +
+months) rows, plus the deltas since the last one.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .hr_stats import MOMENT_FIELDS, build_hr_moments, hr_moment_contribution
+from .result_cache import EMPLOYEES, HRS, bump_data_version
+
+# Employee counters summed per group, named like the CompanyStatCounter fields
+EMPLOYEE_COUNTER_FIELDS = [
+    "total_task_ratings",
+    "number_of_accepted_tasks",
+    "total_time_remaining_before_deadline",
+    "total_overtime_hours",
+    "total_lateness_hours",
+    "total_absent_days",
+    "number_of_non_holiday_days_since_join",
+]
+
+# Every summed CompanyStatCounter field
+COUNTER_FIELDS = [
+    "employee_count",
+    "salaried_count",
+    "total_basic_salary",
+    "rated_count",
+    "total_interviewer_rating",
+    *EMPLOYEE_COUNTER_FIELDS,
+]
+
+# Employee fields deciding where and how much an employee contributes
+EMPLOYEE_STAT_FIELDS = [
+    "interview_state",
+    "position_id",
+    "region_id",
+    "interviewer_id",
+    "interviewer_rating",
+    "basic_salary",
+    *EMPLOYEE_COUNTER_FIELDS,
+]
+
+# SalaryRecord field -> MonthlySalaryTotal field
+SALARY_TOTAL_FIELDS = {
+    "final_salary": "total_paid",
+    "total_deductions": "total_deductions",
+    "total_overtime_salary": "total_overtime_salary",
+}
+
+SALARY_STAT_FIELDS = ["year", "month", *SALARY_TOTAL_FIELDS]
+
+# Per-position averages stored in PositionStatistics rows
+POSITION_ROLLUP_FIELDS = [
+    "avg_task_rating",
+    "avg_time_remaining",
+    "avg_overtime",
+    "avg_lateness",
+    "avg_absent_days",
+    "avg_salary",
+]
+
+# First element of the employee delta keys addressed to HRCorrelationMoments
+# rows, (HR_MOMENTS, hr_id, metric); the others are (scope, key) counter keys
+HR_MOMENTS = "hr_moments"
+
+# Returned by tracked_values_before_save() when the save cannot change stats
+UNTRACKED = object()
+
+
+def _groups(values):
+    """(scope, key) of the counter rows an accepted employee belongs to."""
+    from ..models import CompanyStatCounter
+
+    groups = [
+        (CompanyStatCounter.COMPANY, 0),
+        (CompanyStatCounter.POSITION, values["position_id"]),
+    ]
+    if values["region_id"] is not None:
+        groups.append((CompanyStatCounter.REGION, values["region_id"]))
+    if values["interviewer_id"] is not None:
+        groups.append((CompanyStatCounter.HR, values["interviewer_id"]))
+    return groups
+
+
+def employee_contribution(values):
+    """
+    What an employee (a dict of EMPLOYEE_STAT_FIELDS) adds to each counter
+    row, {(scope, key): {field: amount}}, and to its HR's correlation
+    moments, {(HR_MOMENTS, hr_id, metric): {field: amount}}. Only accepted
+    employees count.
+    """
+    if values["interview_state"] != "accepted":
+        return {}
+    amounts = {
+        "employee_count": 1,
+        "salaried_count": int(values["basic_salary"] is not None),
+        "total_basic_salary": values["basic_salary"] or 0,
+        "rated_count": int(values["interviewer_rating"] is not None),
+        "total_interviewer_rating": values["interviewer_rating"] or 0,
+        **{field: values[field] or 0 for field in EMPLOYEE_COUNTER_FIELDS},
+    }
+    contribution = {group: amounts for group in _groups(values)}
+    for key, moments in hr_moment_contribution(values).items():
+        contribution[(HR_MOMENTS, *key)] = moments
+    return contribution
+
+
+def salary_contribution(values):
+    """What a salary record (a dict of SALARY_STAT_FIELDS) adds to its month."""
+    return {
+        (values["year"], values["month"]): {
+            "record_count": 1,
+            **{
+                total: values[field] or 0
+                for field, total in SALARY_TOTAL_FIELDS.items()
+            },
+        }
+    }
+
+
+def add_deltas(deltas, contribution, sign=1):
+    """Accumulate a contribution ({key: {field: amount}}) into deltas."""
+    for key, amounts in contribution.items():
+        totals = deltas.setdefault(key, {})
+        for field, amount in amounts.items():
+            totals[field] = totals.get(field, 0) + sign * amount
+    return deltas
+
+
+def _apply_increments(model, key_fields, deltas):
+    """
+    Add deltas ({key tuple: {field: amount}}) to the rows of `model`
+    identified by `key_fields`, creating missing rows first. Increments are
+    F() expressions, so concurrent writers never overwrite each other.
+    """
+    with transaction.atomic():
+        for key, amounts in deltas.items():
+            updates = {
+                field: F(field) + amount for field, amount in amounts.items() if amount
+            }
+            if not updates:
+                continue
+            lookup = dict(zip(key_fields, key))
+            rows = model.objects.filter(**lookup)
+            if not rows.update(**updates):
+                model.objects.bulk_create([model(**lookup)], ignore_conflicts=True)
+                rows.update(**updates)
+
+
+def _append_deltas(model, key_fields, deltas):
+    """
+    Record deltas ({key tuple: {field: amount}}) as new rows of the delta
+    table `model`, one bulk INSERT; nothing existing is locked.
+    """
+    rows = []
+    for key, amounts in deltas.items():
+        amounts = {field: amount for field, amount in amounts.items() if amount}
+        if amounts:
+            rows.append(model(**dict(zip(key_fields, key)), **amounts))
+    model.objects.bulk_create(rows, batch_size=1000)
+
+
+def apply_counter_deltas(deltas):
+    """Record {(scope, key): {field: amount}} CompanyStatCounter deltas."""
+    from ..models import CompanyStatCounterDelta
+
+    _append_deltas(CompanyStatCounterDelta, ["scope", "key"], deltas)
+
+
+def apply_employee_deltas(deltas):
+    """
+    Record employee_contribution() deltas for CompanyStatCounter and
+    HRCorrelationMoments. HR statistics are derived from them on read, so
+    only the cached HR results are invalidated.
+    """
+    from ..models import CompanyStatCounter, HRCorrelationMomentsDelta
+
+    counters, moments = {}, {}
+    for key, amounts in deltas.items():
+        if key[0] == HR_MOMENTS:
+            moments[key[1:]] = amounts
+        else:
+            counters[key] = amounts
+    with transaction.atomic():
+        apply_counter_deltas(counters)
+        _append_deltas(HRCorrelationMomentsDelta, ["hr_id", "metric"], moments)
+    if moments or any(scope == CompanyStatCounter.HR for scope, _ in counters):
+        bump_data_version(HRS)
+
+
+def _delta_tables():
+    """(delta model, target model, key fields, summed fields) of each delta table."""
+    from ..models import (
+        CompanyStatCounter,
+        CompanyStatCounterDelta,
+        HRCorrelationMoments,
+        HRCorrelationMomentsDelta,
+    )
+
+    return [
+        (CompanyStatCounterDelta, CompanyStatCounter, ["scope", "key"], COUNTER_FIELDS),
+        (
+            HRCorrelationMomentsDelta,
+            HRCorrelationMoments,
+            ["hr_id", "metric"],
+            MOMENT_FIELDS,
+        ),
+    ]
+
+
+def _pending_sums(model, key_fields, fields, **filters):
+    """Pending deltas of `model` summed per key: {key tuple: {field: sum}}."""
+    return {
+        tuple(row.pop(field) for field in key_fields): row
+        for row in model.objects.filter(**filters)
+        .order_by()
+        .values(*key_fields)
+        .annotate(**{field: Sum(field) for field in fields})
+    }
+
+
+def current_counters(**filters):
+    """
+    CompanyStatCounter rows matching `filters` with their pending deltas
+    added, as {(scope, key): counter}. Keys that only have deltas so far
+    get unsaved counters.
+    """
+    from ..models import CompanyStatCounter, CompanyStatCounterDelta
+
+    counters = {
+        (counter.scope, counter.key): counter
+        for counter in CompanyStatCounter.objects.filter(**filters)
+    }
+    for key, sums in _pending_sums(
+        CompanyStatCounterDelta, ["scope", "key"], COUNTER_FIELDS, **filters
+    ).items():
+        counter = counters.setdefault(key, CompanyStatCounter(scope=key[0], key=key[1]))
+        for field, amount in sums.items():
+            setattr(counter, field, getattr(counter, field) + (amount or 0))
+    return counters
+
+
+def current_moments(hr_ids):
+    """
+    HRCorrelationMoments of these HRs with their pending deltas added, as
+    {hr_id: {metric: moments}}.
+    """
+    from ..models import HRCorrelationMoments, HRCorrelationMomentsDelta
+
+    moments = {}
+    for row in HRCorrelationMoments.objects.filter(hr_id__in=hr_ids):
+        moments.setdefault(row.hr_id, {})[row.metric] = row
+    for (hr_id, metric), sums in _pending_sums(
+        HRCorrelationMomentsDelta, ["hr_id", "metric"], MOMENT_FIELDS, hr_id__in=hr_ids
+    ).items():
+        row = moments.setdefault(hr_id, {}).setdefault(
+            metric, HRCorrelationMoments(hr_id=hr_id, metric=metric)
+        )
+        for field, amount in sums.items():
+            setattr(row, field, getattr(row, field) + (amount or 0))
+    return moments
+
+
+def fold_stat_deltas(batch_size=5000):
+    """
+    Add pending counter and moment deltas to their rows and delete them,
+    batch_size deltas per transaction. Deltas locked by a concurrent fold
+    are skipped. Returns the number of deltas folded.
+    """
+    folded = 0
+    for delta_model, model, key_fields, fields in _delta_tables():
+        while True:
+            with transaction.atomic():
+                pending = list(
+                    delta_model.objects.select_for_update(skip_locked=True)
+                    .order_by("pk")
+                    .values("pk", *key_fields, *fields)[:batch_size]
+                )
+                sums = {}
+                for row in pending:
+                    add_deltas(
+                        sums,
+                        {
+                            tuple(row[field] for field in key_fields): {
+                                field: row[field] for field in fields
+                            }
+                        },
+                    )
+                _apply_increments(model, key_fields, sums)
+                delta_model.objects.filter(
+                    pk__in=[row["pk"] for row in pending]
+                ).delete()
+            folded += len(pending)
+            if len(pending) < batch_size:
+                break
+    return folded
+
+
+def apply_salary_total_deltas(deltas):
+    """Apply {(year, month): {field: amount}} deltas to MonthlySalaryTotal."""
+    from ..models import MonthlySalaryTotal
+
+    _apply_increments(MonthlySalaryTotal, ["year", "month"], deltas)
+
+
+def apply_employee_counter_deltas(changes):
+    """
+    Mirror Employee counter increments made without save() (F() updates,
+    bulk_update): `changes` maps employee id -> {counter field: delta}.
+    Called after the increments are written, in the same transaction; the
+    values before them are the stored ones minus the deltas. Also
+    invalidates cached results built from employees.
+    """
+    from ..models import Employee
+
+    changes = {pk: amounts for pk, amounts in changes.items() if any(amounts.values())}
+    if not changes:
+        return
+    bump_data_version(EMPLOYEES)
+    deltas = {}
+    for after in Employee.objects.filter(
+        pk__in=changes, interview_state="accepted"
+    ).values("pk", *EMPLOYEE_STAT_FIELDS):
+        before = dict(after)
+        for field, amount in changes[after.pop("pk")].items():
+            before[field] -= amount
+        add_deltas(deltas, employee_contribution(before), sign=-1)
+        add_deltas(deltas, employee_contribution(after))
+    apply_employee_deltas(deltas)
+
+
+def tracked_values(instance, fields):
+    return {field: getattr(instance, field) for field in fields}
+
+
+def _attnames(model, names):
+    return {model._meta.get_field(name).attname for name in names}
+
+
+def tracked_values_before_save(instance, fields, update_fields=None):
+    """
+    The `fields` currently stored for an instance about to be saved: None
+    for a new row, UNTRACKED when update_fields leaves them all untouched.
+    """
+    model = type(instance)
+    if update_fields is not None and not _attnames(model, update_fields) & set(fields):
+        return UNTRACKED
+    if instance._state.adding or instance.pk is None:
+        return None
+    stored = model.objects.filter(pk=instance.pk)
+    if not transaction.get_autocommit():
+        # Concurrent saves of the same row must not subtract the same values
+        stored = stored.select_for_update()
+    return stored.values(*fields).first()
+
+
+def tracked_values_after_save(instance, fields, before, update_fields=None):
+    """The `fields` as stored by the save, or None if they were not touched."""
+    if before is UNTRACKED:
+        return None
+    model = type(instance)
+    if before is None or update_fields is None:
+        values = tracked_values(instance, fields)
+    else:
+        values = dict(before)
+        for field in _attnames(model, update_fields) & set(fields):
+            values[field] = getattr(instance, field)
+    if any(hasattr(value, "resolve_expression") for value in values.values()):
+        # Saved with F() expressions: read back what the database computed
+        values = model.objects.filter(pk=instance.pk).values(*fields).first()
+    return values
+
+
+def refresh_monthly_salary_totals(months):
+    """
+    Recompute MonthlySalaryTotal for some (year, month) pairs from their
+    salary records, for bulk writes that bypass model signals.
+    """
+    from ..models import MonthlySalaryTotal, SalaryRecord
+
+    months = set(months)
+    if not months:
+        return
+    in_months = Q()
+    for year, month in months:
+        in_months |= Q(year=year, month=month)
+    with transaction.atomic():
+        totals = [
+            MonthlySalaryTotal(**row)
+            for row in SalaryRecord.objects.filter(in_months)
+            .order_by()
+            .values("year", "month")
+            .annotate(**_salary_total_aggregates())
+        ]
+        MonthlySalaryTotal.objects.bulk_create(
+            totals,
+            update_conflicts=True,
+            unique_fields=["year", "month"],
+            update_fields=["record_count", *SALARY_TOTAL_FIELDS.values()],
+        )
+        present = {(total.year, total.month) for total in totals}
+        for year, month in months - present:
+            MonthlySalaryTotal.objects.filter(year=year, month=month).delete()
+
+
+def _salary_total_aggregates():
+    return {
+        "record_count": Count("id"),
+        **{total: Sum(field) for field, total in SALARY_TOTAL_FIELDS.items()},
+    }
+
+
+def _counter_aggregates():
+    return {
+        "employee_count": Count("id"),
+        "salaried_count": Count("basic_salary"),
+        "total_basic_salary": Sum("basic_salary"),
+        "rated_count": Count("interviewer_rating"),
+        "total_interviewer_rating": Sum("interviewer_rating"),
+        **{field: Sum(field) for field in EMPLOYEE_COUNTER_FIELDS},
+    }
+
+
+def rebuild_company_stats():
+    """
+    Recompute every counter row, HR correlation moment and monthly salary
+    total from scratch with grouped queries, replacing the stored ones and
+    dropping pending deltas. Returns the row counts.
+    """
+    from ..models import (
+        CompanyStatCounter,
+        CompanyStatCounterDelta,
+        Employee,
+        HRCorrelationMoments,
+        HRCorrelationMomentsDelta,
+        MonthlySalaryTotal,
+        SalaryRecord,
+    )
+
+    def counter(scope, key, row):
+        return CompanyStatCounter(
+            scope=scope, key=key, **{field: value or 0 for field, value in row.items()}
+        )
+
+    with transaction.atomic():
+        # Pending deltas are already reflected in the employees read below
+        CompanyStatCounterDelta.objects.all().delete()
+        HRCorrelationMomentsDelta.objects.all().delete()
+        accepted = Employee.objects.filter(interview_state="accepted").order_by()
+        counters = [
+            counter(
+                CompanyStatCounter.COMPANY, 0, accepted.aggregate(**_counter_aggregates())
+            )
+        ]
+        for scope, field in (
+            (CompanyStatCounter.POSITION, "position_id"),
+            (CompanyStatCounter.REGION, "region_id"),
+            (CompanyStatCounter.HR, "interviewer_id"),
+        ):
+            for row in (
+                accepted.filter(**{f"{field}__isnull": False})
+                .values(field)
+                .annotate(**_counter_aggregates())
+            ):
+                counters.append(counter(scope, row.pop(field), row))
+        moments = build_hr_moments()
+        totals = [
+            MonthlySalaryTotal(**row)
+            for row in SalaryRecord.objects.order_by()
+            .values("year", "month")
+            .annotate(**_salary_total_aggregates())
+        ]
+
+        CompanyStatCounter.objects.all().delete()
+        CompanyStatCounter.objects.bulk_create(counters, batch_size=1000)
+        HRCorrelationMoments.objects.all().delete()
+        HRCorrelationMoments.objects.bulk_create(moments, batch_size=1000)
+        MonthlySalaryTotal.objects.all().delete()
+        MonthlySalaryTotal.objects.bulk_create(totals, batch_size=1000)
+    bump_data_version(HRS)
+    return {"counters": len(counters), "moments": len(moments), "months": len(totals)}
+
+
+def _average(total, count):
+    return round((total or 0) / count, 2) if count else None
+
+
+def _counter_averages(counter):
+    tasks = counter.number_of_accepted_tasks
+    days = counter.number_of_non_holiday_days_since_join
+    return {
+        "avg_task_rating": _average(counter.total_task_ratings, tasks),
+        "avg_time_remaining": _average(
+            counter.total_time_remaining_before_deadline, tasks
+        ),
+        "avg_overtime": _average(counter.total_overtime_hours, days),
+        "avg_lateness": _average(counter.total_lateness_hours, days),
+        "avg_absent_days": _average(counter.total_absent_days, days),
+        "avg_salary": (
+            counter.total_basic_salary / counter.salaried_count
+            if counter.salaried_count
+            else None
+        ),
+    }
+
+
+def calculate_statistics():
+    """
+    Company-wide, per-position, per-region and per-month statistics of
+    accepted employees, read from the running counters.
+    """
+    from ..models import (
+        HR,
+        CompanyStatCounter,
+        MonthlySalaryTotal,
+        Position,
+        Region,
+    )
+
+    counters = {
+        key: counter
+        for key, counter in sorted(
+            current_counters(
+                scope__in=[
+                    CompanyStatCounter.COMPANY,
+                    CompanyStatCounter.POSITION,
+                    CompanyStatCounter.REGION,
+                ]
+            ).items(),
+            key=lambda item: item[0][1],
+        )
+        if counter.employee_count > 0
+    }
+    company = counters.get((CompanyStatCounter.COMPANY, 0)) or CompanyStatCounter()
+
+    def scoped(scope):
+        return [counter for (kind, _), counter in counters.items() if kind == scope]
+
+    positions = scoped(CompanyStatCounter.POSITION)
+    position_names = dict(
+        Position.objects.filter(pk__in=[c.key for c in positions]).values_list(
+            "id", "name"
+        )
+    )
+    position_stats = {
+        position_names[counter.key]: {
+            "count": counter.employee_count,
+            **_counter_averages(counter),
+        }
+        for counter in positions
+        if counter.key in position_names
+    }
+
+    regions = scoped(CompanyStatCounter.REGION)
+    region_rows = {
+        pk: (name, distance)
+        for pk, name, distance in Region.objects.filter(
+            pk__in=[c.key for c in regions]
+        ).values_list("id", "name", "distance_to_work")
+    }
+    region_stats = {}
+    for counter in regions:
+        if counter.key not in region_rows or not counter.number_of_non_holiday_days_since_join:
+            continue
+        name, distance = region_rows[counter.key]
+        region_stats[name] = {
+            "distance_to_work": distance,
+            "employee_count": counter.employee_count,
+            "avg_lateness": _average(
+                counter.total_lateness_hours,
+                counter.number_of_non_holiday_days_since_join,
+            ),
+        }
+
+    monthly_salary_data = list(
+        MonthlySalaryTotal.objects.filter(record_count__gt=0)
+        .order_by("year", "month")
+        .values("year", "month", *SALARY_TOTAL_FIELDS.values())
+    )
+    return {
+        "total_employees": company.employee_count,
+        "total_hrs": HR.objects.count(),
+        "position_stats": position_stats,
+        "region_stats": region_stats,
+        "monthly_salary_totals": monthly_salary_data,
+        **{
+            f"overall_{key}": value
+            for key, value in _counter_averages(company).items()
+        },
+    }
+
+
+def _rollups(model, stats, objects, name_field, snapshot, **columns):
+    ids = dict(objects.filter(name__in=stats).values_list("name", "id"))
+    return model.objects.bulk_create(
+        [
+            model(
+                snapshot=snapshot,
+                snapshot_date=snapshot.snapshot_date,
+                **{f"{name_field}_id": ids.get(name), f"{name_field}_name": name},
+                **{column: values.get(key) for column, key in columns.items()},
+            )
+            for name, values in stats.items()
+        ]
+    )
+
+
+def create_statistics_snapshot(stats=None):
+    """
+    Save a CompanyStatistics snapshot of calculate_statistics() together
+    with its per-position and per-region rollup rows, then fold the pending
+    counter deltas.
+    """
+    from ..models import (
+        CompanyStatistics,
+        Position,
+        PositionStatistics,
+        Region,
+        RegionStatistics,
+    )
+
+    stats = stats if stats is not None else calculate_statistics()
+    with transaction.atomic():
+        snapshot = CompanyStatistics.objects.create(**stats)
+        _rollups(
+            PositionStatistics,
+            stats["position_stats"],
+            Position.objects,
+            "position",
+            snapshot,
+            employee_count="count",
+            **{field: field for field in POSITION_ROLLUP_FIELDS},
+        )
+        _rollups(
+            RegionStatistics,
+            stats["region_stats"],
+            Region.objects,
+            "region",
+            snapshot,
+            employee_count="employee_count",
+            distance_to_work="distance_to_work",
+            avg_lateness="avg_lateness",
+        )
+    fold_stat_deltas()
+    return snapshot
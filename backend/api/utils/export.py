@@ -0,0 +1,255 @@
+import csv
+import datetime
+import json
+import math
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+
+from .payroll import SALARY_COMPONENT_FIELDS
+from .queryset_utils import iter_values_by_pk
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Rows fetched per database round trip and flushed per response chunk
+CHUNK_SIZE = 2000
+
+
+def _cell(value):
+    """Plain-text / JSON representation of an exported value."""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+class _Echo:
+    """csv.writer target that returns each formatted line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+class _Buffer:
+    """Write-only byte sink handing back whatever was written since the last drain."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def iter_csv(headers, rows):
+    writer = csv.writer(_Echo())
+    lines = [writer.writerow(headers)]
+    for row in rows:
+        lines.append(writer.writerow([_cell(value) for value in row]))
+        if len(lines) >= CHUNK_SIZE:
+            yield "".join(lines)
+            lines = []
+    yield "".join(lines)
+
+
+def iter_ndjson(headers, rows):
+    lines = []
+    for row in rows:
+        lines.append(
+            json.dumps(dict(zip(headers, map(_cell, row))), default=str) + "\n"
+        )
+        if len(lines) >= CHUNK_SIZE:
+            yield "".join(lines)
+            lines = []
+    yield "".join(lines)
+
+
+XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if value is None:
+            cells.append("<c/>")
+        elif isinstance(value, bool):
+            cells.append(f'<c t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, int) or (
+            isinstance(value, float) and math.isfinite(value)
+        ):
+            cells.append(f"<c><v>{value}</v></c>")
+        else:
+            cells.append(
+                f'<c t="inlineStr"><is><t>{escape(str(_cell(value)))}</t></is></c>'
+            )
+    return "<row>" + "".join(cells) + "</row>"
+
+
+def iter_xlsx(headers, rows):
+    """
+    Minimal single-sheet XLSX written straight into a streamed zip: the
+    worksheet is compressed row by row and drained after every chunk, so
+    memory stays constant whatever the row count. Strings are inline, so no
+    shared-strings table has to be kept.
+    """
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b"<sheetData>"
+            )
+            sheet.write(_xlsx_row(headers).encode())
+            for i, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row(row).encode())
+                if i % CHUNK_SIZE == 0:
+                    yield buffer.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield buffer.drain()
+
+
+EXPORT_WRITERS = {"csv": iter_csv, "ndjson": iter_ndjson, "xlsx": iter_xlsx}
+
+# (header, lookup) pairs exported by each list endpoint
+ATTENDANCE_EXPORT_COLUMNS = [
+    ("id", "id"),
+    ("user_id", "user_id"),
+    ("username", "user__username"),
+    ("date", "date"),
+    ("status", "status"),
+    ("attendance_type", "attendance_type"),
+    ("check_in_time", "check_in_time"),
+    ("check_out_time", "check_out_time"),
+    ("lateness_hours", "lateness_hours"),
+    ("overtime_hours", "overtime_hours"),
+    ("overtime_approved", "overtime_approved"),
+    ("check_in_latitude", "check_in_latitude"),
+    ("check_in_longitude", "check_in_longitude"),
+    ("check_out_latitude", "check_out_latitude"),
+    ("check_out_longitude", "check_out_longitude"),
+]
+
+SALARY_EXPORT_COLUMNS = [
+    ("id", "id"),
+    ("user_id", "user_id"),
+    ("username", "user__username"),
+    ("position", "user__employee__position__name"),
+    ("year", "year"),
+    ("month", "month"),
+    ("base_salary", "base_salary"),
+    ("final_salary", "final_salary"),
+    *((field, field) for field in SALARY_COMPONENT_FIELDS),
+    ("generated_at", "generated_at"),
+]
+
+CASUAL_LEAVE_EXPORT_COLUMNS = [
+    ("id", "id"),
+    ("employee_id", "employee_id"),
+    ("username", "employee__user__username"),
+    ("position", "employee__position__name"),
+    ("start_date", "start_date"),
+    ("end_date", "end_date"),
+    ("duration", "duration"),
+    ("status", "status"),
+    ("reason", "reason"),
+    ("rejection_reason", "rejection_reason"),
+    ("reviewed_by", "reviewed_by__username"),
+    ("created_at", "created_at"),
+]
+
+EMPLOYEE_EXPORT_COLUMNS = [
+    ("id", "id"),
+    ("user_id", "user_id"),
+    ("username", "user__username"),
+    ("email", "user__email"),
+    ("phone", "phone"),
+    ("position", "position__name"),
+    ("region", "region__name"),
+    ("is_coordinator", "is_coordinator"),
+    ("interview_state", "interview_state"),
+    ("join_date", "join_date"),
+    ("basic_salary", "basic_salary"),
+    ("overtime_hour_salary", "overtime_hour_salary"),
+    ("shorttime_hour_penalty", "shorttime_hour_penalty"),
+    ("absence_penalty", "absence_penalty"),
+    ("total_overtime_hours", "total_overtime_hours"),
+    ("total_lateness_hours", "total_lateness_hours"),
+    ("total_absent_days", "total_absent_days"),
+    ("rank", "rank"),
+    ("position_rank", "position_rank"),
+]
+
+
+def get_export_format(request):
+    """The requested ?file_format= (csv by default), or None if unsupported."""
+    file_format = request.query_params.get("file_format", "csv").lower()
+    if file_format == "jsonl":
+        file_format = "ndjson"
+    return file_format if file_format in EXPORT_FORMATS else None
+
+
+def stream_export(queryset, columns, file_format, filename):
+    """
+    Stream `queryset` as CSV, NDJSON or XLSX, in id order. `columns` is a
+    list of (header, lookup) pairs read with values_list() in keyset chunks,
+    so rows are never all held in memory.
+    """
+    queryset = queryset.select_related(None).prefetch_related(None)
+    headers = [header for header, _ in columns]
+    rows = iter_values_by_pk(
+        queryset, [lookup for _, lookup in columns], CHUNK_SIZE
+    )
+    response = StreamingHttpResponse(
+        EXPORT_WRITERS[file_format](headers, rows),
+        content_type=EXPORT_FORMATS[file_format],
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{file_format}"'
+    )
+    return response
@@ -0,0 +1,129 @@
+import math
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+from .geolocation_utils import calculate_distance_meters
+
+METERS_PER_DEGREE_LATITUDE = 111320.0
+
+
+class Site(NamedTuple):
+    name: str
+    latitude: float
+    longitude: float
+    allowed_radius_meters: int
+
+
+class GeofenceIndex:
+    """
+    Uniform latitude/longitude grid over all attendance sites.
+
+    Every site is registered in each cell its allowed radius touches, so a
+    lookup hashes the coordinate to one cell and only runs the haversine
+    check against the few sites registered there.
+    """
+
+    def __init__(self, sites: List[Site]):
+        self.sites = list(sites)
+        largest_radius = max(
+            (site.allowed_radius_meters for site in self.sites), default=0
+        )
+        # Cells at least as wide as the largest radius keep circles to few cells
+        self.cell_degrees = max(largest_radius / METERS_PER_DEGREE_LATITUDE, 0.001)
+        self.cells: Dict[Tuple[int, int], List[Site]] = {}
+
+        for site in self.sites:
+            lat_pad = site.allowed_radius_meters / METERS_PER_DEGREE_LATITUDE
+            lon_pad = lat_pad / max(math.cos(math.radians(site.latitude)), 0.01)
+            for row in range(
+                self._cell(site.latitude - lat_pad),
+                self._cell(site.latitude + lat_pad) + 1,
+            ):
+                for col in range(
+                    self._cell(site.longitude - lon_pad),
+                    self._cell(site.longitude + lon_pad) + 1,
+                ):
+                    self.cells.setdefault((row, col), []).append(site)
+
+    def _cell(self, degrees: float) -> int:
+        return math.floor(degrees / self.cell_degrees)
+
+    def locate(self, latitude: float, longitude: float) -> Optional[Tuple[Site, float]]:
+        """
+        Return (site, distance_meters) of the nearest site whose allowed radius
+        contains the coordinate, or None if it is outside every site.
+        """
+        best = None
+        for site in self.cells.get((self._cell(latitude), self._cell(longitude)), ()):
+            distance = calculate_distance_meters(
+                latitude, longitude, site.latitude, site.longitude
+            )
+            if distance <= site.allowed_radius_meters and (
+                best is None or distance < best[1]
+            ):
+                best = (site, distance)
+        return best
+
+    def nearest(self, latitude: float, longitude: float) -> Optional[Tuple[Site, float]]:
+        """Return (site, distance_meters) of the nearest site, inside or not."""
+        best = None
+        for site in self.sites:
+            distance = calculate_distance_meters(
+                latitude, longitude, site.latitude, site.longitude
+            )
+            if best is None or distance < best[1]:
+                best = (site, distance)
+        return best
+
+
+def load_sites() -> List[Site]:
+    """Headquarters plus every region that has building coordinates."""
+    from ..models import Headquarters, Region
+
+    headquarters = Headquarters.get_headquarters()
+    sites = [
+        Site(
+            headquarters.name,
+            headquarters.latitude,
+            headquarters.longitude,
+            headquarters.allowed_radius_meters,
+        )
+    ]
+    sites.extend(
+        Site(name, latitude, longitude, allowed_radius_meters)
+        for name, latitude, longitude, allowed_radius_meters in Region.objects.filter(
+            latitude__isnull=False, longitude__isnull=False
+        ).values_list("name", "latitude", "longitude", "allowed_radius_meters")
+    )
+    return sites
+
+
+# Per-process index. Saves/deletes in this process invalidate it right away
+# (see api/signals.py); other worker processes pick changes up after the TTL.
+_index: Optional[GeofenceIndex] = None
+_built_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_geofence_index() -> GeofenceIndex:
+    global _index, _built_at
+
+    ttl = getattr(settings, "GEOFENCE_INDEX_TTL_SECONDS", 60)
+    index = _index
+    if index is not None and time.monotonic() - _built_at < ttl:
+        return index
+
+    with _index_lock:
+        if _index is None or time.monotonic() - _built_at >= ttl:
+            _index = GeofenceIndex(load_sites())
+            _built_at = time.monotonic()
+        return _index
+
+
+def invalidate_geofence_index() -> None:
+    global _index
+    with _index_lock:
+        _index = None
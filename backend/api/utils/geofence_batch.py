@@ -0,0 +1,70 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from .geofence import Site
+
+EARTH_RADIUS_METERS = 6371000
+
+
+def haversine_matrix(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    site_latitudes: np.ndarray,
+    site_longitudes: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorized haversine distance in meters between every point (n,) and
+    every site (m,). Returns an (n, m) array; NaN coordinates give NaN rows.
+    """
+    lat1 = np.radians(np.asarray(latitudes, dtype=float))[:, None]
+    lon1 = np.radians(np.asarray(longitudes, dtype=float))[:, None]
+    lat2 = np.radians(np.asarray(site_latitudes, dtype=float))[None, :]
+    lon2 = np.radians(np.asarray(site_longitudes, dtype=float))[None, :]
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def validate_locations(
+    latitudes: np.ndarray, longitudes: np.ndarray, sites: List[Site]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Validate arrays of coordinates against all sites at once.
+
+    Returns (is_missing, is_inside, nearest_site_index, nearest_distance):
+      - is_missing: coordinate is NaN / None
+      - is_inside: within the allowed radius of at least one site
+      - nearest_site_index / nearest_distance: closest site (-1 / NaN when
+        the coordinate is missing or there are no sites)
+    """
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    is_missing = np.isnan(latitudes) | np.isnan(longitudes)
+    count = len(latitudes)
+
+    if not sites or count == 0:
+        return (
+            is_missing,
+            np.zeros(count, dtype=bool),
+            np.full(count, -1),
+            np.full(count, np.nan),
+        )
+
+    site_latitudes = np.array([site.latitude for site in sites], dtype=float)
+    site_longitudes = np.array([site.longitude for site in sites], dtype=float)
+    radii = np.array([site.allowed_radius_meters for site in sites], dtype=float)
+
+    distances = haversine_matrix(latitudes, longitudes, site_latitudes, site_longitudes)
+    is_inside = (distances <= radii[None, :]).any(axis=1)
+
+    filled = np.where(np.isnan(distances), np.inf, distances)
+    nearest_site_index = filled.argmin(axis=1)
+    nearest_distance = filled[np.arange(count), nearest_site_index]
+    nearest_site_index = np.where(is_missing, -1, nearest_site_index)
+    nearest_distance = np.where(is_missing, np.nan, nearest_distance)
+
+    return is_missing, is_inside, nearest_site_index, nearest_distance
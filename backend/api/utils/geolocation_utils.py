@@ -50,17 +50,20 @@ def validate_attendance_location(
     user, employee_lat: Optional[float], employee_lon: Optional[float]
 ) -> Tuple[bool, str]:
     """
-    Validate if an employee's location allows for attendance check-in/out based on headquarters location.
+    Validate if an employee's location allows for attendance check-in/out.
+    The location is accepted when it falls within the allowed radius of any
+    attendance site (headquarters or a region building), looked up in the
+    in-process geofence index without a DB query.
     Returns (is_valid, message).
     """
-    from ..models import Headquarters
+    from .geofence import get_geofence_index
 
     if not hasattr(user, "employee") or not user.employee:
         return False, "Employee profile not found"
 
-    # Get the headquarters configuration
+    # Get the attendance sites
     try:
-        headquarters = Headquarters.get_headquarters()
+        index = get_geofence_index()
     except Exception as e:
         return False, "Headquarters location not configured. Contact administration."
 
@@ -71,22 +74,25 @@ def validate_attendance_location(
             "Location access is required for attendance. Please enable location services.",
         )
 
-    # Validate location against headquarters
-    is_within, distance = is_within_allowed_location(
-        employee_lat,
-        employee_lon,
-        headquarters.latitude,
-        headquarters.longitude,
-        headquarters.allowed_radius_meters,
-    )
+    try:
+        employee_lat, employee_lon = float(employee_lat), float(employee_lon)
+    except (TypeError, ValueError):
+        return False, "Invalid location coordinates."
 
-    if is_within:
+    # Validate location against all sites
+    match = index.locate(employee_lat, employee_lon)
+    if match is not None:
+        site, distance = match
         return (
             True,
-            f"Location validated. You are {distance:.0f}m from {headquarters.name}.",
-        )
-    else:
-        return (
-            False,
-            f"You are {distance:.0f}m away from {headquarters.name}. You must be within {headquarters.allowed_radius_meters}m to check in.",
+            f"Location validated. You are {distance:.0f}m from {site.name}.",
         )
+
+    nearest = index.nearest(employee_lat, employee_lon)
+    if nearest is None:
+        return False, "Headquarters location not configured. Contact administration."
+    site, distance = nearest
+    return (
+        False,
+        f"You are {distance:.0f}m away from {site.name}. You must be within {site.allowed_radius_meters}m to check in.",
+    )
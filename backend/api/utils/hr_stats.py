@@ -0,0 +1,337 @@
+"""
+Accepted-employee statistics of HRs.
+
+They are kept current incrementally: every Employee write adjusts the HR's
+CompanyStatCounter row (scope "hr") and HRCorrelationMoments rows through
+api/utils/company_stats.py. Nothing is written to the HR rows then;
+attach_hr_stats() derives the HR fields from those sums when HRs are read,
+without touching employees.
+
+update_hr_stats() recomputes them from scratch instead: every accepted
+employee's metrics are read in one query and grouped by interviewer with
+pandas, and the HR rows are written back with a single bulk_update.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+from django.utils import timezone
+
+from .result_cache import HRS, bump_data_version
+
+EMPLOYEE_METRIC_FIELDS = [
+    "interviewer_id",
+    "interviewer_rating",
+    "basic_salary",
+    "total_task_ratings",
+    "number_of_accepted_tasks",
+    "total_time_remaining_before_deadline",
+    "total_lateness_hours",
+    "total_absent_days",
+    "total_overtime_hours",
+    "number_of_non_holiday_days_since_join",
+]
+
+# HR field -> (employee total, denominator) averaged per task or per day
+HR_RATIO_AVERAGES = {
+    "accepted_employees_avg_task_rating": (
+        "total_task_ratings",
+        "number_of_accepted_tasks",
+    ),
+    "accepted_employees_avg_time_remaining": (
+        "total_time_remaining_before_deadline",
+        "number_of_accepted_tasks",
+    ),
+    "accepted_employees_avg_lateness_hrs": (
+        "total_lateness_hours",
+        "number_of_non_holiday_days_since_join",
+    ),
+    "accepted_employees_avg_absence_days": (
+        "total_absent_days",
+        "number_of_non_holiday_days_since_join",
+    ),
+    "accepted_employees_avg_overtime": (
+        "total_overtime_hours",
+        "number_of_non_holiday_days_since_join",
+    ),
+}
+
+# HR field -> employee field averaged directly
+HR_MEAN_AVERAGES = {
+    "accepted_employees_avg_salary": "basic_salary",
+    "accepted_employees_avg_interviewer_rating": "interviewer_rating",
+}
+
+# HR field -> (HRCorrelationMoments metric, employee total, denominator):
+# the interviewer rating is correlated with the per-employee ratio
+HR_CORRELATIONS = {
+    "interviewer_rating_to_task_rating_correlation": (
+        "task_rating",
+        "total_task_ratings",
+        "number_of_accepted_tasks",
+    ),
+    "interviewer_rating_to_time_remaining_correlation": (
+        "time_remaining",
+        "total_time_remaining_before_deadline",
+        "number_of_accepted_tasks",
+    ),
+    "interviewer_rating_to_lateness_hrs_correlation": (
+        "lateness_hrs",
+        "total_lateness_hours",
+        "number_of_non_holiday_days_since_join",
+    ),
+    "interviewer_rating_to_absence_days_correlation": (
+        "absence_days",
+        "total_absent_days",
+        "number_of_non_holiday_days_since_join",
+    ),
+    "interviewer_rating_to_avg_overtime_correlation": (
+        "avg_overtime",
+        "total_overtime_hours",
+        "number_of_non_holiday_days_since_join",
+    ),
+}
+
+MOMENT_FIELDS = ["n", "sum_x", "sum_y", "sum_xy", "sum_xx", "sum_yy"]
+
+HR_STAT_FIELDS = [
+    *HR_RATIO_AVERAGES,
+    *HR_MEAN_AVERAGES,
+    *HR_CORRELATIONS,
+    "last_stats_calculation_time",
+]
+
+
+def accepted_employee_metrics(hr_ids=None):
+    """DataFrame of EMPLOYEE_METRIC_FIELDS for every accepted, interviewed employee."""
+    from ..models import Employee
+
+    employees = Employee.objects.filter(
+        interview_state="accepted", interviewer__isnull=False
+    )
+    if hr_ids is not None:
+        employees = employees.filter(interviewer_id__in=hr_ids)
+    rows = employees.order_by().values_list(*EMPLOYEE_METRIC_FIELDS)
+    return pd.DataFrame.from_records(
+        list(rows), columns=EMPLOYEE_METRIC_FIELDS, coerce_float=True
+    ).astype(float)
+
+
+def _pearson(frame, x, y):
+    """Pearson correlation of columns x and y within each interviewer group."""
+    groups = frame.groupby("interviewer_id")
+    dx = frame[x] - groups[x].transform("mean")
+    dy = frame[y] - groups[y].transform("mean")
+    sums = (
+        pd.DataFrame({"xy": dx * dy, "xx": dx * dx, "yy": dy * dy})
+        .groupby(frame["interviewer_id"])
+        .sum()
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = sums["xy"] / np.sqrt(sums["xx"] * sums["yy"])
+    return r.where(groups.size() >= 2)
+
+
+def compute_hr_stats(metrics):
+    """
+    Per-interviewer statistics from accepted_employee_metrics(): a DataFrame
+    indexed by HR id with an unrounded column per HR_STAT_FIELDS entry (the
+    timestamp excepted), NaN where a value is undefined.
+    """
+    groups = metrics.groupby("interviewer_id")
+    sums = groups.sum(min_count=1)
+    stats = pd.DataFrame(index=sums.index)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for field, (total, denominator) in HR_RATIO_AVERAGES.items():
+            stats[field] = (sums[total].fillna(0) / sums[denominator]).where(
+                sums[denominator] > 0
+            )
+    for field, column in HR_MEAN_AVERAGES.items():
+        stats[field] = groups[column].mean()
+
+    rated = metrics[metrics["interviewer_rating"].notna()]
+    for field, (_, total, denominator) in HR_CORRELATIONS.items():
+        eligible = rated[rated[denominator] > 0]
+        pairs = pd.DataFrame(
+            {
+                "interviewer_id": eligible["interviewer_id"],
+                "x": eligible["interviewer_rating"],
+                "y": eligible[total] / eligible[denominator],
+            }
+        )
+        stats[field] = _pearson(pairs, "x", "y")
+    return stats
+
+
+def _value(value, digits):
+    return None if pd.isna(value) else round(float(value), digits)
+
+
+def update_hr_stats(hrs=None):
+    """
+    Recalculate the accepted-employee statistics of `hrs` (HR instances,
+    default all HRs) and save them with one bulk_update. HRs without
+    accepted employees get their statistics cleared. Returns the number of
+    HRs updated.
+    """
+    from ..models import HR
+
+    if hrs is None:
+        hrs = list(HR.objects.all())
+        metrics = accepted_employee_metrics()
+    else:
+        hrs = list(hrs)
+        metrics = accepted_employee_metrics([hr.pk for hr in hrs])
+    if not hrs:
+        return 0
+    stats = compute_hr_stats(metrics)
+    stats.index = stats.index.astype(int)
+    now = timezone.now()
+    for hr in hrs:
+        row = stats.loc[hr.pk] if hr.pk in stats.index else None
+        for field in HR_STAT_FIELDS[:-1]:
+            digits = 4 if field in HR_CORRELATIONS else 2
+            setattr(hr, field, None if row is None else _value(row[field], digits))
+        hr.last_stats_calculation_time = now
+    HR.objects.bulk_update(hrs, HR_STAT_FIELDS, batch_size=500)
+    bump_data_version(HRS)
+    return len(hrs)
+
+
+def hr_moment_contribution(values):
+    """
+    What an employee (a dict with the interviewer, rating and counter
+    fields) adds to its HR's correlation moments: {(hr_id, metric): sums}.
+    """
+    if (
+        values["interview_state"] != "accepted"
+        or values["interviewer_id"] is None
+        or values["interviewer_rating"] is None
+    ):
+        return {}
+    x = values["interviewer_rating"]
+    contribution = {}
+    for metric, total, denominator in HR_CORRELATIONS.values():
+        if not values[denominator] or values[denominator] <= 0:
+            continue
+        y = (values[total] or 0) / values[denominator]
+        contribution[(values["interviewer_id"], metric)] = {
+            "n": 1,
+            "sum_x": x,
+            "sum_y": y,
+            "sum_xy": x * y,
+            "sum_xx": x * x,
+            "sum_yy": y * y,
+        }
+    return contribution
+
+
+def _ratio(total, count, digits=2):
+    return round((total or 0) / count, digits) if count else None
+
+
+def correlation(moments):
+    """Pearson correlation from an HRCorrelationMoments row, None if undefined."""
+    if moments is None or moments.n < 2:
+        return None
+    n = moments.n
+    covariance = n * moments.sum_xy - moments.sum_x * moments.sum_y
+    variance_x = n * moments.sum_xx - moments.sum_x**2
+    variance_y = n * moments.sum_yy - moments.sum_y**2
+    # Below this the variance is rounding noise left by increments and
+    # decrements, i.e. zero
+    if variance_x <= 1e-9 * n * moments.sum_xx or variance_y <= 1e-9 * n * moments.sum_yy:
+        return None
+    return round(max(-1.0, min(1.0, covariance / math.sqrt(variance_x * variance_y))), 4)
+
+
+def hr_stats_from_counters(counter, moments):
+    """
+    HR statistics fields from the HR's CompanyStatCounter row (or None) and
+    its HRCorrelationMoments rows by metric.
+    """
+    if counter is None or not counter.employee_count:
+        return dict.fromkeys(HR_STAT_FIELDS[:-1])
+    stats = {
+        field: _ratio(getattr(counter, total), getattr(counter, denominator))
+        for field, (total, denominator) in HR_RATIO_AVERAGES.items()
+    }
+    stats["accepted_employees_avg_salary"] = _ratio(
+        counter.total_basic_salary, counter.salaried_count
+    )
+    stats["accepted_employees_avg_interviewer_rating"] = _ratio(
+        counter.total_interviewer_rating, counter.rated_count
+    )
+    for field, (metric, _, _) in HR_CORRELATIONS.items():
+        stats[field] = correlation(moments.get(metric))
+    return stats
+
+
+def attach_hr_stats(hrs):
+    """
+    Set the statistics fields of these HR instances, in memory, from their
+    running counters and moments (pending deltas included): four reads of
+    O(HRs) rows whatever the number of employees. Returns the list of HRs.
+    """
+    from ..models import CompanyStatCounter
+    from .company_stats import current_counters, current_moments
+
+    hrs = list(hrs)
+    hr_ids = {hr.pk for hr in hrs}
+    if not hr_ids:
+        return hrs
+    counters = {
+        key: counter
+        for (_, key), counter in current_counters(
+            scope=CompanyStatCounter.HR, key__in=hr_ids
+        ).items()
+    }
+    moments = current_moments(hr_ids)
+    now = timezone.now()
+    for hr in hrs:
+        for field, value in hr_stats_from_counters(
+            counters.get(hr.pk), moments.get(hr.pk, {})
+        ).items():
+            setattr(hr, field, value)
+        hr.last_stats_calculation_time = now
+        hr._live_stats = True
+    return hrs
+
+
+def build_hr_moments():
+    """HRCorrelationMoments rows recomputed from employees with grouped queries."""
+    from django.db.models import Count, F, FloatField, Sum
+    from django.db.models.functions import Cast
+
+    from ..models import Employee, HRCorrelationMoments
+
+    rows = []
+    for metric, total, denominator in HR_CORRELATIONS.values():
+        eligible = (
+            Employee.objects.filter(
+                interview_state="accepted",
+                interviewer__isnull=False,
+                interviewer_rating__isnull=False,
+                **{f"{denominator}__gt": 0},
+            )
+            .order_by()
+            .annotate(
+                y=Cast(total, FloatField()) / Cast(denominator, FloatField())
+            )
+        )
+        for row in eligible.values("interviewer_id").annotate(
+            n=Count("id"),
+            sum_x=Sum("interviewer_rating"),
+            sum_y=Sum("y"),
+            sum_xy=Sum(F("interviewer_rating") * F("y")),
+            sum_xx=Sum(F("interviewer_rating") * F("interviewer_rating")),
+            sum_yy=Sum(F("y") * F("y")),
+        ):
+            rows.append(
+                HRCorrelationMoments(
+                    hr_id=row.pop("interviewer_id"), metric=metric, **row
+                )
+            )
+    return rows
@@ -0,0 +1,169 @@
+"""
+Database-backed background jobs.
+
+Views enqueue a Job row and answer 202 with its id; `manage.py run_workers`
+processes claim queued jobs with SELECT ... FOR UPDATE SKIP LOCKED and run
+the handler registered for the job's kind. Handlers live in api/jobs.py.
+"""
+
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+# kind -> handler(job, **payload) returning a JSON-serializable result
+JOB_HANDLERS = {}
+
+# Workers refresh the heartbeat of their running job this often...
+HEARTBEAT_INTERVAL = timedelta(seconds=30)
+# ...and running jobs without one for this long were orphaned by a dead worker
+DEFAULT_STALE_AFTER = timedelta(minutes=5)
+# Orphaned jobs that already took down this many workers are failed instead
+MAX_ATTEMPTS = 3
+
+
+def register_job(kind):
+    """Decorator registering a handler for jobs of `kind`."""
+
+    def decorator(handler):
+        JOB_HANDLERS[kind] = handler
+        return handler
+
+    return decorator
+
+
+def enqueue_job(kind, payload=None, user=None):
+    from ..models import Job
+
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def job_accepted_response(request, job, **extra):
+    """202 Accepted pointing the client at the job status resource."""
+    return Response(
+        {
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": request.build_absolute_uri(
+                reverse("jobs-detail", args=[job.id])
+            ),
+            **extra,
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_job(worker):
+    """
+    Mark the oldest queued job as running and return it, or None if the
+    queue is empty. Rows locked by other workers are skipped rather than
+    waited on; the status check in the UPDATE keeps claiming safe on
+    backends without row locks.
+    """
+    from ..models import Job
+
+    while True:
+        with transaction.atomic():
+            job = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(status=Job.QUEUED)
+                .order_by("created_at", "id")
+                .first()
+            )
+            if job is None:
+                return None
+            now = timezone.now()
+            claimed = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+                status=Job.RUNNING,
+                started_at=now,
+                heartbeat_at=now,
+                worker=worker,
+                attempts=F("attempts") + 1,
+            )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_job(job):
+    """Run a claimed job and store its result or error."""
+    from ..models import Job
+
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job kind {job.kind!r}")
+        result = handler(job, **job.payload)
+    except Exception:
+        job.status = Job.FAILED
+        job.error = traceback.format_exc()
+        job.result = None
+    else:
+        job.status = Job.SUCCEEDED
+        job.progress = 100
+        job.result = result
+        job.error = ""
+    job.finished_at = timezone.now()
+    job.save(
+        update_fields=["status", "progress", "result", "error", "finished_at"]
+    )
+    return job
+
+
+def send_heartbeats(worker, stop, interval=HEARTBEAT_INTERVAL):
+    """
+    Refresh the heartbeat of the jobs `worker` is running every `interval`
+    until the `stop` event is set. Meant to run in a thread of the worker
+    process, so long handlers keep their job alive without reporting progress.
+    """
+    from django.db import connection
+
+    from ..models import Job
+
+    try:
+        while not stop.wait(interval.total_seconds()):
+            Job.objects.filter(status=Job.RUNNING, worker=worker).update(
+                heartbeat_at=timezone.now()
+            )
+    finally:
+        connection.close()
+
+
+def requeue_stale_jobs(older_than=DEFAULT_STALE_AFTER, max_attempts=MAX_ATTEMPTS):
+    """
+    Put running jobs whose worker has sent no heartbeat for `older_than`
+    (the worker died) back in the queue. Jobs still running on other hosts
+    keep beating and are left alone. Jobs already started `max_attempts`
+    times are marked failed instead, so a job that kills its worker is not
+    retried forever. Returns (requeued, failed) counts.
+    """
+    from ..models import Job
+
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=now - older_than)
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=Job.FAILED,
+        error=f"Worker died while running the job, {max_attempts} times; giving up.",
+        finished_at=now,
+    )
+    requeued = stale.update(
+        status=Job.QUEUED, worker="", started_at=None, heartbeat_at=None
+    )
+    return requeued, failed
@@ -0,0 +1,180 @@
+import numpy as np
+from django.conf import settings
+
+
+def get_grace_minutes() -> int:
+    """Check-ins up to this many minutes after the expected attend time are on time."""
+    return getattr(settings, "ATTENDANCE_LATENESS_GRACE_MINUTES", 15)
+
+
+def time_to_seconds(value) -> float:
+    """Seconds since midnight of a datetime.time (NaN for None)."""
+    if value is None:
+        return np.nan
+    return (
+        value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6
+    )
+
+
+def lateness_hours_array(check_in_seconds, expected_seconds, grace_minutes=None):
+    """
+    Vectorized lateness: hours (rounded to 2 decimals) between each check-in
+    and the end of its grace period, 0.0 when on time.
+    Inputs are seconds since midnight; NaN inputs give NaN.
+    """
+    if grace_minutes is None:
+        grace_minutes = get_grace_minutes()
+    late_seconds = np.asarray(check_in_seconds, dtype=float) - (
+        np.asarray(expected_seconds, dtype=float) + grace_minutes * 60
+    )
+    hours = np.where(late_seconds > 0, late_seconds / 3600, 0.0)
+    return np.round(np.where(np.isnan(late_seconds), np.nan, hours), 2)
+
+
+def calculate_lateness_hours(check_in_time, expected_attend_time) -> float:
+    """
+    Return the lateness in hours of a single check-in, counted from the end of
+    the grace period. Goes through lateness_hours_array so single and batch
+    computations give identical results.
+    """
+    return float(
+        lateness_hours_array(
+            [time_to_seconds(check_in_time)], [time_to_seconds(expected_attend_time)]
+        )[0]
+    )
+
+
+def apply_lateness(records, expected_times=None):
+    """
+    Compute lateness_hours in place for a list (or queryset) of AttendanceRecord
+    objects. Expected attend times not passed in `expected_times`
+    ({user_id: time}) are loaded for all users in one query. Records without a
+    check-in time or whose employee has no schedule are left unchanged.
+    Returns the list of records.
+    """
+    from ..models import Employee
+
+    records = list(records)
+    expected_times = dict(expected_times or {})
+    missing_user_ids = {
+        record.user_id
+        for record in records
+        if record.check_in_time and record.user_id not in expected_times
+    }
+    if missing_user_ids:
+        expected_times.update(
+            Employee.objects.filter(user_id__in=missing_user_ids).values_list(
+                "user_id", "expected_attend_time"
+            )
+        )
+
+    targets = [
+        record
+        for record in records
+        if record.check_in_time and expected_times.get(record.user_id)
+    ]
+    if not targets:
+        return records
+
+    lateness = lateness_hours_array(
+        [time_to_seconds(record.check_in_time) for record in targets],
+        [time_to_seconds(expected_times[record.user_id]) for record in targets],
+    )
+    for record, hours in zip(targets, lateness.tolist()):
+        record.lateness_hours = hours
+    return records
+
+
+def recalculate_lateness(queryset, batch_size=5000):
+    """
+    Historical recomputation: recompute lateness_hours of every checked-in
+    record in the queryset from the employee's current expected attend time
+    (joined in the same query) and write back only rows that changed.
+    Statuses are left alone, so corrections made by HR survive. Employees'
+    total_lateness_hours and monthly summaries are adjusted by the change in
+    each record's contribution. Works through the queryset in primary key
+    order, batch_size records per query and transaction.
+    Returns the number of records updated.
+    """
+    from django.db import transaction
+    from django.db.models import F
+    from ..models import AttendanceRecord, Employee
+    from .company_stats import apply_employee_counter_deltas
+    from .monthly_summary import (
+        add_summary_delta,
+        apply_summary_deltas,
+        record_contribution,
+    )
+
+    queryset = queryset.filter(
+        check_in_time__isnull=False,
+        user__employee__expected_attend_time__isnull=False,
+    ).exclude(status="absent")
+    updated = 0
+    last_pk = None
+    while True:
+        batch = queryset.order_by("pk")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        rows = list(
+            batch.values_list(
+                "pk",
+                "user_id",
+                "date",
+                "user__employee__pk",
+                "status",
+                "lateness_hours",
+                "check_in_time",
+                "user__employee__expected_attend_time",
+            )[:batch_size]
+        )
+        if not rows:
+            return updated
+        last_pk = rows[-1][0]
+
+        lateness = lateness_hours_array(
+            [time_to_seconds(row[6]) for row in rows],
+            [time_to_seconds(row[7]) for row in rows],
+        ).tolist()
+
+        changed = []
+        deltas = {}
+        summary_deltas = {}
+        for row, new_hours in zip(rows, lateness):
+            pk, user_id, day, employee_id, status, old_hours = row[:6]
+            if old_hours == new_hours:
+                continue
+            changed.append(AttendanceRecord(pk=pk, lateness_hours=new_hours))
+            old = record_contribution(status, old_hours)
+            new = record_contribution(status, new_hours)
+            add_summary_delta(summary_deltas, user_id, day, old, sign=-1)
+            add_summary_delta(summary_deltas, user_id, day, new)
+            # total_lateness_hours sums lateness over late days, like the summary
+            deltas[employee_id] = deltas.get(employee_id, 0.0) + new[2] - old[2]
+
+        deltas = {
+            employee_id: round(delta, 2)
+            for employee_id, delta in deltas.items()
+            if round(delta, 2)
+        }
+        counters = []
+        for employee_id, delta in deltas.items():
+            employee = Employee(pk=employee_id)
+            employee.total_lateness_hours = F("total_lateness_hours") + delta
+            counters.append(employee)
+
+        with transaction.atomic():
+            AttendanceRecord.objects.bulk_update(
+                changed, ["lateness_hours"], batch_size=batch_size
+            )
+            Employee.objects.bulk_update(
+                counters, ["total_lateness_hours"], batch_size=batch_size
+            )
+            apply_employee_counter_deltas(
+                {
+                    employee_id: {"total_lateness_hours": delta}
+                    for employee_id, delta in deltas.items()
+                }
+            )
+            apply_summary_deltas(summary_deltas)
+        updated += len(changed)
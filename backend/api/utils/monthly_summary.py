@@ -0,0 +1,223 @@
+import calendar
+import datetime
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+
+# Counters kept per (user, year, month), in the order used by delta lists
+SUMMARY_FIELDS = ["absent_days", "late_days", "lateness_hours", "overtime_hours"]
+
+
+def record_contribution(
+    status, lateness_hours=0, overtime_hours=0, overtime_approved=False
+):
+    """
+    What a single attendance record adds to its month's summary, as a list in
+    SUMMARY_FIELDS order. Mirrors the payroll definitions: lateness only counts
+    on late days, overtime only once approved.
+    """
+    overtime_hours = overtime_hours or 0
+    return [
+        1 if status == "absent" else 0,
+        1 if status == "late" else 0,
+        (lateness_hours or 0) if status == "late" else 0,
+        overtime_hours if overtime_approved and overtime_hours > 0 else 0,
+    ]
+
+
+def record_summary_values(record):
+    """record_contribution() of an AttendanceRecord instance."""
+    return record_contribution(
+        record.status,
+        record.lateness_hours,
+        record.overtime_hours,
+        record.overtime_approved,
+    )
+
+
+def add_summary_delta(deltas, user_id, day, values, sign=1):
+    """Accumulate `values` (SUMMARY_FIELDS order) into deltas[(user_id, year, month)]."""
+    totals = deltas.setdefault((user_id, day.year, day.month), [0, 0, 0.0, 0.0])
+    for i, value in enumerate(values):
+        totals[i] += sign * value
+    return deltas
+
+
+def _increments(values):
+    """F() increment expressions of the non-zero values of a delta list."""
+    return {
+        field: F(field) + (round(value, 2) if isinstance(value, float) else value)
+        for field, value in zip(SUMMARY_FIELDS, values)
+        if value
+    }
+
+
+def apply_summary_deltas(deltas):
+    """
+    Add accumulated deltas ({(user_id, year, month): [absent_days, late_days,
+    lateness_hours, overtime_hours]}) to the monthly summaries. Missing rows
+    are created first; the increments themselves are F() expressions so
+    concurrent writers never overwrite each other. Salary records of the
+    changed months are flagged for recalculation.
+    """
+    from .payroll import mark_salary_months_dirty
+
+    deltas = {key: values for key, values in deltas.items() if any(values)}
+    if not deltas:
+        return
+    _apply_summary_deltas(deltas)
+    mark_salary_months_dirty(deltas)
+
+
+def _apply_summary_deltas(deltas):
+    from ..models import MonthlyAttendanceSummary
+
+    if len(deltas) == 1:
+        # Hot path (check-in, overtime review): one UPDATE when the row exists
+        (user_id, year, month), values = next(iter(deltas.items()))
+        rows = MonthlyAttendanceSummary.objects.filter(
+            user_id=user_id, year=year, month=month
+        )
+        updates = _increments(values)
+        if not rows.update(**updates):
+            MonthlyAttendanceSummary.objects.bulk_create(
+                [MonthlyAttendanceSummary(user_id=user_id, year=year, month=month)],
+                ignore_conflicts=True,
+            )
+            rows.update(**updates)
+        return
+
+    MonthlyAttendanceSummary.objects.bulk_create(
+        [
+            MonthlyAttendanceSummary(user_id=user_id, year=year, month=month)
+            for user_id, year, month in deltas
+        ],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+    ids = {
+        (user_id, year, month): pk
+        for pk, user_id, year, month in MonthlyAttendanceSummary.objects.filter(
+            user_id__in={user_id for user_id, _, _ in deltas},
+            year__in={year for _, year, _ in deltas},
+            month__in={month for _, _, month in deltas},
+        ).values_list("pk", "user_id", "year", "month")
+    }
+    summaries = []
+    for key, values in deltas.items():
+        summary = MonthlyAttendanceSummary(pk=ids[key])
+        for field in SUMMARY_FIELDS:
+            setattr(summary, field, F(field))
+        for field, expression in _increments(values).items():
+            setattr(summary, field, expression)
+        summaries.append(summary)
+    MonthlyAttendanceSummary.objects.bulk_update(
+        summaries, SUMMARY_FIELDS, batch_size=1000
+    )
+
+
+def month_bounds(year, month):
+    """First and last day of a month."""
+    return (
+        datetime.date(year, month, 1),
+        datetime.date(year, month, calendar.monthrange(year, month)[1]),
+    )
+
+
+def summary_aggregates(prefix=""):
+    """
+    Aggregate expressions computing the summary values of attendance rows
+    reached through `prefix` (e.g. "month_records__" from another model).
+    """
+    return {
+        "absent_days": Count(f"{prefix}pk", filter=Q(**{f"{prefix}status": "absent"})),
+        "late_days": Count(f"{prefix}pk", filter=Q(**{f"{prefix}status": "late"})),
+        "lateness_hours": Coalesce(
+            Sum(f"{prefix}lateness_hours", filter=Q(**{f"{prefix}status": "late"})),
+            0.0,
+        ),
+        "overtime_hours": Coalesce(
+            Sum(
+                f"{prefix}overtime_hours",
+                filter=Q(
+                    **{
+                        f"{prefix}overtime_approved": True,
+                        f"{prefix}overtime_hours__gt": 0,
+                    }
+                ),
+            ),
+            0.0,
+        ),
+    }
+
+
+def aggregate_monthly_summaries(records):
+    """
+    One GROUP BY over an AttendanceRecord queryset: the summary values per
+    (user, year, month) as dicts.
+    """
+    return (
+        records.order_by()
+        .annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        .values("user_id", "year", "month")
+        .annotate(**summary_aggregates())
+    )
+
+
+def rebuild_monthly_summaries(start, end, user_ids=None):
+    """
+    Recompute the summaries of every month touching [start, end] from raw
+    attendance (optionally only for some users), replacing whatever is
+    stored, and flag the salary records of those months for recalculation.
+    Returns the number of summary rows written.
+    """
+    from ..models import AttendanceRecord, MonthlyAttendanceSummary, SalaryRecord
+    from .payroll import mark_salaries_dirty
+
+    start = start.replace(day=1)
+    end = month_bounds(end.year, end.month)[1]
+
+    in_months = (
+        Q(year__gt=start.year) | Q(year=start.year, month__gte=start.month)
+    ) & (Q(year__lt=end.year) | Q(year=end.year, month__lte=end.month))
+    records = AttendanceRecord.objects.filter(date__range=(start, end))
+    summaries = MonthlyAttendanceSummary.objects.filter(in_months)
+    salaries = SalaryRecord.objects.filter(in_months)
+    if user_ids is not None:
+        records = records.filter(user_id__in=user_ids)
+        summaries = summaries.filter(user_id__in=user_ids)
+        salaries = salaries.filter(user_id__in=user_ids)
+
+    rows = [
+        MonthlyAttendanceSummary(
+            user_id=row["user_id"],
+            year=row["year"],
+            month=row["month"],
+            absent_days=row["absent_days"],
+            late_days=row["late_days"],
+            lateness_hours=round(row["lateness_hours"], 2),
+            overtime_hours=round(row["overtime_hours"], 2),
+        )
+        for row in aggregate_monthly_summaries(records)
+    ]
+    with transaction.atomic():
+        summaries.delete()
+        MonthlyAttendanceSummary.objects.bulk_create(rows, batch_size=1000)
+        mark_salaries_dirty(salaries)
+    return len(rows)
+
+
+def get_monthly_summary(user, year, month):
+    """
+    The stored summary of a user's month, or an unsaved all-zero summary when
+    the user has no attendance that month.
+    """
+    from ..models import MonthlyAttendanceSummary
+
+    summary = MonthlyAttendanceSummary.objects.filter(
+        user=user, year=year, month=month
+    ).first()
+    if summary is None:
+        summary = MonthlyAttendanceSummary(user=user, year=year, month=month)
+    return summary
@@ -0,0 +1,165 @@
+"""
+Monthly range partitioning of the attendance table (PostgreSQL only).
+
+api_attendancerecord is a partitioned table with one partition per month,
+api_attendancerecord_pYYYYMM covering [first day, first day of next month),
+plus api_attendancerecord_default catching dates without a partition yet.
+Queries filtering on date ranges only touch the matching partitions.
+"""
+
+import datetime
+import re
+
+ATTENDANCE_TABLE = "api_attendancerecord"
+OVERTIME_TABLE = "api_overtimerequest"
+DEFAULT_PARTITION = f"{ATTENDANCE_TABLE}_default"
+ARCHIVE_SCHEMA = "attendance_archive"
+
+_PARTITION_NAME = re.compile(rf"^{ATTENDANCE_TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{ATTENDANCE_TABLE}_p{month:%Y%m}"
+
+
+def is_partitioned(cursor):
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass)",
+        [ATTENDANCE_TABLE],
+    )
+    return cursor.fetchone()[0]
+
+
+def list_month_partitions(cursor):
+    """[(partition name, first day of its month)] attached to the attendance table, oldest first."""
+    cursor.execute(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = %s::regclass
+        """,
+        [ATTENDANCE_TABLE],
+    )
+    partitions = []
+    for (name,) in cursor.fetchall():
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions.append(
+                (name, datetime.date(int(match.group(1)), int(match.group(2)), 1))
+            )
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_month_partition(cursor, month, parent=ATTENDANCE_TABLE):
+    """
+    Create the partition for `month` unless it exists. Rows of that month
+    already sitting in the default partition are moved into it.
+    Returns True if a partition was created.
+    """
+    name = partition_name(month)
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    if cursor.fetchone()[0]:
+        return False
+
+    start, end = month_start(month), add_months(month, 1)
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [DEFAULT_PARTITION])
+    has_default = cursor.fetchone()[0]
+    stranded = False
+    if has_default:
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE date >= %s AND date < %s)",
+            [start, end],
+        )
+        stranded = cursor.fetchone()[0]
+
+    if not stranded:
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES {bounds}")
+        return True
+
+    # A new partition may not overlap rows held by the default partition
+    cursor.execute(f"ALTER TABLE {parent} DETACH PARTITION {DEFAULT_PARTITION}")
+    cursor.execute(f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES {bounds}")
+    cursor.execute(
+        f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE date >= %s AND date < %s",
+        [start, end],
+    )
+    cursor.execute(
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE date >= %s AND date < %s", [start, end]
+    )
+    cursor.execute(f"ALTER TABLE {parent} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    return True
+
+
+def create_month_partitions(cursor, first_month, last_month, parent=ATTENDANCE_TABLE):
+    """Create every missing partition from first_month to last_month inclusive."""
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        if create_month_partition(cursor, month, parent):
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def archive_month_partition(cursor, name):
+    """
+    Detach a month partition and move it, with the overtime requests of its
+    records, into the archive schema as standalone tables. Secondary indexes
+    are dropped; only the primary key and (user, date) uniqueness are kept.
+    Run compact_archive_table() afterwards, outside a transaction.
+    """
+    overtime_archive = name.replace(ATTENDANCE_TABLE, OVERTIME_TABLE, 1)
+    cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+    cursor.execute(f"ALTER TABLE {ATTENDANCE_TABLE} DETACH PARTITION {name}")
+    cursor.execute(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}")
+
+    cursor.execute(
+        f"""
+        CREATE TABLE {ARCHIVE_SCHEMA}.{overtime_archive} AS
+        SELECT overtime.* FROM {OVERTIME_TABLE} overtime
+        JOIN {ARCHIVE_SCHEMA}.{name} record ON record.id = overtime.attendance_record_id
+        """
+    )
+    cursor.execute(
+        f"""
+        DELETE FROM {OVERTIME_TABLE} overtime
+        USING {ARCHIVE_SCHEMA}.{name} record
+        WHERE record.id = overtime.attendance_record_id
+        """
+    )
+
+    cursor.execute(
+        """
+        SELECT index_class.relname
+        FROM pg_index
+        JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+        WHERE pg_index.indrelid = %s::regclass
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint WHERE pg_constraint.conindid = pg_index.indexrelid
+          )
+        """,
+        [f"{ARCHIVE_SCHEMA}.{name}"],
+    )
+    for (index,) in cursor.fetchall():
+        cursor.execute(f"DROP INDEX {ARCHIVE_SCHEMA}.{index}")
+    return [f"{ARCHIVE_SCHEMA}.{name}", f"{ARCHIVE_SCHEMA}.{overtime_archive}"]
+
+
+def compact_archive_table(cursor, qualified_name):
+    """
+    Rewrite an archive table fully packed (fillfactor 100) and without dead
+    tuples. Must run outside a transaction (VACUUM FULL).
+    """
+    cursor.execute(f"ALTER TABLE {qualified_name} SET (fillfactor = 100)")
+    cursor.execute(f"VACUUM FULL {qualified_name}")
@@ -0,0 +1,303 @@
+import time
+
+from django.db import transaction
+from django.db.models import FilteredRelation, Q
+from django.db.models.functions import Coalesce
+
+from .company_stats import (
+    SALARY_STAT_FIELDS,
+    add_deltas,
+    apply_salary_total_deltas,
+    refresh_monthly_salary_totals,
+    salary_contribution,
+    tracked_values,
+)
+from .monthly_summary import month_bounds
+
+# Employee compensation fields feeding the salary formula
+COMPENSATION_FIELDS = [
+    "basic_salary",
+    "absence_penalty",
+    "shorttime_hour_penalty",
+    "overtime_hour_salary",
+]
+
+# SalaryRecord columns filled from calculate_salary()'s details
+SALARY_COMPONENT_FIELDS = [
+    "absent_days",
+    "late_days",
+    "lateness_hours",
+    "overtime_hours",
+    "absence_day_penalty",
+    "shorttime_hour_penalty",
+    "overtime_hour_salary",
+    "total_absence_penalty",
+    "total_late_penalty",
+    "total_deductions",
+    "total_overtime_salary",
+]
+
+
+def calculate_salary(compensation, summary):
+    """
+    Apply the salary formula to an employee's compensation (a dict with
+    COMPENSATION_FIELDS) and a month's attendance totals (a dict or object
+    with absent_days, late_days, lateness_hours and overtime_hours).
+    Returns (base_salary, final_salary, details), details holding the
+    SALARY_COMPONENT_FIELDS values.
+    """
+    if not isinstance(summary, dict):
+        summary = {
+            field: getattr(summary, field)
+            for field in ("absent_days", "late_days", "lateness_hours", "overtime_hours")
+        }
+    base_salary = float(compensation["basic_salary"] or 0)
+    absence_penalty = float(compensation["absence_penalty"] or 0)
+    shorttime_hour_penalty = float(compensation["shorttime_hour_penalty"] or 0)
+    overtime_hour_salary = float(compensation["overtime_hour_salary"] or 0)
+    absent_days = summary["absent_days"]
+    # Hours are billed at the 2-decimal precision stored in monthly summaries
+    lateness_hours = round(summary["lateness_hours"] or 0, 2)
+    overtime_hours = round(summary["overtime_hours"] or 0, 2)
+
+    absent_penalty_total = absent_days * absence_penalty
+    late_penalty_total = lateness_hours * shorttime_hour_penalty
+    overtime_bonus_total = overtime_hours * overtime_hour_salary
+    # if you ever want to add short time, put it in deductions
+    total_deductions = absent_penalty_total + late_penalty_total
+    final_salary = round(base_salary - total_deductions + overtime_bonus_total, 2)
+
+    details = {
+        "absent_days": absent_days,
+        "late_days": summary["late_days"],
+        "lateness_hours": lateness_hours,
+        "overtime_hours": overtime_hours,
+        "absence_day_penalty": absence_penalty,
+        "shorttime_hour_penalty": shorttime_hour_penalty,
+        "overtime_hour_salary": overtime_hour_salary,
+        "total_absence_penalty": round(absent_penalty_total, 2),
+        "total_late_penalty": round(late_penalty_total, 2),
+        "total_deductions": round(total_deductions, 2),
+        "total_overtime_salary": round(overtime_bonus_total, 2),
+    }
+    return round(base_salary, 2), final_salary, details
+
+
+def payroll_rows(year, month, user_ids=None):
+    """
+    Compensation and attendance totals of every employee eligible for the
+    month's payroll (accepted, with a base salary, joined by the end of the
+    month), in a single query: each employee is LEFT JOINed to its
+    MonthlyAttendanceSummary row, the same source salary records are
+    recalculated from. Missing summaries count as zero; repair stale ones
+    with rebuild_monthly_summaries().
+    """
+    from ..models import Employee
+
+    _, end = month_bounds(year, month)
+    employees = Employee.objects.filter(
+        Q(join_date__isnull=True) | Q(join_date__lte=end),
+        interview_state="accepted",
+        basic_salary__isnull=False,
+    )
+    if user_ids is not None:
+        employees = employees.filter(user_id__in=user_ids)
+    return (
+        employees.annotate(
+            month_summary=FilteredRelation(
+                "user__monthly_attendance_summaries",
+                condition=Q(
+                    user__monthly_attendance_summaries__year=year,
+                    user__monthly_attendance_summaries__month=month,
+                ),
+            ),
+            absent_days=Coalesce("month_summary__absent_days", 0),
+            late_days=Coalesce("month_summary__late_days", 0),
+            lateness_hours=Coalesce("month_summary__lateness_hours", 0.0),
+            overtime_hours=Coalesce("month_summary__overtime_hours", 0.0),
+        )
+        .order_by()
+        .values(
+            "user_id",
+            *COMPENSATION_FIELDS,
+            "absent_days",
+            "late_days",
+            "lateness_hours",
+            "overtime_hours",
+        )
+    )
+
+
+def run_payroll(year, month, user_ids=None):
+    """
+    Compute and store the salary of every eligible employee for a month from
+    the monthly attendance summaries: one query, then one bulk upsert on (user, month, year) that
+    replaces any record generated earlier. Returns a run summary.
+    """
+    from ..models import SalaryRecord
+
+    started = time.perf_counter()
+    records = []
+    for row in payroll_rows(year, month, user_ids):
+        base_salary, final_salary, details = calculate_salary(row, row)
+        records.append(
+            SalaryRecord(
+                user_id=row["user_id"],
+                year=year,
+                month=month,
+                base_salary=base_salary,
+                final_salary=final_salary,
+                **details,
+            )
+        )
+    computed = time.perf_counter()
+
+    existing = SalaryRecord.objects.filter(
+        year=year, month=month, user_id__in=[record.user_id for record in records]
+    ).count()
+    with transaction.atomic():
+        SalaryRecord.objects.bulk_create(
+            records,
+            update_conflicts=True,
+            unique_fields=["user", "month", "year"],
+            update_fields=[
+                "base_salary",
+                "final_salary",
+                *SALARY_COMPONENT_FIELDS,
+                "generated_at",
+                "needs_recalculation",
+            ],
+        )
+        refresh_monthly_salary_totals([(year, month)])
+    finished = time.perf_counter()
+
+    return {
+        "year": year,
+        "month": month,
+        "employees": len(records),
+        "created": len(records) - existing,
+        "updated": existing,
+        "total_base_salary": round(sum(record.base_salary for record in records), 2),
+        "total_final_salary": round(sum(record.final_salary for record in records), 2),
+        "compute_ms": round((computed - started) * 1000, 1),
+        "write_ms": round((finished - computed) * 1000, 1),
+        "total_ms": round((finished - started) * 1000, 1),
+    }
+
+
+def mark_salaries_dirty(records):
+    """
+    Flag the given SalaryRecord queryset for recalculation; once the
+    transaction commits, a background job recomputes the flagged records in
+    one batch, so a failure there never fails the write that flagged them.
+    """
+    if records.update(needs_recalculation=True):
+        transaction.on_commit(enqueue_salary_recalculation)
+
+
+def enqueue_salary_recalculation():
+    """Queue a recalculate_salaries job unless one is already waiting."""
+    from ..models import Job
+    from .jobs import enqueue_job
+
+    if not Job.objects.filter(kind="recalculate_salaries", status=Job.QUEUED).exists():
+        enqueue_job("recalculate_salaries")
+
+
+def mark_salary_months_dirty(keys):
+    """mark_salaries_dirty() for the records of some (user_id, year, month) keys."""
+    from ..models import SalaryRecord
+
+    keys = list(keys)
+    if len(keys) == 1:
+        (user_id, year, month), = keys
+        records = SalaryRecord.objects.filter(user_id=user_id, year=year, month=month)
+    else:
+        # A superset of the keys is fine: recomputing an unchanged month is a no-op
+        records = SalaryRecord.objects.filter(
+            user_id__in={user_id for user_id, _, _ in keys},
+            year__in={year for _, year, _ in keys},
+            month__in={month for _, _, month in keys},
+        )
+    mark_salaries_dirty(records)
+
+
+def _snapshot_compensation(record):
+    """Compensation rates snapshotted in a salary record, or None."""
+    rates = {
+        "absence_penalty": record.absence_day_penalty,
+        "shorttime_hour_penalty": record.shorttime_hour_penalty,
+        "overtime_hour_salary": record.overtime_hour_salary,
+    }
+    if None in rates.values():
+        return None
+    return {"basic_salary": record.base_salary, **rates}
+
+
+def recalculate_dirty_salaries():
+    """
+    Recompute every salary record flagged for recalculation from its month's
+    attendance summary, keeping the compensation rates snapshotted in the
+    record. Rows being recomputed by another process are skipped; any change
+    committed meanwhile re-flags them. Returns the number recomputed.
+    """
+    from ..models import Employee, MonthlyAttendanceSummary, SalaryRecord
+
+    with transaction.atomic():
+        records = list(
+            SalaryRecord.objects.select_for_update(skip_locked=True).filter(
+                needs_recalculation=True
+            )
+        )
+        if not records:
+            return 0
+        summaries = {
+            (summary.user_id, summary.year, summary.month): summary
+            for summary in MonthlyAttendanceSummary.objects.filter(
+                user_id__in={record.user_id for record in records},
+                year__in={record.year for record in records},
+                month__in={record.month for record in records},
+            )
+        }
+        # Records without snapshotted rates fall back to current rates
+        current = {
+            row["user_id"]: row
+            for row in Employee.objects.filter(
+                user_id__in={
+                    record.user_id
+                    for record in records
+                    if not _snapshot_compensation(record)
+                }
+            ).values("user_id", *COMPENSATION_FIELDS)
+        }
+        total_deltas = {}
+        for record in records:
+            add_deltas(
+                total_deltas,
+                salary_contribution(tracked_values(record, SALARY_STAT_FIELDS)),
+                sign=-1,
+            )
+            compensation = _snapshot_compensation(record) or {
+                **current.get(record.user_id, dict.fromkeys(COMPENSATION_FIELDS)),
+                "basic_salary": record.base_salary,
+            }
+            summary = summaries.get(
+                (record.user_id, record.year, record.month)
+            ) or MonthlyAttendanceSummary(
+                user_id=record.user_id, year=record.year, month=record.month
+            )
+            _, record.final_salary, details = calculate_salary(compensation, summary)
+            for field, value in details.items():
+                setattr(record, field, value)
+            record.needs_recalculation = False
+            add_deltas(
+                total_deltas,
+                salary_contribution(tracked_values(record, SALARY_STAT_FIELDS)),
+            )
+        SalaryRecord.objects.bulk_update(
+            records,
+            ["final_salary", *SALARY_COMPONENT_FIELDS, "needs_recalculation"],
+            batch_size=1000,
+        )
+        apply_salary_total_deltas(total_deltas)
+    return len(records)
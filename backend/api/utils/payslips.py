@@ -0,0 +1,305 @@
+import calendar
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.http import HttpResponse, StreamingHttpResponse
+
+from .export import _Buffer
+from .payroll import SALARY_COMPONENT_FIELDS
+from .queryset_utils import iter_values_by_pk
+
+# Payslips rendered per pool round; bounds memory whatever the month's size
+BATCH_SIZE = 500
+
+# Below this many payslips a process pool costs more than it saves
+MIN_POOL_SIZE = 50
+
+PAYSLIP_FIELDS = [
+    "id",
+    "user_id",
+    "user__username",
+    "user__first_name",
+    "user__last_name",
+    "user__employee__position__name",
+    "year",
+    "month",
+    "base_salary",
+    "final_salary",
+    *SALARY_COMPONENT_FIELDS,
+    "generated_at",
+]
+
+# Helvetica advance widths (1/1000 em) of the characters used in amounts,
+# identical in the bold face; needed to right-align columns
+_FIGURE_WIDTHS = {**dict.fromkeys("0123456789", 556), ".": 278, ",": 278, "-": 333, " ": 278}
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+LEFT, RIGHT = 50, 545
+
+
+def payslip_rows(queryset):
+    """Plain dicts of everything a payslip shows, cheap to send to worker processes."""
+    queryset = queryset.select_related(None).prefetch_related(None)
+    for row in iter_values_by_pk(queryset, PAYSLIP_FIELDS, BATCH_SIZE):
+        yield dict(zip(PAYSLIP_FIELDS, row))
+
+
+def payslip_filename(row):
+    return f"payslip_{row['user__username']}_{row['year']}-{row['month']:02d}.pdf"
+
+
+def _pdf_string(value):
+    """PDF literal string in WinAnsi; characters outside it print as '?'."""
+    data = str(value).encode("cp1252", errors="replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _printable(value, fallback):
+    """
+    `value` if the WinAnsi-encoded standard fonts can show it, else
+    `fallback`. Names in other scripts (e.g. Arabic) would print as "????".
+    """
+    try:
+        str(value).encode("cp1252")
+    except UnicodeEncodeError:
+        return fallback
+    return value
+
+
+def _money(value):
+    return f"{value or 0:,.2f}"
+
+
+def _number(value):
+    return f"{value or 0:g}"
+
+
+class _Page:
+    """Content stream of a single page: text lines and horizontal rules."""
+
+    def __init__(self):
+        self.ops = []
+
+    def text(self, x, y, value, size=10, bold=False, align="left"):
+        # Only figures can be right-aligned; see _FIGURE_WIDTHS
+        if align == "right":
+            x -= sum(_FIGURE_WIDTHS.get(char, 556) for char in str(value)) * size / 1000
+        font = b"/F2" if bold else b"/F1"
+        self.ops.append(
+            b"BT %s %d Tf %.2f %.2f Td %s Tj ET"
+            % (font, size, x, y, _pdf_string(value))
+        )
+
+    def rule(self, y, width=0.5):
+        self.ops.append(b"%.2f w %d %.2f m %d %.2f l S" % (width, LEFT, y, RIGHT, y))
+
+    def render(self):
+        return b"\n".join(self.ops)
+
+
+def _pdf_document(content):
+    """Single-page A4 PDF with Helvetica and Helvetica-Bold around `content`."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+        b"/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>"
+        % (PAGE_WIDTH, PAGE_HEIGHT),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content) + 1, content),
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(pdf)
+
+
+def render_payslip(row):
+    """
+    PDF payslip for one salary record, from a payslip_rows() dict. Pure
+    function without database access, so it can run in worker processes.
+    """
+    page = _Page()
+    name = " ".join(
+        part for part in (row["user__first_name"], row["user__last_name"]) if part
+    )
+    period = f"{calendar.month_name[row['month']]} {row['year']}"
+
+    y = 780
+    page.text(LEFT, y, "Payslip", size=20, bold=True)
+    y -= 20
+    page.text(LEFT, y, period, size=12, bold=True)
+    y -= 10
+    page.rule(y, width=1)
+
+    y -= 26
+    username = _printable(row["user__username"], f"User #{row['user_id']}")
+    for label, value in (
+        ("Employee", _printable(name, username) or username),
+        ("Username", username),
+        (
+            "Position",
+            _printable(row["user__employee__position__name"] or "-", "-"),
+        ),
+        ("Record", f"#{row['id']}"),
+    ):
+        page.text(LEFT, y, label, bold=True)
+        page.text(LEFT + 90, y, value)
+        y -= 16
+
+    def section(title, lines, total_label, total):
+        nonlocal y
+        y -= 18
+        page.text(LEFT, y, title, size=12, bold=True)
+        y -= 8
+        page.rule(y)
+        for label, detail, amount in lines:
+            y -= 16
+            page.text(LEFT, y, label)
+            if detail:
+                page.text(LEFT + 200, y, detail)
+            page.text(RIGHT, y, _money(amount), align="right")
+        y -= 8
+        page.rule(y)
+        y -= 16
+        page.text(LEFT, y, total_label, bold=True)
+        page.text(RIGHT, y, _money(total), bold=True, align="right")
+
+    def rate(quantity, unit, value):
+        if value is None:
+            return f"{_number(quantity)} {unit}"
+        return f"{_number(quantity)} {unit} x {_money(value)}"
+
+    section(
+        "Earnings",
+        [
+            ("Basic salary", "", row["base_salary"]),
+            (
+                "Overtime",
+                rate(row["overtime_hours"], "h", row["overtime_hour_salary"]),
+                row["total_overtime_salary"],
+            ),
+        ],
+        "Gross earnings",
+        (row["base_salary"] or 0) + (row["total_overtime_salary"] or 0),
+    )
+    section(
+        "Deductions",
+        [
+            (
+                "Absence",
+                rate(row["absent_days"], "days", row["absence_day_penalty"]),
+                row["total_absence_penalty"],
+            ),
+            (
+                "Lateness",
+                rate(row["lateness_hours"], "h", row["shorttime_hour_penalty"]),
+                row["total_late_penalty"],
+            ),
+        ],
+        "Total deductions",
+        row["total_deductions"],
+    )
+
+    y -= 30
+    page.rule(y + 18, width=1)
+    page.text(LEFT, y, "Net salary", size=14, bold=True)
+    page.text(RIGHT, y, _money(row["final_salary"]), size=14, bold=True, align="right")
+    page.rule(y - 8, width=1)
+
+    y -= 40
+    page.text(LEFT, y, "Attendance", size=12, bold=True)
+    for label, value in (
+        ("Absent days", row["absent_days"]),
+        ("Late days", row["late_days"]),
+        ("Lateness hours", row["lateness_hours"]),
+        ("Approved overtime hours", row["overtime_hours"]),
+    ):
+        y -= 16
+        page.text(LEFT, y, label)
+        page.text(LEFT + 200, y, _number(value))
+
+    generated_at = row["generated_at"]
+    page.text(
+        LEFT,
+        60,
+        f"Generated {generated_at:%Y-%m-%d %H:%M}" if generated_at else "",
+        size=8,
+    )
+    return _pdf_document(page.render())
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_payslips_zip(rows, processes=None):
+    """
+    Render payslip_rows() into a ZIP streamed entry by entry: batches of
+    rows are rendered by a process pool, and each PDF is drained from the
+    archive as soon as it is written, so neither the rows nor the archive
+    are ever held whole in memory. `processes` defaults to the CPU count;
+    1 renders in the current process.
+    """
+    processes = processes or os.cpu_count() or 1
+    buffer = _Buffer()
+    executor = None
+    try:
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for batch in _batches(rows):
+                if executor is None and processes > 1 and len(batch) >= MIN_POOL_SIZE:
+                    executor = ProcessPoolExecutor(max_workers=processes)
+                pdfs = (
+                    executor.map(
+                        render_payslip,
+                        batch,
+                        chunksize=max(1, len(batch) // (processes * 4)),
+                    )
+                    if executor
+                    else map(render_payslip, batch)
+                )
+                for row, pdf in zip(batch, pdfs):
+                    archive.writestr(payslip_filename(row), pdf)
+                    yield buffer.drain()
+        yield buffer.drain()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def payslip_response(record):
+    """Inline PDF response with a single record's payslip."""
+    from ..models import SalaryRecord
+
+    row = next(payslip_rows(SalaryRecord.objects.filter(pk=record.pk)))
+    response = HttpResponse(render_payslip(row), content_type="application/pdf")
+    response["Content-Disposition"] = f'inline; filename="{payslip_filename(row)}"'
+    return response
+
+
+def payslips_zip_response(queryset, filename, processes=None):
+    """Streamed ZIP response with a PDF payslip per record in `queryset`."""
+    response = StreamingHttpResponse(
+        iter_payslips_zip(payslip_rows(queryset), processes),
+        content_type="application/zip",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}.zip"'
+    return response
@@ -1,3 +1,7 @@
+import datetime
+import json
+
+from django.db import connections
 from django.db.models import Q
 
 
@@ -35,3 +39,67 @@ def get_role_based_queryset(user, model):
     else:
         # Default: return all (should be extended for other models)
         return model.objects.all()
+
+
+def estimate_count(queryset):
+    """
+    Row count estimate of a queryset from the PostgreSQL planner (EXPLAIN,
+    no scan). Returns None on other database backends.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    # psycopg2 returns the plan list already decoded, so Django re-encodes
+    # its single element; other drivers give back the raw JSON list
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan["Plan"]["Plan Rows"])
+
+
+def iter_values_by_pk(queryset, fields, chunk_size):
+    """
+    Yield the values_list(*fields) rows of `queryset` in primary key order,
+    fetched in keyset chunks (pk > last pk, LIMIT chunk_size). Unlike
+    iterator() this needs no server-side cursor, which the transaction-mode
+    connection pooler cannot serve outside a transaction.
+    """
+    queryset = queryset.order_by("pk").values_list("pk", *fields)
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk[:chunk_size])
+        for row in rows:
+            yield row[1:]
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1][0]
+
+
+def month_date_range(year, month=None):
+    """
+    Half-open [start, end) date bounds of a month (or of the whole year when
+    month is None), so filters compare the raw date column and can use its
+    indexes instead of extracting parts of it.
+    """
+    if month is None:
+        return datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1)
+    start = datetime.date(year, month, 1)
+    if month == 12:
+        return start, datetime.date(year + 1, 1, 1)
+    return start, datetime.date(year, month + 1, 1)
+
+
+def date_range_q(field, year=None, month=None, years=()):
+    """
+    Q object selecting `field` dates in a year, a month of a year, or - for a
+    month without a year - that month of each of `years`, as index-friendly
+    half-open ranges.
+    """
+    if year is not None:
+        bounds = [month_date_range(year, month)]
+    else:
+        bounds = [month_date_range(each, month) for each in years]
+    q = Q(pk__in=[])
+    for start, end in bounds:
+        q |= Q(**{f"{field}__gte": start, f"{field}__lt": end})
+    return q
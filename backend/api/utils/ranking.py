@@ -0,0 +1,88 @@
+"""
+Weighted ranking of accepted employees, done by the database.
+
+The score is a SQL expression over the employee counters, and the global
+and per-position ranks come from RANK() windows over it; a single
+UPDATE ... FROM writes both, whatever the number of employees.
+"""
+
+from functools import reduce
+from operator import add
+
+from django.db import connection, transaction
+from django.db.models import Case, F, FloatField, Value, When, Window
+from django.db.models.functions import Cast, Rank
+
+from .result_cache import EMPLOYEES, bump_data_version
+
+# Weight name -> (employee total, denominator); the total is averaged per
+# accepted task or per non-holiday day, 0 when there are none
+SCORE_COMPONENTS = {
+    "avg_task_rating": ("total_task_ratings", "number_of_accepted_tasks"),
+    "avg_time_remaining": (
+        "total_time_remaining_before_deadline",
+        "number_of_accepted_tasks",
+    ),
+    "avg_overtime": ("total_overtime_hours", "number_of_non_holiday_days_since_join"),
+    "avg_lateness": ("total_lateness_hours", "number_of_non_holiday_days_since_join"),
+    "avg_absent": ("total_absent_days", "number_of_non_holiday_days_since_join"),
+}
+
+
+def _average(total, denominator):
+    return Case(
+        When(
+            **{f"{denominator}__gt": 0},
+            then=Cast(total, FloatField()) / Cast(denominator, FloatField()),
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def employee_score(weights):
+    """SQL expression of an employee's weighted score."""
+    return reduce(
+        add,
+        (
+            _average(total, denominator) * Value(float(weights[name]))
+            for name, (total, denominator) in SCORE_COMPONENTS.items()
+        ),
+    )
+
+
+def rank_employees(weights):
+    """
+    Set rank (company-wide) and position_rank of every accepted employee
+    from their weighted score, highest first; equal scores share a rank.
+    Returns the number of employees ranked.
+    """
+    from ..models import Employee
+
+    ranked = (
+        Employee.objects.filter(interview_state="accepted")
+        .order_by()
+        .annotate(score=employee_score(weights))
+        .annotate(
+            new_rank=Window(Rank(), order_by=F("score").desc()),
+            new_position_rank=Window(
+                Rank(), partition_by=[F("position_id")], order_by=F("score").desc()
+            ),
+        )
+        .values("id", "new_rank", "new_position_rank")
+    )
+    select, params = ranked.query.sql_with_params()
+    table = connection.ops.quote_name(Employee._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table}
+            SET rank = ranked.new_rank, position_rank = ranked.new_position_rank
+            FROM ({select}) AS ranked
+            WHERE {table}.id = ranked.id
+            """,
+            params,
+        )
+        count = cursor.rowcount
+    bump_data_version(EMPLOYEES)
+    return count
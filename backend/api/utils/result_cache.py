@@ -0,0 +1,119 @@
+"""
+Cache of computed API responses, invalidated by data versions.
+
+Cached entries are keyed by the request, optionally the user, and the
+current version token of every dataset the response is built from
+("company_statistics", "employees", "hrs"). Writes to a dataset's models
+replace its token (bump_data_version(), called from api/signals.py and the
+bulk write paths), so the next request computes and caches a fresh
+response under the new key; stale entries are never read again and age
+out with their TTL.
+
+The backend is the "results" cache of settings.CACHES: file-based, Redis
+or local memory, chosen with RESULT_CACHE_BACKEND. Version tokens live in
+the same cache, so all processes sharing a file or Redis cache see each
+other's bumps. A local memory cache only sees the bumps of its own process,
+which is why it is limited to single-process setups (see
+is_process_local()).
+"""
+
+import functools
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+RESULT_CACHE_ALIAS = "results"
+
+COMPANY_STATISTICS = "company_statistics"
+EMPLOYEES = "employees"
+HRS = "hrs"
+
+
+def result_cache():
+    alias = RESULT_CACHE_ALIAS if RESULT_CACHE_ALIAS in settings.CACHES else "default"
+    return caches[alias]
+
+
+def is_process_local():
+    """
+    Whether the result cache, and with it the version tokens, is private to
+    each process. Writes made by other processes (job workers, other web
+    server processes) then do not invalidate this process's entries.
+    """
+    return isinstance(result_cache(), LocMemCache)
+
+
+def _version_key(dataset):
+    return f"data-version:{dataset}"
+
+
+def data_versions(datasets):
+    """Current version token of each dataset, creating missing ones."""
+    cache = result_cache()
+    keys = [_version_key(dataset) for dataset in datasets]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Never expires; if evicted anyway a new random token still
+            # cannot match any entry cached before
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_data_version(*datasets):
+    """
+    Invalidate cached results built from these datasets once the current
+    transaction commits (immediately outside a transaction), so a response
+    computed before the commit is never stored under the new version.
+    """
+
+    def bump():
+        result_cache().set_many(
+            {_version_key(dataset): uuid.uuid4().hex for dataset in datasets},
+            timeout=None,
+        )
+
+    transaction.on_commit(bump)
+
+
+def result_key(name, request, datasets, per_user=False):
+    parts = [name, request.get_full_path()]
+    if per_user:
+        parts.append(str(request.user.pk))
+    parts.extend(data_versions(datasets))
+    return "result:" + hashlib.md5("|".join(parts).encode()).hexdigest()
+
+
+def cached_result(*datasets, per_user=False, timeout=DEFAULT_TIMEOUT):
+    """
+    Cache successful responses of a DRF view method until a dataset it
+    depends on is written to, or `timeout` seconds (default: the cache's
+    TIMEOUT). Use per_user=True when the response depends on request.user.
+    """
+
+    def decorator(view_method):
+        name = view_method.__qualname__
+
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            cache = result_cache()
+            key = result_key(name, request, datasets, per_user)
+            data = cache.get(key)
+            if data is not None:
+                return Response(data)
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, timeout)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,116 @@
+"""
+Time series over the company statistics snapshots.
+
+Company-wide figures come from CompanyStatistics itself, per-position and
+per-region figures from the PositionStatistics / RegionStatistics rollup
+rows. Bucketing, averaging and the deltas between consecutive points are
+all done by the database: one grouped query with a LAG() window per call.
+"""
+
+from django.db.models import Avg, Count, F, Window
+from django.db.models.functions import Lag, TruncMonth, TruncWeek
+
+INTERVALS = {
+    "day": F,
+    "week": TruncWeek,
+    "month": TruncMonth,
+}
+
+# scope -> (model path, grouping relation or None, {metric: column})
+SERIES_SCOPES = {
+    "company": (
+        "CompanyStatistics",
+        None,
+        {
+            "total_employees": "total_employees",
+            "total_hrs": "total_hrs",
+            "avg_task_rating": "overall_avg_task_rating",
+            "avg_time_remaining": "overall_avg_time_remaining",
+            "avg_overtime": "overall_avg_overtime",
+            "avg_lateness": "overall_avg_lateness",
+            "avg_absent_days": "overall_avg_absent_days",
+            "avg_salary": "overall_avg_salary",
+        },
+    ),
+    "position": (
+        "PositionStatistics",
+        "position",
+        {
+            "employee_count": "employee_count",
+            "avg_task_rating": "avg_task_rating",
+            "avg_time_remaining": "avg_time_remaining",
+            "avg_overtime": "avg_overtime",
+            "avg_lateness": "avg_lateness",
+            "avg_absent_days": "avg_absent_days",
+            "avg_salary": "avg_salary",
+        },
+    ),
+    "region": (
+        "RegionStatistics",
+        "region",
+        {
+            "employee_count": "employee_count",
+            "avg_lateness": "avg_lateness",
+        },
+    ),
+}
+
+
+def statistics_series(
+    scope="company", metrics=None, ids=None, start=None, end=None, interval="day"
+):
+    """
+    Snapshot figures of `scope` between `start` and `end` (inclusive dates),
+    one point per `interval` ("day", "week" or "month") holding the average
+    of each metric over the snapshots in it and its change since the
+    previous point. Position and region series are restricted to `ids` when
+    given. Returns [{"id", "name", "points": [...]}], a single series with
+    id and name None for the company scope.
+    """
+    from django.apps import apps
+
+    model_name, group, columns = SERIES_SCOPES[scope]
+    model = apps.get_model("api", model_name)
+    metrics = list(metrics or columns)
+
+    rows = model.objects.all()
+    if start:
+        rows = rows.filter(snapshot_date__gte=start)
+    if end:
+        rows = rows.filter(snapshot_date__lte=end)
+    group_fields = []
+    if group:
+        rows = rows.filter(**{f"{group}__isnull": False})
+        if ids:
+            rows = rows.filter(**{f"{group}_id__in": ids})
+        group_fields = [f"{group}_id", f"{group}__name"]
+
+    rows = (
+        rows.annotate(period=INTERVALS[interval]("snapshot_date"))
+        .values(*group_fields, "period")
+        .annotate(
+            snapshots=Count("id"),
+            **{metric: Avg(columns[metric]) for metric in metrics},
+        )
+        .annotate(
+            **{
+                f"{metric}_delta": F(metric)
+                - Window(
+                    Lag(metric),
+                    partition_by=[F(field) for field in group_fields[:1]] or None,
+                    order_by=F("period").asc(),
+                )
+                for metric in metrics
+            }
+        )
+        .order_by(*group_fields[:1], "period")
+    )
+
+    series = []
+    for row in rows:
+        key = row.pop(group_fields[0]) if group else None
+        name = row.pop(group_fields[1]) if group else None
+        if not series or series[-1]["id"] != key:
+            series.append({"id": key, "name": name, "points": []})
+        series[-1]["points"].append(row)
+    return series
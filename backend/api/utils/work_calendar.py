@@ -0,0 +1,168 @@
+import datetime
+import threading
+from typing import Dict, Iterable
+
+HOLIDAY = "holiday"
+ONLINE = "online"
+WORKDAY = "workday"
+
+WEEKDAY_INDEX = {
+    "Monday": 0,
+    "Tuesday": 1,
+    "Wednesday": 2,
+    "Thursday": 3,
+    "Friday": 4,
+    "Saturday": 5,
+    "Sunday": 6,
+}
+
+# Yearday bits are laid out over a leap year so Feb 29 has its own slot.
+_LEAP_YEAR = 2000
+
+
+def yearday_bit(month: int, day: int) -> int:
+    """
+    Return the bit index (0..365) for a month/day pair, or -1 if the pair is
+    not a valid calendar day.
+    """
+    try:
+        return datetime.date(_LEAP_YEAR, month, day).timetuple().tm_yday - 1
+    except (TypeError, ValueError):
+        return -1
+
+
+class WorkCalendar:
+    """
+    Compiled holiday / online-day schedule of a single employee.
+
+    Each kind is stored as a 7-bit weekday mask (Monday = bit 0) plus a
+    366-bit yearday bitmap, so classifying a date is a couple of bit tests.
+    """
+
+    __slots__ = (
+        "holiday_weekdays",
+        "holiday_yeardays",
+        "online_weekdays",
+        "online_yeardays",
+    )
+
+    def __init__(
+        self,
+        holiday_weekdays: int = 0,
+        holiday_yeardays: int = 0,
+        online_weekdays: int = 0,
+        online_yeardays: int = 0,
+    ):
+        self.holiday_weekdays = holiday_weekdays
+        self.holiday_yeardays = holiday_yeardays
+        self.online_weekdays = online_weekdays
+        self.online_yeardays = online_yeardays
+
+    def is_holiday(self, day: datetime.date) -> bool:
+        return bool(
+            (self.holiday_weekdays >> day.weekday()) & 1
+            or (self.holiday_yeardays >> yearday_bit(day.month, day.day)) & 1
+        )
+
+    def is_online_day(self, day: datetime.date) -> bool:
+        return bool(
+            (self.online_weekdays >> day.weekday()) & 1
+            or (self.online_yeardays >> yearday_bit(day.month, day.day)) & 1
+        )
+
+    def day_kind(self, day: datetime.date) -> str:
+        """Return HOLIDAY, ONLINE or WORKDAY for the given date."""
+        if self.is_holiday(day):
+            return HOLIDAY
+        if self.is_online_day(day):
+            return ONLINE
+        return WORKDAY
+
+
+def compile_work_calendars(employee_ids: Iterable[int]) -> Dict[int, WorkCalendar]:
+    """
+    Build WorkCalendar objects for many employees at once.
+    Costs four queries (one per schedule M2M table) regardless of head count.
+    """
+    from ..models import (
+        HolidayWeekday,
+        HolidayYearday,
+        OnlineDayWeekday,
+        OnlineDayYearday,
+    )
+
+    employee_ids = list(employee_ids)
+    calendars = {employee_id: WorkCalendar() for employee_id in employee_ids}
+    if not calendars:
+        return calendars
+
+    for employee_id, weekday in HolidayWeekday.employees.through.objects.filter(
+        employee_id__in=employee_ids
+    ).values_list("employee_id", "holidayweekday__weekday"):
+        calendars[employee_id].holiday_weekdays |= 1 << WEEKDAY_INDEX[weekday]
+
+    for employee_id, month, day in HolidayYearday.employees.through.objects.filter(
+        employee_id__in=employee_ids
+    ).values_list("employee_id", "holidayyearday__month", "holidayyearday__day"):
+        bit = yearday_bit(month, day)
+        if bit >= 0:
+            calendars[employee_id].holiday_yeardays |= 1 << bit
+
+    for employee_id, weekday in OnlineDayWeekday.employees.through.objects.filter(
+        employee_id__in=employee_ids
+    ).values_list("employee_id", "onlinedayweekday__weekday"):
+        calendars[employee_id].online_weekdays |= 1 << WEEKDAY_INDEX[weekday]
+
+    for employee_id, month, day in OnlineDayYearday.employees.through.objects.filter(
+        employee_id__in=employee_ids
+    ).values_list("employee_id", "onlinedayyearday__month", "onlinedayyearday__day"):
+        bit = yearday_bit(month, day)
+        if bit >= 0:
+            calendars[employee_id].online_yeardays |= 1 << bit
+
+    return calendars
+
+
+# Per-process cache: employee id -> (schedule_version, WorkCalendar).
+# Entries are validated against Employee.schedule_version, which is bumped in
+# the same transaction as any schedule change (see api/signals.py), so a
+# stale entry in another worker process is rebuilt on its next lookup.
+_cache: Dict[int, tuple] = {}
+_cache_lock = threading.Lock()
+
+
+def get_work_calendars(employees) -> Dict[int, WorkCalendar]:
+    """
+    Return {employee.pk: WorkCalendar} for the given Employee instances.
+    Only employees missing from the cache (or with a newer schedule_version)
+    are compiled, in a single batch.
+    """
+    result = {}
+    missing = {}
+    for employee in employees:
+        entry = _cache.get(employee.pk)
+        if entry is not None and entry[0] == employee.schedule_version:
+            result[employee.pk] = entry[1]
+        else:
+            missing[employee.pk] = employee.schedule_version
+
+    if missing:
+        compiled = compile_work_calendars(missing.keys())
+        with _cache_lock:
+            for employee_id, calendar in compiled.items():
+                _cache[employee_id] = (missing[employee_id], calendar)
+        result.update(compiled)
+
+    return result
+
+
+def get_work_calendar(employee) -> WorkCalendar:
+    """Return the cached WorkCalendar of a single employee."""
+    return get_work_calendars([employee])[employee.pk]
+
+
+def invalidate_work_calendars(employee_ids: Iterable[int]) -> None:
+    """Drop cached calendars of the given employees in this process."""
+    with _cache_lock:
+        for employee_id in employee_ids:
+            _cache.pop(employee_id, None)
@@ -1,13 +1,14 @@
 # from django.contrib.auth.models import User
 from django.db import transaction
-from django.db.models import Avg, Sum, FloatField, Count, Q
+from django.db.models import Avg, FloatField, Count, Q
 from django.db.models.functions import Cast
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.dateformat import format as django_format
 from django.utils.timezone import localtime, make_aware, is_naive
-from django.utils.dateparse import parse_datetime
+from django.utils.dateparse import parse_date, parse_datetime
 import os
+import json
 
 from django.db.models import (
     Case,
@@ -22,7 +23,6 @@ from django.db.models import (
     IntegerField,
 )
 from django.db.models.functions import Now, Extract
-import numpy as np
 from rest_framework.viewsets import ModelViewSet, ViewSet, ReadOnlyModelViewSet
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -31,7 +31,14 @@ from rest_framework import status
 from rest_framework.filters import SearchFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth import get_user_model
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import (
+    BasePagination,
+    PageNumberPagination,
+    replace_query_param,
+)
+from rest_framework.exceptions import NotFound
+from rest_framework.settings import api_settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from rest_framework.views import APIView
@@ -95,7 +102,17 @@ from .permissions import (
     IsHROrEmployee,
 )
 
-from .cv_processing.LLM_utils import TogetherCVProcessor
+from .utils.hr_stats import attach_hr_stats
+from .utils.queryset_utils import estimate_count
+from .utils.jobs import enqueue_job, job_accepted_response
+from .utils.payslips import payslip_response
+from .utils.result_cache import COMPANY_STATISTICS, EMPLOYEES, HRS, cached_result
+from .utils.stats_series import INTERVALS, SERIES_SCOPES, statistics_series
+from .utils.export import (
+    EMPLOYEE_EXPORT_COLUMNS,
+    get_export_format,
+    stream_export,
+)
 from rest_framework.response import Response
 from rest_framework import status
 from django.core.mail import send_mail
@@ -111,175 +128,6 @@ def recalculate_interview_avg_grade(employee):
     employee.save(update_fields=["interview_questions_avg_grade"])
 
 
-def calculate_statistics():
-    employees = Employee.objects.filter(interview_state="accepted")
-    total_employees = employees.count()
-    total_hrs = HR.objects.count()
-
-    positions = Position.objects.all()
-    position_stats = {}
-
-    for position in positions:
-        pos_employees = employees.filter(position=position)
-        pos_count = pos_employees.count()
-        if pos_count == 0:
-            continue
-
-        total_task_ratings = (
-            pos_employees.aggregate(sum=Sum("total_task_ratings"))["sum"] or 0
-        )
-        total_accepted_tasks = (
-            pos_employees.aggregate(sum=Sum("number_of_accepted_tasks"))["sum"] or 0
-        )
-        total_time_remaining = (
-            pos_employees.aggregate(sum=Sum("total_time_remaining_before_deadline"))[
-                "sum"
-            ]
-            or 0
-        )
-        total_overtime = (
-            pos_employees.aggregate(sum=Sum("total_overtime_hours"))["sum"] or 0
-        )
-        total_lateness = (
-            pos_employees.aggregate(sum=Sum("total_lateness_hours"))["sum"] or 0
-        )
-        total_absent = pos_employees.aggregate(sum=Sum("total_absent_days"))["sum"] or 0
-        total_non_holiday_days = (
-            pos_employees.aggregate(sum=Sum("number_of_non_holiday_days_since_join"))[
-                "sum"
-            ]
-            or 0
-        )
-        avg_salary = pos_employees.aggregate(avg=Avg("basic_salary"))["avg"]
-
-        position_stats[position.name] = {
-            "count": pos_count,
-            "avg_task_rating": (
-                round(total_task_ratings / total_accepted_tasks, 2)
-                if total_accepted_tasks > 0
-                else None
-            ),
-            "avg_time_remaining": (
-                round(total_time_remaining / total_accepted_tasks, 2)
-                if total_accepted_tasks > 0
-                else None
-            ),
-            "avg_overtime": (
-                round(total_overtime / total_non_holiday_days, 2)
-                if total_non_holiday_days > 0
-                else None
-            ),
-            "avg_lateness": (
-                round(total_lateness / total_non_holiday_days, 2)
-                if total_non_holiday_days > 0
-                else None
-            ),
-            "avg_absent_days": (
-                round(total_absent / total_non_holiday_days, 2)
-                if total_non_holiday_days > 0
-                else None
-            ),
-            "avg_salary": avg_salary,
-        }
-
-    region_stats = {}
-    regions = Region.objects.all()
-
-    for region in regions:
-        region_employees = employees.filter(region=region)
-        region_count = region_employees.count()
-
-        if region_count == 0:
-            continue
-
-        total_lateness = (
-            region_employees.aggregate(sum=Sum("total_lateness_hours"))["sum"] or 0
-        )
-        total_non_holiday_days = (
-            region_employees.aggregate(
-                sum=Sum("number_of_non_holiday_days_since_join")
-            )["sum"]
-            or 0
-        )
-
-        if total_non_holiday_days > 0:
-            region_stats[region.name] = {
-                "distance_to_work": region.distance_to_work,
-                "employee_count": region_count,
-                "avg_lateness": (
-                    round(total_lateness / total_non_holiday_days, 2)
-                    if total_non_holiday_days > 0
-                    else None
-                ),
-            }
-
-        print(region_stats)
-
-    total_task_ratings = employees.aggregate(sum=Sum("total_task_ratings"))["sum"] or 0
-    total_accepted_tasks = (
-        employees.aggregate(sum=Sum("number_of_accepted_tasks"))["sum"] or 0
-    )
-    total_time_remaining = (
-        employees.aggregate(sum=Sum("total_time_remaining_before_deadline"))["sum"] or 0
-    )
-    total_overtime = employees.aggregate(sum=Sum("total_overtime_hours"))["sum"] or 0
-    total_lateness = employees.aggregate(sum=Sum("total_lateness_hours"))["sum"] or 0
-    total_absent = employees.aggregate(sum=Sum("total_absent_days"))["sum"] or 0
-    total_non_holiday_days = (
-        employees.aggregate(sum=Sum("number_of_non_holiday_days_since_join"))["sum"]
-        or 0
-    )
-    avg_salary = employees.aggregate(avg=Avg("basic_salary"))["avg"]
-
-    overall_stats = {
-        "overall_avg_task_rating": (
-            round(total_task_ratings / total_accepted_tasks, 2)
-            if total_accepted_tasks > 0
-            else None
-        ),
-        "overall_avg_time_remaining": (
-            round(total_time_remaining / total_accepted_tasks, 2)
-            if total_accepted_tasks > 0
-            else None
-        ),
-        "overall_avg_overtime": (
-            round(total_overtime / total_non_holiday_days, 2)
-            if total_non_holiday_days > 0
-            else None
-        ),
-        "overall_avg_lateness": (
-            round(total_lateness / total_non_holiday_days, 2)
-            if total_non_holiday_days > 0
-            else None
-        ),
-        "overall_avg_absent_days": (
-            round(total_absent / total_non_holiday_days, 2)
-            if total_non_holiday_days > 0
-            else None
-        ),
-        "overall_avg_salary": avg_salary,
-    }
-
-    salary_records = SalaryRecord.objects.all()
-    monthly_totals = {}
-    for record in salary_records:
-        key = f"{record.year}-{record.month}"
-        monthly_totals[key] = monthly_totals.get(key, 0) + record.final_salary
-
-    monthly_salary_data = [
-        {"year": int(k.split("-")[0]), "month": int(k.split("-")[1]), "total_paid": v}
-        for k, v in monthly_totals.items()
-    ]
-    return {
-        "total_employees": total_employees,
-        "total_hrs": total_hrs,
-        "position_stats": position_stats,
-        "region_stats": region_stats,
-        "monthly_salary_totals": monthly_salary_data,
-        **overall_stats,
-    }
-
-
 class EightPerPagePagination(PageNumberPagination):
     page_size = 8
     max_page_size = 100
@@ -297,6 +145,94 @@ class TwentyPerPagePagination(PageNumberPagination):
     max_page_size = 100
 
 
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination, newest first, on (view.keyset_field, id).
+
+    Sending ?cursor= (empty for the first page) switches a list to this mode:
+    each page is fetched with WHERE (key, id) < (last key, last id) instead of
+    an OFFSET and no COUNT(*) is run, so deep pages cost the same as the
+    first. ?include_total=true adds the planner's row estimate as
+    `approximate_count`. Without ?cursor, fallback_class paginates as before.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    fallback_class = PageNumberPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.fallback = None
+        if self.cursor_query_param not in request.query_params:
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        key = getattr(view, "keyset_field", "date")
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(f"-{key}", "-pk")
+
+        self.approximate_count = None
+        if request.query_params.get("include_total") in ("1", "true"):
+            self.approximate_count = estimate_count(queryset)
+
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            last_key, last_pk = self.decode_cursor(cursor, queryset.model, key)
+            queryset = queryset.filter(
+                Q(**{f"{key}__lt": last_key}) | Q(**{key: last_key, "pk__lt": last_pk})
+            )
+
+        page = list(queryset[: page_size + 1])
+        self.next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            last = page[-1]
+            self.next_cursor = self.encode_cursor(getattr(last, key), last.pk)
+        return page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, key_value, pk):
+        payload = json.dumps([key_value.isoformat(), pk])
+        return urlsafe_base64_encode(force_bytes(payload))
+
+    def decode_cursor(self, cursor, model, key):
+        try:
+            key_value, pk = json.loads(urlsafe_base64_decode(cursor))
+            return model._meta.get_field(key).to_python(key_value), int(pk)
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound("Invalid cursor.")
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.next_cursor,
+        )
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        response = {"next": self.get_next_link(), "results": data}
+        if self.approximate_count is not None:
+            response["approximate_count"] = self.approximate_count
+        return Response(response)
+
+
+class EightPerPageKeysetPagination(KeysetPagination):
+    page_size = 8
+    fallback_class = EightPerPagePagination
+
+
 class AdminViewEmployeesViewSet(ModelViewSet):
     queryset = Employee.objects.all()
     serializer_class = EmployeeListSerializer
@@ -357,6 +293,25 @@ class AdminViewEmployeesViewSet(ModelViewSet):
             return EmployeeUpdateCompensationSerializer
         return EmployeeSerializer
 
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream the filtered employee list as CSV, NDJSON or XLSX
+        (?file_format=), applying the same role-based filtering as the list.
+        """
+        file_format = get_export_format(request)
+        if file_format is None:
+            return Response(
+                {"detail": "Unsupported format. Use csv, ndjson or xlsx."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return stream_export(
+            self.filter_queryset(self.get_queryset()),
+            EMPLOYEE_EXPORT_COLUMNS,
+            file_format,
+            "employees",
+        )
+
     @action(detail=True, methods=["patch"], url_path="update-cv-data")
     def update_cv_data(self, request, pk=None):
 
@@ -670,71 +625,7 @@ class PublicApplicantsViewSet(ModelViewSet):
         except Exception as e:
             return Response({"detail": f"Failed to upload CV: {e}"}, status=500)
 
-        # 2. Extract info from CV
-        all_skills = list(Skill.objects.values_list("name", flat=True))
-        degree_choices = list(EducationDegree.objects.values_list("name", flat=True))
-        region_choices = list(Region.objects.values_list("name", flat=True))
-        field_choices = list(EducationField.objects.values_list("name", flat=True))
-
-        processor = TogetherCVProcessor()
-
-        llm_success = False
-        cv_info = {}
-        cv_file.seek(0)
-        try:
-            cv_info = processor.extract_info(
-                cv_file=cv_file,
-                choices={
-                    "skills": all_skills,
-                    "degrees": degree_choices,
-                    "regions": region_choices,
-                    "fields": field_choices,
-                },
-                position=application_link.position,
-            )
-            print("✅✅ final used:", cv_info)
-            llm_success = True
-        except ValueError as e:
-            print(f"⚠️ CV processing failed: {e}")
-
-        # Initialize all optional fields
-        region = None
-        degree = None
-        field = None
-        experience = None
-        had_leadership = None
-        skills_list = []
-        percentage = None
-        has_relevant_edu = None
-        distance = None
-
-        # 3. Extract fields only if present
-        if "skills" in cv_info:
-            emp_skill_names = cv_info["skills"]
-            skills_list = Skill.objects.filter(name__in=emp_skill_names)
-            required_skills = application_link.skills.all()
-            relevant_emp_skills = skills_list.filter(id__in=required_skills)
-            percentage = (
-                (relevant_emp_skills.count() / required_skills.count()) * 100
-                if required_skills.exists()
-                else 0
-            )
-
-        if "region" in cv_info:
-            region_name = cv_info["region"]
-            region = Region.objects.get(name=region_name)
-
-        if "degree" in cv_info:
-            degree = EducationDegree.objects.get(name=cv_info["degree"])
-
-        if "field" in cv_info:
-            field = EducationField.objects.get(name=cv_info["field"])
-
-        experience = cv_info.get("experience")
-        had_leadership = cv_info.get("had_leadership")
-        has_relevant_edu = cv_info.get("has_position_related_high_education")
-
-        # 4. Create User & Employee
+        # 2. Create User & Employee; the CV is parsed by a background job
         with transaction.atomic():
             user = User.objects.create(username=email)
             user.set_unusable_password()
@@ -748,27 +639,8 @@ class PublicApplicantsViewSet(ModelViewSet):
                 "application_link": application_link,
             }
 
-            # Optional fields
-            if region:
-                employee_data["region"] = region
-            if degree:
-                employee_data["highest_education_degree"] = degree
-            if field:
-                employee_data["highest_education_field"] = field
-            if experience is not None:
-                employee_data["years_of_experience"] = experience
-            if had_leadership is not None:
-                employee_data["had_leadership_role"] = had_leadership
-            if percentage is not None:
-                employee_data["percentage_of_matching_skills"] = percentage
-            if has_relevant_edu is not None:
-                employee_data["has_position_related_high_education"] = has_relevant_edu
-
             employee = Employee.objects.create(**employee_data)
 
-            if skills_list:
-                employee.skills.set(skills_list)
-
             BasicInfo.objects.create(
                 user=user,
                 role="employee",
@@ -779,13 +651,17 @@ class PublicApplicantsViewSet(ModelViewSet):
             application_link.number_remaining_applicants_to_limit -= 1
             application_link.save()
 
-        message = "Application submitted successfully."
-        if not llm_success:
-            message += " (Note: CV parsing failed, submitted with required data only.)"
+            enqueue_job(
+                "process_cv", {"employee_id": employee.id, "cv_filename": filename}
+            )
 
+        # The applicant is anonymous and cannot read the job, so no status URL
         return Response(
-            {"detail": message, "llm_success": llm_success, "employee_id": employee.id},
-            status=status.HTTP_201_CREATED,
+            {
+                "detail": "Application submitted successfully. The CV is being processed.",
+                "employee_id": employee.id,
+            },
+            status=status.HTTP_202_ACCEPTED,
         )
 
 
@@ -2153,8 +2029,9 @@ class EmployeePredictionViewSet(ModelViewSet):
     @action(detail=True, methods=["post"], url_path="predict-and-update")
     def predict_and_update_metrics(self, request, pk=None):
         """
-        Predicts and updates all metrics for a specific employee
+        Queues prediction of all metrics for a specific employee
         POST /api/employees/{id}/predict-and-update/
+        Returns 202 with a job id; poll /api/jobs/{job_id}/ for the result.
         """
         employee = self.get_object()
 
@@ -2181,103 +2058,16 @@ class EmployeePredictionViewSet(ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Prepare input data for prediction
-        input_data = np.array(
-            [
-                [
-                    employee.region.distance_to_work,
-                    employee.highest_education_degree.id,
-                    employee.highest_education_field.id,
-                    employee.years_of_experience,
-                    int(employee.had_leadership_role),
-                    employee.percentage_of_matching_skills,
-                    int(employee.has_position_related_high_education),
-                ]
-            ]
+        job = enqueue_job(
+            "employee_predictions", {"employee_id": employee.id}, request.user
         )
-
-        # Load models and make predictions
-        MODELS_DIR = os.path.join("api", "predictive_models")
-        predictions = {}
-
-        try:
-            # Salary prediction
-            salary_model = joblib.load(os.path.join(MODELS_DIR, "salary_model.pkl"))
-            predictions["predicted_basic_salary"] = float(
-                salary_model.predict(input_data)[0]
-            )
-
-            # Task rating prediction
-            task_model = joblib.load(os.path.join(MODELS_DIR, "task_ratings_model.pkl"))
-            predictions["predicted_avg_task_rating"] = float(
-                task_model.predict(input_data)[0]
-            )
-
-            # Time remaining prediction
-            time_model = joblib.load(
-                os.path.join(MODELS_DIR, "time_remaining_model.pkl")
-            )
-            predictions["predicted_avg_time_remaining_before_deadline"] = float(
-                time_model.predict(input_data)[0]
-            )
-
-            # Overtime prediction
-            overtime_model = joblib.load(
-                os.path.join(MODELS_DIR, "overtime_hours_model.pkl")
-            )
-            predictions["predicted_avg_overtime_hours"] = float(
-                overtime_model.predict(input_data)[0]
-            )
-
-            # Lateness prediction
-            lateness_model = joblib.load(
-                os.path.join(MODELS_DIR, "lateness_hours_model.pkl")
-            )
-            predictions["predicted_avg_lateness_hours"] = float(
-                lateness_model.predict(input_data)[0]
-            )
-
-            # Absence prediction
-            absence_model = joblib.load(
-                os.path.join(MODELS_DIR, "absent_days_model.pkl")
-            )
-            predictions["predicted_avg_absent_days"] = float(
-                absence_model.predict(input_data)[0]
-            )
-
-            # Update employee with predictions
-            for field, value in predictions.items():
-                setattr(employee, field, value)
-
-            # Update prediction timestamp
-            employee.last_prediction_date = timezone.now()
-            employee.save()
-
-            # Return updated employee data
-            serializer = self.get_serializer(employee)
-            return Response(
-                {
-                    "status": "Predictions updated successfully",
-                },
-                status=status.HTTP_200_OK,
-            )
-
-        except FileNotFoundError as e:
-            return Response(
-                {"error": f"Model file not found: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-        except Exception as e:
-            return Response(
-                {"error": f"Prediction failed: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        return job_accepted_response(request, job)
 
 
 class AdminStatsViewSet(ModelViewSet):
     """
     GET: List historical company statistics snapshots.
-    POST: Calculate new statistics and create a new snapshot.
+    POST: Queue calculation of a new statistics snapshot (202 with a job id).
     """
 
     queryset = CompanyStatistics.objects.all().order_by("-generated_at")
@@ -2286,28 +2076,13 @@ class AdminStatsViewSet(ModelViewSet):
     http_method_names = ["get", "post"]
 
     def create(self, request, *args, **kwargs):
-        # Calculate statistics on demand.
-        stats = calculate_statistics()
-
-        # Save the new snapshot.
-        company_stats = CompanyStatistics.objects.create(
-            total_employees=stats["total_employees"],
-            total_hrs=stats["total_hrs"],
-            position_stats=stats["position_stats"],
-            monthly_salary_totals=stats["monthly_salary_totals"],
-            overall_avg_task_rating=stats["overall_avg_task_rating"],
-            overall_avg_time_remaining=stats["overall_avg_time_remaining"],
-            overall_avg_overtime=stats["overall_avg_overtime"],
-            overall_avg_lateness=stats["overall_avg_lateness"],
-            overall_avg_absent_days=stats["overall_avg_absent_days"],
-            overall_avg_salary=stats["overall_avg_salary"],
-            region_stats=stats["region_stats"],
-        )
-
-        serializer = self.get_serializer(company_stats)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        # Statistics are calculated by a background worker; the snapshot
+        # is the job result.
+        job = enqueue_job("company_statistics", user=request.user)
+        return job_accepted_response(request, job)
 
     @action(detail=False, methods=["get"], url_path="latest")
+    @cached_result(COMPANY_STATISTICS)
     def latest(self, request):
         latest_stat = self.get_queryset().first()
         if latest_stat:
@@ -2315,6 +2090,64 @@ class AdminStatsViewSet(ModelViewSet):
             return Response(serializer.data)
         return Response({"detail": "No statistics available."}, status=404)
 
+    @action(detail=False, methods=["get"], url_path="timeseries")
+    def timeseries(self, request):
+        """
+        GET /api/admin/company-statistics/timeseries/
+            ?scope=company|position|region&id=<position/region id, repeatable>
+            &metric=<name, repeatable>&start=YYYY-MM-DD&end=YYYY-MM-DD
+            &interval=day|week|month
+        Snapshot figures over time, averaged per interval, with the change
+        since the previous point as <metric>_delta.
+        """
+        params = request.query_params
+        scope = params.get("scope", "company")
+        interval = params.get("interval", "day")
+        if scope not in SERIES_SCOPES:
+            return Response(
+                {"detail": f"scope must be one of {', '.join(SERIES_SCOPES)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if interval not in INTERVALS:
+            return Response(
+                {"detail": f"interval must be one of {', '.join(INTERVALS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        available = SERIES_SCOPES[scope][2]
+        metrics = params.getlist("metric")
+        unknown = [metric for metric in metrics if metric not in available]
+        if unknown:
+            return Response(
+                {
+                    "detail": f"Unknown metric(s) for {scope}: {', '.join(unknown)}.",
+                    "metrics": list(available),
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            ids = [int(value) for value in params.getlist("id")]
+            start, end = (
+                parse_date(params[name]) if params.get(name) else None
+                for name in ("start", "end")
+            )
+            if (params.get("start") and not start) or (params.get("end") and not end):
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"detail": "id must be an integer and start/end dates YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        series = statistics_series(scope, metrics, ids, start, end, interval)
+        return Response(
+            {
+                "scope": scope,
+                "interval": interval,
+                "metrics": metrics or list(available),
+                "series": series,
+            }
+        )
+
 
 class HRStatsViewSet(ModelViewSet):
     """
@@ -2331,11 +2164,20 @@ class HRStatsViewSet(ModelViewSet):
         qs = super().get_queryset()
         return qs.filter(user=self.request.user)
 
+    @cached_result(HRS, EMPLOYEES, per_user=True)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_result(HRS, EMPLOYEES, per_user=True)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=["post"], url_path="calculate-my-stats")
     def calculate_my_stats(self, request):
         """
         Endpoint for HR users to recalculate their own statistics
         POST /api/hr-stats/calculate-my-stats/
+        Returns 202 with a job id; poll /api/jobs/{job_id}/ for the result.
         """
         hr_profile = self.get_queryset().first()  # Gets the HR's own profile
 
@@ -2344,17 +2186,8 @@ class HRStatsViewSet(ModelViewSet):
                 {"error": "HR profile not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        hr_profile.calculate_accepted_employees_stats()
-
-        return Response(
-            {
-                "status": "success",
-                "message": "Your HR statistics have been recalculated",
-                "hr_id": hr_profile.id,
-                "user_id": request.user.id,
-            },
-            status=status.HTTP_200_OK,
-        )
+        job = enqueue_job("hr_stats", {"hr_id": hr_profile.id}, request.user)
+        return job_accepted_response(request, job)
 
 
 class AdminRankViewSet(ModelViewSet):
@@ -2391,81 +2224,12 @@ class AdminRankViewSet(ModelViewSet):
                     {"detail": f"Weight {key} must be a number."}, status=400
                 )
 
-        # Get all accepted employees with their position information
-        employees = Employee.objects.filter(interview_state="accepted").select_related(
-            "position"
-        )
-
-        # Prepare data structures
-        all_employees = []
-        position_groups = {}
-
-        # First pass: calculate scores and group by position
-        for emp in employees:
-            num_tasks = emp.number_of_accepted_tasks
-            num_days = emp.number_of_non_holiday_days_since_join
-
-            avg_task_rating = emp.total_task_ratings / num_tasks if num_tasks else 0
-            avg_time_remaining = (
-                emp.total_time_remaining_before_deadline / num_tasks if num_tasks else 0
-            )
-            avg_overtime = emp.total_overtime_hours / num_days if num_days else 0
-            avg_lateness = emp.total_lateness_hours / num_days if num_days else 0
-            avg_absent = emp.total_absent_days / num_days if num_days else 0
-
-            score = (
-                avg_task_rating * float(weights["avg_task_rating"])
-                + avg_time_remaining * float(weights["avg_time_remaining"])
-                + avg_overtime * float(weights["avg_overtime"])
-                + avg_lateness * float(weights["avg_lateness"])
-                + avg_absent * float(weights["avg_absent"])
-            )
-
-            # Store employee with score for global ranking
-            all_employees.append((emp, score))
-
-            # Group by position for position-specific ranking
-            if emp.position_id not in position_groups:
-                position_groups[emp.position_id] = []
-            position_groups[emp.position_id].append((emp, score))
-
-        # Global ranking
-        all_employees.sort(key=lambda x: x[1], reverse=True)
-        for global_rank, (emp, _) in enumerate(all_employees, start=1):
-            emp.rank = global_rank
-            # Don't save yet - we'll save both ranks together
-
-        # Position-specific ranking
-        position_stats = {}
-        for position_id, emp_scores in position_groups.items():
-            # Sort employees within this position
-            emp_scores.sort(key=lambda x: x[1], reverse=True)
-
-            # Assign position ranks
-            for position_rank, (emp, _) in enumerate(emp_scores, start=1):
-                emp.position_rank = position_rank
-
-            # Store position stats for response
-            position = Position.objects.get(id=position_id)
-            position_stats[position.name] = {
-                "count": len(emp_scores),
-                "top_performer": emp_scores[0][0].user.username if emp_scores else None,
-            }
-
-        # Bulk update all employees with both ranks
-        Employee.objects.bulk_update(
-            [emp for emp, _ in all_employees], ["rank", "position_rank"]
-        )
-
-        return Response(
-            {
-                "detail": f"{len(all_employees)} employees ranked successfully.",
-                "global_top_performer": (
-                    all_employees[0][0].user.username if all_employees else None
-                ),
-                "position_stats": position_stats,
-            }
+        job = enqueue_job(
+            "rank_employees",
+            {"weights": {key: float(weights[key]) for key in expected_fields}},
+            request.user,
         )
+        return job_accepted_response(request, job)
 
     @action(detail=False, methods=["post"], url_path="rank-hrs")
     def rank_hrs(self, request):
@@ -2507,7 +2271,11 @@ class AdminRankViewSet(ModelViewSet):
                     {"detail": f"Weight {key} must be a number."}, status=400
                 )
 
-        hrs = HR.objects.exclude(accepted_employees_avg_task_rating__isnull=True)
+        hrs = [
+            hr
+            for hr in attach_hr_stats(HR.objects.all())
+            if hr.accepted_employees_avg_task_rating is not None
+        ]
         ranked = []
 
         for hr in hrs:
@@ -2532,6 +2300,7 @@ class AdminViewTopViewSet(ModelViewSet):
     serializer_class = None
 
     @action(detail=False, methods=["get"], url_path="top-employees")
+    @cached_result(EMPLOYEES)
     def top_employees(self, request):
         top_emps = (
             Employee.objects.filter(interview_state="accepted", rank__isnull=False)
@@ -2578,8 +2347,9 @@ class AdminViewTopViewSet(ModelViewSet):
         return Response(result)
 
     @action(detail=False, methods=["get"], url_path="top-hrs")
+    @cached_result(HRS)
     def top_hrs(self, request):
-        top_hrs = (
+        top_hrs = attach_hr_stats(
             HR.objects.filter(rank__isnull=False)
             .select_related("user")
             .order_by("rank")[:10]
@@ -2614,6 +2384,7 @@ class HRViewTopInterviewedEmployeesViewSet(ModelViewSet):
     permission_classes = [IsAuthenticated, IsHR]
     serializer_class = None  # not used
 
+    @cached_result(EMPLOYEES, per_user=True)
     def list(self, request, *args, **kwargs):
         top_emps = (
             Employee.objects.filter(
@@ -2930,6 +2701,11 @@ class EmployeeSalaryViewSet(ReadOnlyModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=["get"])
+    def payslip(self, request, pk=None):
+        """The employee's payslip for this record as a PDF."""
+        return payslip_response(self.get_object())
+
 
 class AdminUserActivationViewSet(ModelViewSet):
     """
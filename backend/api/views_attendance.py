@@ -2,29 +2,69 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from django.utils import timezone
 from datetime import time, datetime, timedelta
 from .models import (
     AttendanceRecord,
-    OnlineDayYearday,
-    HolidayYearday,
-    HolidayWeekday,
-    OnlineDayWeekday,
+    Employee,
+    MonthlyAttendanceSummary,
     OvertimeRequest,
 )
-from .utils.queryset_utils import get_role_based_queryset
+from .utils.queryset_utils import date_range_q, get_role_based_queryset
+from .utils.work_calendar import get_work_calendar, HOLIDAY, ONLINE
 from .utils.geolocation_utils import validate_attendance_location
-from .serializers import AttendanceRecordSerializer
+from .utils.attendance_utils import insert_attendance_record
+from .utils.attendance_import import import_attendance
+from .utils.company_stats import apply_employee_counter_deltas
+from .utils.export import (
+    ATTENDANCE_EXPORT_COLUMNS,
+    get_export_format,
+    stream_export,
+)
+from .utils.lateness_utils import calculate_lateness_hours, get_grace_minutes
+from .utils.monthly_summary import (
+    add_summary_delta,
+    apply_summary_deltas,
+    record_contribution,
+    record_summary_values,
+)
+from .serializers import AttendanceRecordSerializer, MonthlyAttendanceSummarySerializer
 from .utils.overtime_utils import can_request_overtime
 from .permissions import AttendancePermission
-from .views import EightPerPagePagination
+from .views import EightPerPageKeysetPagination, EightPerPagePagination
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Exists, F, Max, Min, Q
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
+def load_check_in_employee(user, today):
+    """
+    Load the employee (with work schedule) and whether they already checked in
+    today in a single query. Attendance sites come from the in-process
+    geofence index. Returns None if the user has no employee profile.
+    """
+    employee = (
+        Employee.objects.filter(user=user)
+        .annotate(
+            checked_in_today=Exists(
+                AttendanceRecord.objects.filter(user=user, date=today)
+            )
+        )
+        .first()
+    )
+    if employee is None:
+        return None
+
+    # Reuse the loaded rows instead of lazily re-fetching them later
+    employee.user = user
+    user.employee = employee
+    return employee
+
+
 class AttendanceRecordFilter(DjangoFilterBackend):
     def filter_queryset(self, request, queryset, view):
         user_query = request.query_params.get("user", None)
@@ -47,12 +87,29 @@ class AttendanceRecordFilter(DjangoFilterBackend):
         if date_query:
             queryset = queryset.filter(date=date_query)
 
-        # Month and Year filtering
-        if month_query and month_query.isdigit():
-            queryset = queryset.filter(date__month=int(month_query))
-
-        if year_query and year_query.isdigit():
-            queryset = queryset.filter(date__year=int(year_query))
+        # Month and Year filtering, as half-open date ranges on the indexed column
+        month = int(month_query) if month_query and month_query.isdigit() else None
+        year = int(year_query) if year_query and year_query.isdigit() else None
+        if (month is not None and not 1 <= month <= 12) or (
+            year is not None and not 1 <= year < 9999
+        ):
+            return queryset.none()
+        if year is not None:
+            queryset = queryset.filter(date_range_q("date", year, month))
+        elif month is not None:
+            # Month without a year: that month in every year with attendance
+            bounds = AttendanceRecord.objects.aggregate(
+                first=Min("date"), last=Max("date")
+            )
+            if bounds["first"] is None:
+                return queryset.none()
+            queryset = queryset.filter(
+                date_range_q(
+                    "date",
+                    month=month,
+                    years=range(bounds["first"].year, bounds["last"].year + 1),
+                )
+            )
 
         # Status filtering
         if status_query:
@@ -80,7 +137,8 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     queryset = AttendanceRecord.objects.all().order_by("-date")
     serializer_class = AttendanceRecordSerializer
     permission_classes = [IsAuthenticated, AttendancePermission]
-    pagination_class = EightPerPagePagination
+    pagination_class = EightPerPageKeysetPagination
+    keyset_field = "date"
     filter_backends = [AttendanceRecordFilter]
 
     # Attendance timing constants
@@ -105,39 +163,28 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         now_dt = timezone.localtime()
         today = now_dt.date()
         now_time = now_dt.time()
-        weekday_name = today.strftime("%A")
 
-        employee = user.employee
+        employee = load_check_in_employee(user, today)
+        if employee is None:
+            return Response(
+                {"can_check_in": False, "reason": "Employee profile not found."}
+            )
+        day_kind = get_work_calendar(employee).day_kind(today)
 
         # 1. Check if already checked in
-        if AttendanceRecord.objects.filter(user=user, date=today).exists():
+        if employee.checked_in_today:
             return Response(
                 {"can_check_in": False, "reason": "You have already checked in today."}
             )
 
         # 2. Check for holidays
-        if (
-            HolidayYearday.objects.filter(
-                month=today.month, day=today.day, employees=employee
-            ).exists()
-            or HolidayWeekday.objects.filter(
-                weekday=weekday_name, employees=employee
-            ).exists()
-        ):
+        if day_kind == HOLIDAY:
             return Response(
                 {"can_check_in": False, "reason": "Check-in is disabled on a holiday."}
             )
 
         # 3. Check if today is an online day
-        is_online_day = (
-            OnlineDayYearday.objects.filter(
-                month=today.month, day=today.day, employees=employee
-            ).exists()
-            or OnlineDayWeekday.objects.filter(
-                weekday=weekday_name, employees=employee
-            ).exists()
-        )
-        if is_online_day:
+        if day_kind == ONLINE:
             return Response(
                 {
                     "can_check_in": True,
@@ -181,6 +228,127 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         self.perform_create(serializer)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            record = serializer.save()
+            apply_summary_deltas(
+                add_summary_delta(
+                    {}, record.user_id, record.date, record_summary_values(record)
+                )
+            )
+
+    def perform_update(self, serializer):
+        old = serializer.instance
+        deltas = add_summary_delta(
+            {}, old.user_id, old.date, record_summary_values(old), sign=-1
+        )
+        with transaction.atomic():
+            record = serializer.save()
+            add_summary_delta(
+                deltas, record.user_id, record.date, record_summary_values(record)
+            )
+            apply_summary_deltas(deltas)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            apply_summary_deltas(
+                add_summary_delta(
+                    {},
+                    instance.user_id,
+                    instance.date,
+                    record_summary_values(instance),
+                    sign=-1,
+                )
+            )
+
+    @action(detail=False, methods=["get"], url_path="monthly-summary")
+    def monthly_summary(self, request):
+        """
+        Monthly attendance totals (absent/late days, lateness and approved
+        overtime hours) per employee for ?year=&month=, read from the
+        maintained summary table. Employees only see their own.
+        """
+        year = request.query_params.get("year", "")
+        month = request.query_params.get("month", "")
+        if not (year.isdigit() and month.isdigit() and 1 <= int(month) <= 12):
+            return Response(
+                {"detail": "Valid year and month query parameters are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        role = request.user.basicinfo.role.lower()
+        if role in ["admin", "hr"]:
+            summaries = MonthlyAttendanceSummary.objects.all()
+            user_query = request.query_params.get("user")
+            if user_query and user_query.isdigit():
+                summaries = summaries.filter(user_id=user_query)
+        else:
+            summaries = MonthlyAttendanceSummary.objects.filter(user=request.user)
+        summaries = (
+            summaries.filter(year=int(year), month=int(month))
+            .select_related("user")
+            .order_by("user__username")
+        )
+
+        # Summaries are ordered by employee, not date, so always page by number
+        paginator = EightPerPagePagination()
+        page = paginator.paginate_queryset(summaries, request, view=self)
+        serializer = MonthlyAttendanceSummarySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream the filtered attendance list as CSV, NDJSON or XLSX
+        (?file_format=), applying the same role-based filtering as the list.
+        """
+        file_format = get_export_format(request)
+        if file_format is None:
+            return Response(
+                {"detail": "Unsupported format. Use csv, ndjson or xlsx."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return stream_export(
+            self.filter_queryset(self.get_queryset()),
+            ATTENDANCE_EXPORT_COLUMNS,
+            file_format,
+            "attendance",
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-import",
+        parser_classes=[MultiPartParser],
+    )
+    def bulk_import(self, request):
+        """
+        HR/Admin only: Import badge-reader / device logs from a CSV or NDJSON
+        upload (`file`). The format is taken from `format` or the file extension.
+        Rows upsert on (user, date); returns a per-row error report.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"detail": "A CSV or NDJSON file is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        file_format = (
+            request.data.get("format") or upload.name.rsplit(".", 1)[-1]
+        ).lower()
+        if file_format in ("ndjson", "jsonl"):
+            file_format = "ndjson"
+        elif file_format != "csv":
+            return Response(
+                {"detail": "Unsupported format. Use csv or ndjson."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        report = import_attendance(upload, file_format)
+        return Response(report, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=["post"])
     def check_in(self, request):
         """Employee only: Record check-in for today."""
@@ -188,34 +356,25 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         now_dt = timezone.localtime()
         today = now_dt.date()
         now = now_dt.time()
-        weekday_name = today.strftime("%A")  # Get weekday name for HolidayWeekday check
-
-        # Get employee record (added this since we need employee-specific data)
-        employee = user.employee
-
-        # Changed: Check for holidays using new Holiday models instead of PublicHoliday
-        if (
-            HolidayYearday.objects.filter(
-                month=today.month, day=today.day, employees=employee
-            ).exists()
-            or HolidayWeekday.objects.filter(
-                weekday=weekday_name, employees=employee
-            ).exists()
-        ):
+
+        # Employee, work schedule and today's check-in flag in one query; attendance
+        # sites come from the in-process geofence index
+        employee = load_check_in_employee(user, today)
+        if employee is None:
+            return Response(
+                {"detail": "Employee profile not found."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Holiday / online day lookup against the employee's compiled calendar
+        day_kind = get_work_calendar(employee).day_kind(today)
+        if day_kind == HOLIDAY:
             return Response(
                 {"detail": "Today is your holiday."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Changed: Check if today is an online day using new OnlineDay models
-        is_online_day = (
-            OnlineDayYearday.objects.filter(
-                month=today.month, day=today.day, employees=employee
-            ).exists()
-            or OnlineDayWeekday.objects.filter(
-                weekday=weekday_name, employees=employee
-            ).exists()
-        )
+        is_online_day = day_kind == ONLINE
 
         # Changed: Use employee's expected times instead of hardcoded WORK_START/END
         if not employee.expected_attend_time or not employee.expected_leave_time:
@@ -227,11 +386,11 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         # Changed: Calculate grace period based on employee's expected time
         grace_end = (
             datetime.combine(today, employee.expected_attend_time)
-            + timedelta(minutes=15)
+            + timedelta(minutes=get_grace_minutes())
         ).time()
 
-        # Prevent duplicate check-in (unchanged)
-        if AttendanceRecord.objects.filter(user=user, date=today).exists():
+        # Prevent duplicate check-in (the INSERT below also guards against races)
+        if employee.checked_in_today:
             return Response(
                 {"detail": "Attendance already submitted for today."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -282,8 +441,9 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Record creation with geolocation data
-        record = AttendanceRecord.objects.create(
+        # Record creation with geolocation data. INSERT ... ON CONFLICT (user, date)
+        # and the lateness counter / monthly summary bumps happen in one transaction.
+        record = AttendanceRecord(
             user=user,
             date=today,
             check_in_time=now,
@@ -293,11 +453,33 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             mac_address=mac_address_used,
             check_in_latitude=employee_lat,
             check_in_longitude=employee_lon,
+            lateness_hours=calculate_lateness_hours(
+                now, employee.expected_attend_time
+            ),
         )
+        with transaction.atomic():
+            if insert_attendance_record(record) is None:
+                return Response(
+                    {"detail": "Attendance already submitted for today."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-        if record.status == "late" and record.lateness_hours > 0:
-            employee.total_lateness_hours += record.lateness_hours
-            employee.save(update_fields=["total_lateness_hours"])
+            if record.status == "late" and record.lateness_hours > 0:
+                Employee.objects.filter(pk=employee.pk).update(
+                    total_lateness_hours=F("total_lateness_hours")
+                    + record.lateness_hours
+                )
+                apply_employee_counter_deltas(
+                    {employee.pk: {"total_lateness_hours": record.lateness_hours}}
+                )
+            apply_summary_deltas(
+                add_summary_delta(
+                    {},
+                    user.pk,
+                    today,
+                    record_contribution(record.status, record.lateness_hours),
+                )
+            )
 
         serializer = self.get_serializer(record)
         response_data = serializer.data.copy()
@@ -406,7 +588,7 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["patch"], url_path="convert-to-leave")
     def convert_to_leave(self, request, pk=None):
         """Convert an attendance record to casual leave"""
-        from .models import CasualLeave, Employee, EmployeeLeavePolicy, SalaryRecord
+        from .models import CasualLeave, Employee, EmployeeLeavePolicy
         from django.db import models
 
         attendance_record = self.get_object()
@@ -492,45 +674,15 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             )
 
             # Update attendance record status to present (or you can create a new status)
+            # The summary delta also recomputes any salary generated for the month
             attendance_record.status = "present"
             attendance_record.save()
-
-            # Update salary records if they exist for this month/year
-            month = attendance_record.date.month
-            year = attendance_record.date.year
-
-            salary_records = SalaryRecord.objects.filter(
-                user=attendance_record.user, month=month, year=year
+            apply_summary_deltas(
+                add_summary_delta(
+                    {}, attendance_record.user_id, attendance_record.date, [-1, 0, 0, 0]
+                )
             )
 
-            for salary_record in salary_records:
-                # Recalculate salary - reduce absent days and absence penalty
-                details = salary_record.details
-                if details.get("absent_days", 0) > 0:
-                    details["absent_days"] -= 1
-                    absence_penalty = employee.absence_penalty or 0
-                    details["total_absence_penalty"] = max(
-                        0, (details.get("total_absence_penalty", 0) - absence_penalty)
-                    )
-                    details["total_deductions"] = (
-                        details.get("total_late_penalty", 0)
-                        + details.get("total_absence_penalty", 0)
-                        + details.get("tax_deduction", 0)
-                        + details.get("insurance_deduction", 0)
-                    )
-
-                    # Recalculate final salary
-                    salary_record.final_salary = (
-                        salary_record.base_salary
-                        + details.get("total_overtime_salary", 0)
-                        + details.get("bonus_amount", 0)
-                        + details.get("attendance_bonus", 0)
-                        - details.get("total_deductions", 0)
-                    )
-
-                    salary_record.details = details
-                    salary_record.save()
-
             return Response(
                 {
                     "detail": "Attendance record converted to casual leave successfully.",
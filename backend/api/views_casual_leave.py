@@ -13,6 +13,11 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Sum, F
 from django.db.models.functions import Extract
 from .views import TwentyPerPagePagination
+from .utils.export import (
+    CASUAL_LEAVE_EXPORT_COLUMNS,
+    get_export_format,
+    stream_export,
+)
 
 
 class CasualLeaveViewSet(viewsets.ModelViewSet):
@@ -156,6 +161,25 @@ class CasualLeaveViewSet(viewsets.ModelViewSet):
         leave.save()
         return Response(self.get_serializer(leave).data)
 
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream the filtered casual leave list as CSV, NDJSON or XLSX
+        (?file_format=), applying the same role-based filtering as the list.
+        """
+        file_format = get_export_format(request)
+        if file_format is None:
+            return Response(
+                {"detail": "Unsupported format. Use csv, ndjson or xlsx."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return stream_export(
+            self.filter_queryset(self.get_queryset()),
+            CASUAL_LEAVE_EXPORT_COLUMNS,
+            file_format,
+            "casual_leaves",
+        )
+
     @action(detail=False, methods=["get"], url_path="my-requests")
     def my_requests(self, request):
         """
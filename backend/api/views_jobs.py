@@ -0,0 +1,25 @@
+from rest_framework import viewsets
+from rest_framework.permissions import IsAuthenticated
+
+from .models import Job
+from .serializers import JobSerializer
+from .views import TenPerPagePagination
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Status, progress and result of background jobs queued by endpoints that
+    answer 202. Users see the jobs they started; admins see every job.
+    """
+
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = TenPerPagePagination
+    filterset_fields = ["kind", "status"]
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Job.objects.all()
+        if hasattr(user, "basicinfo") and user.basicinfo.role == "admin":
+            return queryset
+        return queryset.filter(created_by=user)
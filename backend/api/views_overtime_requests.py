@@ -6,18 +6,22 @@ from django.utils import timezone
 from django.db.models import Q
 from .models import OvertimeRequest
 from .utils.queryset_utils import get_role_based_queryset
+from .utils.monthly_summary import add_summary_delta, apply_summary_deltas
 from .serializers import (
     OvertimeRequestSerializer,
     OvertimeRequestCreateSerializer,
     OvertimeRequestApprovalSerializer,
 )
 from .permissions import OvertimeRequestPermission
+from .views import KeysetPagination
 
 
 class OvertimeRequestViewSet(viewsets.ModelViewSet):
     queryset = OvertimeRequest.objects.all()
     serializer_class = OvertimeRequestSerializer
     permission_classes = [IsAuthenticated, OvertimeRequestPermission]
+    pagination_class = KeysetPagination
+    keyset_field = "requested_at"
 
     def get_queryset(self):
         return get_role_based_queryset(self.request.user, OvertimeRequest)
@@ -115,6 +119,14 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
 
             employee.total_overtime_hours -= attendance_record.overtime_hours
             employee.save(update_fields=["total_overtime_hours"])
+            apply_summary_deltas(
+                add_summary_delta(
+                    {},
+                    attendance_record.user_id,
+                    attendance_record.date,
+                    [0, 0, 0, -attendance_record.overtime_hours],
+                )
+            )
 
             attendance_record.overtime_hours = 0
             attendance_record.overtime_approved = False
@@ -179,6 +191,14 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
         employee = attendance_record.user.employee
         employee.total_overtime_hours += final_overtime_hours
         employee.save(update_fields=["total_overtime_hours"])
+        apply_summary_deltas(
+            add_summary_delta(
+                {},
+                attendance_record.user_id,
+                attendance_record.date,
+                [0, 0, 0, final_overtime_hours],
+            )
+        )
 
         response_serializer = OvertimeRequestSerializer(overtime_request)
         return Response(response_serializer.data)
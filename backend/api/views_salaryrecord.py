@@ -4,15 +4,22 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from django.utils import timezone
 from django.contrib.auth import get_user_model
-from api.models import AttendanceRecord, OvertimeRequest, SalaryRecord, Employee
+from api.models import OvertimeRequest, SalaryRecord, Employee
 from api.serializers import SalaryRecordSerializer
-from django.db import models
 from django_filters.rest_framework import DjangoFilterBackend
 from .permissions import IsHRorAdmin
 from django.db.models import Q
 from django.contrib.auth import get_user_model
 from datetime import date
 from .views import TenPerPagePagination
+from .utils.monthly_summary import get_monthly_summary
+from .utils.payroll import COMPENSATION_FIELDS, calculate_salary, run_payroll
+from .utils.export import (
+    SALARY_EXPORT_COLUMNS,
+    get_export_format,
+    stream_export,
+)
+from .utils.payslips import payslip_response, payslips_zip_response
 
 User = get_user_model()
 
@@ -91,6 +98,78 @@ class SalaryRecordViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream the filtered salary record list as CSV, NDJSON or XLSX
+        (?file_format=), applying the same role-based filtering as the list.
+        """
+        file_format = get_export_format(request)
+        if file_format is None:
+            return Response(
+                {"detail": "Unsupported format. Use csv, ndjson or xlsx."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return stream_export(
+            self.filter_queryset(self.get_queryset()),
+            SALARY_EXPORT_COLUMNS,
+            file_format,
+            "salary_records",
+        )
+
+    @action(detail=True, methods=["get"])
+    def payslip(self, request, pk=None):
+        """The record's payslip as a PDF."""
+        return payslip_response(self.get_object())
+
+    @action(detail=False, methods=["get"])
+    def payslips(self, request):
+        """
+        Download a month's payslips (?year=&month=, optionally ?user=) as a
+        ZIP of PDFs, rendered in parallel and streamed as they are ready.
+        """
+        try:
+            year = int(request.query_params.get("year"))
+            month = int(request.query_params.get("month"))
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "year and month are required integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        if not queryset.exists():
+            return Response(
+                {"detail": "No salary records for this period."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return payslips_zip_response(queryset, f"payslips_{year}-{month:02d}")
+
+    @action(detail=False, methods=["post"], url_path="run-payroll")
+    def run_payroll(self, request):
+        """
+        Generate salary records for every eligible employee for a month
+        (optionally only `users`, a list of user ids) in one batch, replacing
+        records generated earlier. Returns a run summary with timings.
+        """
+        try:
+            year = int(request.data.get("year"))
+            month = int(request.data.get("month"))
+            user_ids = request.data.get("users")
+            if user_ids is not None:
+                user_ids = [int(user_id) for user_id in user_ids]
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "year and month are required integers; users a list of ids."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not 1 <= month <= 12:
+            return Response(
+                {"detail": "month must be between 1 and 12."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(run_payroll(year, month, user_ids))
+
     def create(self, request, *args, **kwargs):
         # Accept both "user" and "user_id" for compatibility
         user_value = request.data.get("user") or request.data.get("user_id")
@@ -131,11 +210,6 @@ class SalaryRecordViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        base_salary = float(employee.basic_salary or 0)
-        absence_penalty = float(employee.absence_penalty or 0)
-        shorttime_hour_penalty = float(employee.shorttime_hour_penalty or 0)
-        overtime_hour_salary = float(employee.overtime_hour_salary or 0)
-
         # Check for existing SalaryRecord
         if SalaryRecord.objects.filter(user=user, year=year, month=month).exists():
             # Delete existing records for this user/month/year
@@ -144,78 +218,20 @@ class SalaryRecordViewSet(viewsets.ModelViewSet):
                 f"Deleted existing salary record for {user.username} - {month}/{year}"
             )
 
-        records = AttendanceRecord.objects.filter(
-            user=user, date__year=year, date__month=month
+        # Month totals come from the maintained summary row, not raw attendance
+        summary = get_monthly_summary(user, year, month)
+        base_salary, final_salary, details = calculate_salary(
+            {field: getattr(employee, field) for field in COMPENSATION_FIELDS},
+            summary,
         )
-        absent_days = records.filter(status="absent").count()
-        late_days = records.filter(status="late").count()
-        lateness_hours = (
-            records.filter(status="late").aggregate(total=models.Sum("lateness_hours"))[
-                "total"
-            ]
-            or 0
-        )
-        # Overtime: sum overtime_hours from AttendanceRecord where overtime_approved=True and overtime_hours > 0
-        overtime_hours = (
-            records.filter(overtime_approved=True, overtime_hours__gt=0).aggregate(
-                total=models.Sum("overtime_hours")
-            )["total"]
-            or 0
-        )
-        # Short time: sum short_time_hours where check_out_time is before expected_leave_time
-        # short_time_hours = 0
-        # short_time_penalty_total = 0
-        # for rec in records:
-        #     # Only count if expected_leave_time and check_out_time are set
-        #     expected_leave = getattr(rec.user.employee, "expected_leave_time", None)
-        #     if (
-        #         expected_leave
-        #         and rec.check_out_time
-        #         and rec.check_out_time < expected_leave
-        #     ):
-        #         # Calculate short time in hours
-        #         delta = (expected_leave.hour * 60 + expected_leave.minute) - (
-        #             rec.check_out_time.hour * 60 + rec.check_out_time.minute
-        #         )
-        #         hours = delta / 60.0
-        #         if hours > 0:
-        #             short_time_hours += hours
-        # short_time_hours = round(short_time_hours, 2)
-        # short_time_penalty_total = round(short_time_hours * shorttime_hour_penalty, 2)
-
-        absent_penalty_total = absent_days * absence_penalty
-        late_penalty_total = lateness_hours * shorttime_hour_penalty
-        overtime_bonus_total = overtime_hours * overtime_hour_salary
-        # if you ever want to add short time, put it in dedcutions (short_time_penalty_total)
-        total_deductions = absent_penalty_total + late_penalty_total
-        final_salary = round(
-            base_salary - total_deductions + overtime_bonus_total,
-            2,
-        )
-
-        details = {
-            "absent_days": absent_days,
-            "late_days": late_days,
-            "lateness_hours": round(lateness_hours, 2),
-            "overtime_hours": round(overtime_hours, 2),
-            "absence_day_penalty": absence_penalty,
-            "shorttime_hour_penalty": shorttime_hour_penalty,
-            "overtime_hour_salary": overtime_hour_salary,
-            "total_absence_penalty": round(absent_penalty_total, 2),
-            "total_late_penalty": round(late_penalty_total, 2),
-            # "short_time_hours": short_time_hours,
-            # "short_time_penalty": short_time_penalty_total,
-            "total_deductions": round(total_deductions, 2),
-            "total_overtime_salary": round(overtime_bonus_total, 2),
-        }
 
         salary_record = SalaryRecord.objects.create(
             user=user,
             year=year,
             month=month,
-            base_salary=round(base_salary, 2),
+            base_salary=base_salary,
             final_salary=final_salary,
-            details=details,
+            **details,
         )
         serializer = SalaryRecordSerializer(salary_record)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
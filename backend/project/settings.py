@@ -102,6 +102,10 @@ DATABASES = {
     }
 }
 
+# Benchmark commands write synthetic data and refuse to run against these
+# database hosts (api/management/benchmarks.py).
+PRODUCTION_DATABASE_HOSTS = [DATABASES["default"]["HOST"]]
+
 EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")
 
 
@@ -193,6 +197,13 @@ EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = "noreply@HRTempo.com"
 TOGETHER_API_KEY = os.environ.get("TOGETHER_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Seconds before a worker process reloads attendance sites (headquarters and
+# region buildings) into its in-memory geofence index.
+GEOFENCE_INDEX_TTL_SECONDS = 60
+
+# Check-ins up to this many minutes after the expected attend time are not late.
+ATTENDANCE_LATENESS_GRACE_MINUTES = 15
 SPECTACULAR_SETTINGS = {
     "TITLE": "HR Management API",
     "DESCRIPTION": "API documentation for HR Management System",
@@ -201,3 +212,30 @@ SPECTACULAR_SETTINGS = {
     "COMPONENT_SPLIT_REQUEST": True,
     "SCHEMA_PATH_PREFIX": r"/api/",
 }
+
+# Cache of statistics and leaderboard responses (api/utils/result_cache.py).
+# RESULT_CACHE_BACKEND: "file" (default; shared by the processes of a host,
+# directory in RESULT_CACHE_LOCATION), "redis" (any Redis-compatible server at
+# RESULT_CACHE_LOCATION, for several hosts; needs the redis package) or
+# "locmem" (single process only: writes made by other processes, such as
+# run_workers jobs, would not invalidate it, so run_workers refuses it).
+RESULT_CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "results"),
+    "file": (
+        "django.core.cache.backends.filebased.FileBasedCache",
+        os.path.join(BASE_DIR, "cache", "results"),
+    ),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://127.0.0.1:6379/1"),
+}
+_result_cache_backend, _result_cache_location = RESULT_CACHE_BACKENDS[
+    os.environ.get("RESULT_CACHE_BACKEND", "file")
+]
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "results": {
+        "BACKEND": _result_cache_backend,
+        "LOCATION": os.environ.get("RESULT_CACHE_LOCATION", _result_cache_location),
+        # Seconds a cached response is served at most, even without writes
+        "TIMEOUT": int(os.environ.get("RESULT_CACHE_TTL_SECONDS", 300)),
+    },
+}
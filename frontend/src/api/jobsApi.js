@@ -0,0 +1,18 @@
+import axiosInstance from "./config";
+
+// Get a background job's status, progress and result
+export const getJob = (jobId) => {
+    return axiosInstance.get(`/jobs/${jobId}/`);
+};
+
+// Poll a job queued by a 202 response until it finishes.
+// Resolves with the job's result, rejects with its error.
+export const waitForJob = async (jobId, { interval = 1000, onProgress } = {}) => {
+    for (;;) {
+        const { data: job } = await getJob(jobId);
+        onProgress?.(job);
+        if (job.status === "succeeded") return job.result;
+        if (job.status === "failed") throw new Error(job.error || "Job failed");
+        await new Promise((resolve) => setTimeout(resolve, interval));
+    }
+};
@@ -16,6 +16,7 @@ import {
   Cell,
 } from "recharts";
 import axiosInstance from "../../api/config";
+import { waitForJob } from "../../api/jobsApi";
 import HrAdminUpperFallback from "../DashboardFallBack/HrAdminUpperFallback";
 const pieColors = [
   "rgb(13, 202, 240)", // Cyan
@@ -49,6 +50,7 @@ export default function AdminStats() {
     setRecalculating(true);
     axiosInstance
       .post("/admin/company-statistics/")
+      .then((res) => waitForJob(res.data.job_id))
       .then(() => {
         // Refresh the data after recalculation
         axiosInstance
@@ -10,6 +10,7 @@ import {
   Alert,
 } from "react-bootstrap";
 import axiosInstance from "../../api/config";
+import { waitForJob } from "../../api/jobsApi";
 import HrAdminLowerFallBack from "../DashboardFallBack/HrAdminLowerFallback"
 
 const getCorrelationColor = (value) => {
@@ -128,7 +129,9 @@ export default function AdminTopTable() {
         Object.entries(weights).map(([key, value]) => [key, Number(value)])
       );
 
-      await axiosInstance.post(url, { weights: numericWeights });
+      const res = await axiosInstance.post(url, { weights: numericWeights });
+      // Employee ranking runs as a background job (202 + job id)
+      if (res.status === 202) await waitForJob(res.data.job_id);
       setShowModal(false);
       await fetchData(); // Refresh data after ranking
     } catch (err) {
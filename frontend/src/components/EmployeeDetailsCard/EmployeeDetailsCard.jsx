@@ -53,6 +53,7 @@ import { Tooltip } from "react-bootstrap";
 import { OverlayTrigger } from "react-bootstrap";
 import Select from "react-select";
 import axiosInstance from "../../api/config";
+import { waitForJob } from "../../api/jobsApi";
 import { toast } from "react-toastify";
 import { useNavigate } from "react-router-dom";
 import { FaClipboardCheck, FaCheckDouble } from "react-icons/fa";
@@ -661,6 +662,7 @@ export default function CandidateDetailsCard({
       const response = await axiosInstance.post(
         `/employees/${candidateId}/predict-and-update/`
       );
+      await waitForJob(response.data.job_id);
 
       toast.success("Predictions updated successfully");
       onPredictUpdate?.();
@@ -11,6 +11,7 @@ import {
 } from "recharts";
 import "./HRStats.css";
 import axiosInstance from "../../api/config";
+import { waitForJob } from "../../api/jobsApi";
 import HrAdminUpperFallback from "../DashboardFallBack/HrAdminUpperFallback";
 import { FaCrown } from "react-icons/fa";
 const HRStats = () => {
@@ -30,6 +31,7 @@ const HRStats = () => {
     setRecalculating(true);
     axiosInstance
       .post("/hr/statistics/calculate-my-stats/")
+      .then((res) => waitForJob(res.data.job_id))
       .then(() => {
         // Refresh data after recalculation
         axiosInstance